@@ -0,0 +1 @@
+# offline load-test and benchmark suite
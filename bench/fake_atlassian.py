@@ -0,0 +1,204 @@
+"""Stand-in Jira and Confluence REST servers for offline benchmarking.
+
+Only the endpoints OctoFetch calls are implemented, with deterministic
+synthetic data and configurable latency, page-size cap, error rate and
+body size.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    max_page_size: int = 100
+    error_rate: float = 0.0
+    body_size: int = 2000
+    total: int = 5000
+    users: int = 500
+    seed: int = 7
+
+
+def _timestamp(i: int) -> str:
+    day = 1 + (i % 28)
+    return f"2024-{1 + (i // 28) % 12:02d}-{day:02d}T{i % 24:02d}:{i % 60:02d}:00.000+0000"
+
+
+class FakeAtlassianHandler(BaseHTTPRequestHandler):
+    server_version = "FakeAtlassian/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeConfig:
+        return self.server.config
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        cfg = self.config
+        delay = max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        time.sleep(delay)
+        with self.server.lock:
+            self.server.calls += 1
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            return self._send(503, {"errorMessages": ["injected failure"]})
+
+        route = self._route(url.path)
+        if route is None:
+            return self._send(404, {"errorMessages": [f"no fake for {url.path}"]})
+        handler, match = route
+        status, payload = handler(params, *match)
+        self._send(status, payload)
+
+    def _route(self, path: str):
+        for pattern, handler in (
+            (r"/rest/api/2/search$", self.jira_search),
+            (r"/rest/api/2/user/search$", self.jira_users),
+            (r"/rest/api/2/users/search$", self.jira_all_users),
+            (r"/rest/api/search$", self.confluence_search),
+            (r"/rest/api/content/(\d+)$", self.confluence_page),
+        ):
+            match = re.search(pattern, path)
+            if match:
+                return handler, match.groups()
+        return None
+
+    def _send(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _window(self, params: Dict, start_key: str, limit_key: str) -> Tuple[int, int]:
+        start = int(params.get(start_key, 0))
+        size = min(int(params.get(limit_key, 50)), self.config.max_page_size)
+        return start, size
+
+    def _body(self, i: int, markup: str) -> str:
+        unit = markup.format(i=i)
+        return (unit * (self.config.body_size // max(len(unit), 1) + 1))[: self.config.body_size]
+
+    def jira_search(self, params: Dict) -> Tuple[int, Dict]:
+        start, size = self._window(params, "startAt", "maxResults")
+        keys = range(start, min(start + size, self.config.total))
+        issues = [
+            {
+                "key": f"BENCH-{i}",
+                "fields": {
+                    "summary": f"Synthetic issue {i}",
+                    "description": self._body(i, "h2. Issue {i}\n*bold* text with [a link|https://example.com/{i}]\n"),
+                    "labels": ["bench", f"group-{i % 10}"],
+                    "created": _timestamp(i),
+                    "updated": _timestamp(i + 1),
+                    "assignee": {"accountId": f"user-{i % self.config.users}", "emailAddress": f"user{i % self.config.users}@example.com"},
+                },
+            }
+            for i in keys
+        ]
+        return 200, {"startAt": start, "maxResults": size, "total": self.config.total, "issues": issues}
+
+    def jira_users(self, params: Dict) -> Tuple[int, List]:
+        needle = (params.get("query") or params.get("username") or "").lower().strip(".")
+        start, size = self._window(params, "startAt", "maxResults")
+        users = [
+            {"accountId": f"user-{i}", "displayName": f"Bench User {i}", "emailAddress": f"user{i}@example.com", "active": True}
+            for i in range(self.config.users)
+        ]
+        matched = [u for u in users if needle in u["displayName"].lower() or needle in u["emailAddress"]]
+        return 200, matched[start:start + size]
+
+    def jira_all_users(self, params: Dict) -> Tuple[int, List]:
+        # Cloud's bulk listing, which the /users directory loads from
+        start, size = self._window(params, "startAt", "maxResults")
+        users = [
+            {"accountId": f"user-{i}", "accountType": "atlassian", "displayName": f"Bench User {i}",
+             "emailAddress": f"user{i}@example.com", "active": True}
+            for i in range(start, min(start + size, self.config.users))
+        ]
+        return 200, users
+
+    def _page(self, i: int) -> Dict:
+        return {
+            "id": str(100000 + i),
+            "type": "page",
+            "title": f"Synthetic page {i}",
+            "body": {"storage": {"value": self._body(i, "<h2>Page {i}</h2><p>Some <strong>storage</strong> text</p>"), "representation": "storage"}},
+            "version": {"number": 1 + i % 5, "when": _timestamp(i + 1)},
+            "history": {"createdDate": _timestamp(i).replace("+0000", "Z")},
+            "metadata": {"labels": {"results": [{"name": "bench"}], "size": 1}},
+        }
+
+    def confluence_search(self, params: Dict) -> Tuple[int, Dict]:
+        start, size = self._window(params, "start", "limit")
+        ids = range(start, min(start + size, self.config.total))
+        results = [{"content": self._page(i), "title": f"Synthetic page {i}"} for i in ids]
+        links = {"next": f"/rest/api/search?start={start + size}"} if start + size < self.config.total else {}
+        return 200, {"results": results, "start": start, "limit": size, "size": len(results), "totalSize": self.config.total, "_links": links}
+
+    def confluence_page(self, params: Dict, page_id: str) -> Tuple[int, Dict]:
+        return 200, self._page(int(page_id) - 100000)
+
+
+class FakeAtlassianServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: FakeConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeAtlassianHandler)
+        self.config = config
+        self.calls = 0
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAtlassianServer":
+        random.seed(self.config.seed)
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Jira/Confluence server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=FakeConfig.latency_ms)
+    parser.add_argument("--max-page-size", type=int, default=FakeConfig.max_page_size)
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate)
+    parser.add_argument("--body-size", type=int, default=FakeConfig.body_size)
+    parser.add_argument("--total", type=int, default=FakeConfig.total)
+    args = parser.parse_args()
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        max_page_size=args.max_page_size,
+        error_rate=args.error_rate,
+        body_size=args.body_size,
+        total=args.total,
+    )
+    server = FakeAtlassianServer(config, port=args.port)
+    print(f"fake Jira/Confluence listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
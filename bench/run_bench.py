@@ -0,0 +1,216 @@
+"""Drive a local OctoFetch server against fake Atlassian upstreams and record throughput/latency.
+
+Usage:
+    python -m bench.run_bench --concurrency 1,8,32 --requests 200 --output bench_results.json
+
+Everything runs on 127.0.0.1, so no network access is needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench.fake_atlassian import FakeAtlassianServer, FakeConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "fetch_jira": ("/fetch/jira", {"q": "project = BENCH ORDER BY created DESC", "limit": 200}),
+    "fetch_confluence": ("/fetch/confluence", {"q": "BENCH", "limit": 200}),
+    "users_jira": ("/users/jira", {"q": "user1"}),
+    "stream_jira": ("/fetch/jira/stream", {"q": "project = BENCH ORDER BY created DESC", "limit": 1000}),
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    # VmHWM is the process's high-water resident set size (Linux only)
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def start_app(upstream_url: str, port: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "JIRA_URL": upstream_url,
+        "CONFLUENCE_URL": upstream_url,
+        "JIRA_USERNAME": "bench",
+        "JIRA_API_TOKEN": "bench",
+        "CONFLUENCE_TOKEN": "bench",
+        "NO_PROXY": "127.0.0.1,localhost",
+    })
+    env.update(extra_env)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_healthy(base_url: str, timeout: float = 30.0) -> float:
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, trust_env=False) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError("server did not become healthy")
+
+
+async def run_level(base_url: str, path: str, params: Dict, concurrency: int, requests: int, cached: bool) -> Dict:
+    headers = {} if cached else {"Cache-Control": "no-cache"}
+    latencies: List[float] = []
+    errors = 0
+    ttfb: List[float] = []
+    remaining = requests
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                async with client.stream("GET", path, params=params, headers=headers) as response:
+                    first = True
+                    async for _ in response.aiter_raw():
+                        if first:
+                            ttfb.append(time.perf_counter() - started)
+                            first = False
+                    if response.status_code >= 400:
+                        errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits, trust_env=False) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = [s * 1000 for s in latencies]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ms) / len(ms), 2) if ms else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(max(ms), 2) if ms else 0.0,
+        },
+        "ttfb_p50_ms": round(percentile([s * 1000 for s in ttfb], 50), 2),
+    }
+
+
+async def run(args) -> Dict:
+    fake = FakeAtlassianServer(FakeConfig(
+        latency_ms=args.latency_ms,
+        max_page_size=args.page_size,
+        error_rate=args.error_rate,
+        body_size=args.body_size,
+        total=args.total,
+    )).start()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    app = start_app(fake.url, port, dict(kv.split("=", 1) for kv in args.env))
+    results: Dict = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "latency_ms": args.latency_ms,
+            "page_size": args.page_size,
+            "error_rate": args.error_rate,
+            "body_size": args.body_size,
+            "total": args.total,
+            "requests_per_level": args.requests,
+            "cached": args.cached,
+            "env": args.env,
+        },
+        "scenarios": {},
+    }
+    try:
+        results["cold_start_s"] = round(await wait_healthy(base_url), 3)
+        for name in args.scenarios:
+            path, params = SCENARIOS[name]
+            levels = []
+            for concurrency in args.concurrency:
+                calls_before = fake.calls
+                level = await run_level(base_url, path, params, concurrency, args.requests, args.cached)
+                level["upstream_calls"] = fake.calls - calls_before
+                levels.append(level)
+                print(f"{name:18s} c={concurrency:<4d} rps={level['rps']:<9} p50={level['latency_ms']['p50']}ms "
+                      f"p95={level['latency_ms']['p95']}ms p99={level['latency_ms']['p99']}ms errors={level['errors']}")
+            results["scenarios"][name] = levels
+        results["server_peak_rss_kb"] = peak_rss_kb(app.pid)
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+        fake.stop()
+    if results.get("server_peak_rss_kb") is None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        results["server_peak_rss_kb"] = maxrss // 1024 if sys.platform == "darwin" else maxrss
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="OctoFetch offline benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), type=lambda s: s.split(","))
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda s: [int(c) for c in s.split(",")])
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario and concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake upstream latency per call")
+    parser.add_argument("--page-size", type=int, default=100, help="fake upstream page size cap")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail with 503")
+    parser.add_argument("--body-size", type=int, default=2000, help="characters per issue/page body")
+    parser.add_argument("--total", type=int, default=5000, help="items available upstream")
+    parser.add_argument("--cached", action="store_true", help="let the response cache serve repeat requests")
+    parser.add_argument("--env", action="append", default=[], help="extra KEY=VALUE for the server, repeatable")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,227 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+import contextvars
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from core.admission import AdmissionController, get_admission
+from core.timestamps import parse_time
+from core.executor import get_executor, iterate_in_executor, max_workers_for, run_in_executor
+from core.breaker import CircuitBreaker, get_breaker
+from core.hedge import hedged, latency_window
+from core.metrics import upstream_call
+from core.ratelimit import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_MAX_WAIT, RateLimiter, get_limiter
+from datetime import timezone, tzinfo
+import os
+import re
+import threading
+import time
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_PAGE_CONCURRENCY = 8
+DEFAULT_PAGE_SIZE = 100
+
+_ORDER_BY = re.compile(r"\border\s+by\b", re.IGNORECASE)
+
+def and_clause(query: str, clause: str) -> str:
+    """AND a JQL/CQL clause onto query, keeping any trailing ORDER BY."""
+    match = _ORDER_BY.search(query or "")
+    head, order = (query[:match.start()], query[match.start():]) if match else (query or "", "")
+    head = head.strip()
+    where = f"({head}) AND {clause}" if head else clause
+    return f"{where} {order}".strip()
+
+def order_by(query: str, order: str) -> str:
+    """Replace any ORDER BY on a JQL/CQL query with order."""
+    match = _ORDER_BY.search(query or "")
+    head = (query[:match.start()] if match else query or "").strip()
+    return f"{head} ORDER BY {order}".strip()
+
+def query_time(timestamp: str, tz: tzinfo = timezone.utc) -> str:
+    # ISO 8601 upstream timestamps -> the minute-precision form JQL and CQL accept.
+    # Those literals are read in the account's timezone, so convert rather than cut the offset off.
+    return parse_time(timestamp).astimezone(tz).strftime("%Y-%m-%d %H:%M")
 
 class BaseConnector(ABC):
     def __init__(self, config: Dict):
         self.config = config
+        self._client = None
+        self._client_key = None
+        self._client_lock = threading.Lock()
 
     @abstractmethod
     def name(self) -> str:
         ...
 
     @abstractmethod
-    async def fetch(self, **kwargs) -> List[Dict]:
+    def fetch(self, **kwargs) -> List[Dict]:
         """Return a list of dicts representing items to be normalized."""
-        ...
\ No newline at end of file
+        ...
+
+    async def fetch_async(self, **kwargs) -> List[Dict]:
+        """Run the blocking fetch on this connector's dedicated executor."""
+        return await run_in_executor(self.name(), self.fetch, **kwargs)
+
+    def iter_pages(self, **kwargs) -> Iterator[List[Dict]]:
+        """Yield items page by page; connectors that can page upstream override this."""
+        yield self.fetch(**kwargs)
+
+    def changed_items(self, objects: List[Dict]) -> List[Any]:
+        """Turn webhook payload objects (issues, pages) into items; connectors that accept webhooks override this.
+
+        One result per object, in order: the item, None when the object is gone
+        (or hidden) upstream, or the exception from a read worth retrying.
+        """
+        raise NotImplementedError(f"{self.name()} does not accept webhooks")
+
+    async def stream(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        """Yield pages as they arrive, pulling each one on the connector executor."""
+        async for page in iterate_in_executor(self.name(), self.iter_pages(**kwargs)):
+            yield page
+
+    @property
+    def pool_size(self) -> int:
+        return int(self.config.get("pool_size") or os.getenv(f"{self.name().upper()}_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+    @property
+    def page_concurrency(self) -> int:
+        return int(self.config.get("page_concurrency") or os.getenv(f"{self.name().upper()}_PAGE_CONCURRENCY", DEFAULT_PAGE_CONCURRENCY))
+
+    @property
+    def page_size(self) -> int:
+        return int(self.config.get("page_size") or os.getenv(f"{self.name().upper()}_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+
+    @property
+    def max_retries(self) -> int:
+        return int(self.config.get("max_retries") or os.getenv(f"{self.name().upper()}_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+
+    @property
+    def retry_max_wait(self) -> float:
+        return float(self.config.get("retry_max_wait") or os.getenv(f"{self.name().upper()}_RETRY_MAX_WAIT", DEFAULT_RETRY_MAX_WAIT))
+
+    @property
+    def timezone(self) -> tzinfo:
+        # the timezone JQL/CQL date literals are interpreted in (the API user's profile setting)
+        name = self.config.get("timezone") or os.getenv(f"{self.name().upper()}_TIMEZONE", "UTC")
+        if name.upper() == "UTC":
+            return timezone.utc
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        # shared by every call to this upstream, across instances and pools
+        return get_limiter(self.name(), self.pool_size)
+
+    @property
+    def admission(self) -> AdmissionController:
+        # each admitted fetch runs on the connector executor; admitting more than it has workers only queues there
+        return get_admission(self.name(), max_workers_for(self.name()))
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return get_breaker(self.name())
+
+    @property
+    def hedge(self) -> bool:
+        value = self.config.get("hedge") or os.getenv(f"{self.name().upper()}_HEDGE", "")
+        return str(value).lower() in ("1", "true", "yes")
+
+    def _paginate(self, search: Callable[[int, int], Tuple[List[Dict], Optional[int], Optional[int]]], start: int, limit: int) -> Iterator[List[Dict]]:
+        # search(offset, size) -> (results, total or None if unknown, page size the server used)
+        end = start + limit
+        results, total, page_max = search(start, min(self.page_size, limit))
+        results = results[:limit]
+        yield results
+        offset = start + len(results)
+        # Servers may cap the page size below what we asked for; page by what they gave us.
+        step = min(page_max or len(results), self.page_size)
+        # Without a total, walk page by page until the upstream reports one or runs dry.
+        while total is None and step and offset < end:
+            results, total, _ = search(offset, min(step, end - offset))
+            if not results:
+                return
+            yield results
+            offset += len(results)
+        if not step or total is None:
+            return
+        end = min(end, total)
+        yield from self._prefetch(lambda o: search(o, min(step, end - o))[0], range(offset, end, step))
+
+    def _pages_executor(self):
+        # Pools are cached by name, so the size is part of it: a per-job
+        # page_concurrency override gets a pool that actually has that many workers.
+        return get_executor(f"{self.name()}.pages.{self.page_concurrency}", self.page_concurrency)
+
+    def _prefetch(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+        # Keep up to page_concurrency calls in flight and yield results in input order.
+        executor = self._pages_executor()
+        items = iter(items)
+        submit = lambda item: executor.submit(contextvars.copy_context().run, fn, item)
+        pending = deque(submit(item) for item in islice(items, self.page_concurrency))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for item in islice(items, 1):
+                    pending.append(submit(item))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _map_concurrent(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        # Secondary upstream calls made from inside fetch() get their own pool so
+        # they can't deadlock against the connector executor fetch() runs on.
+        executor = self._pages_executor()
+        futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def _call(self, client: Any, method: str, *args, **kwargs) -> Any:
+        # every upstream request goes through here so it is rate limited,
+        # guarded by the breaker, timed and counted
+        breaker = self.breaker
+        window = latency_window(self.name(), method)
+
+        def attempt():
+            started = time.perf_counter()
+            with upstream_call(self.name(), method):
+                result = breaker.call(lambda: getattr(client, method)(*args, **kwargs))
+            window.record(time.perf_counter() - started)
+            return result
+
+        # don't queue on the limiter for a call the breaker will refuse anyway
+        breaker.check()
+        return self.rate_limiter.call(attempt, retries=self.max_retries, max_wait=self.retry_max_wait)
+
+    def _read(self, client: Any, method: str, *args, **kwargs) -> Any:
+        # Idempotent reads: with hedging on, a call slower than the recent p95
+        # gets a backup copy and whichever answers first wins.
+        if not self.hedge:
+            return self._call(client, method, *args, **kwargs)
+        executor = get_executor(f"{self.name()}.hedge", self.page_concurrency * 2)
+        context = contextvars.copy_context()
+        # each copy needs its own Context; one can't be entered from two threads at once
+        call = lambda: context.copy().run(self._call, client, method, *args, **kwargs)
+        return hedged(call, latency_window(self.name(), method), executor)
+
+    def _new_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        # every response, including ones the client retries or raises on, tunes the limiter
+        limiter = self.rate_limiter
+        session.hooks["response"].append(lambda response, *args, **kwargs: limiter.observe(response.status_code, response.headers))
+        return session
+
+    def _cached_client(self, factory: Callable[..., Any], **kwargs) -> Any:
+        # One keep-alive client per connector; a change in url/credentials
+        # (e.g. a rotated token) builds a fresh client on the next call.
+        key = tuple(sorted(kwargs.items()))
+        with self._client_lock:
+            if self._client is None or self._client_key != key:
+                self._client = factory(session=self._new_session(), **kwargs)
+                self._client_key = key
+            return self._client
@@ -1,41 +1,115 @@
-
-from typing import List, Dict, Optional
-from .base_connector import BaseConnector
+from typing import Any, Iterator, List, Dict, Optional
+from .base_connector import BaseConnector, and_clause, order_by, query_time
+from core.breaker import upstream_status
 from atlassian import Confluence
 import os
 
+# source name the lazy registry lists without importing this module
+CONNECTOR_NAME = "confluence"
+
+DEFAULT_CQL = 'creator = "Rick.Magana" ORDER BY lastmodified DESC'
+# Pull everything we normalize through the search itself instead of one
+# get_page_by_id round trip per result. Normalized field -> expansions it needs.
+EXPAND_MAP = {
+    "body": ["body.storage"],
+    "updated_at": ["version"],
+    "created_at": ["history", "version"],
+    "tags": ["metadata.labels"],
+}
+
+def page_expand(fields: Optional[List[str]] = None) -> str:
+    expand = dict.fromkeys(e for f in (fields or EXPAND_MAP) for e in EXPAND_MAP.get(f, []))
+    return ",".join(expand)
+
+def search_expand(fields: Optional[List[str]] = None) -> str:
+    return ",".join(f"content.{e}" for e in page_expand(fields).split(",") if e)
+
 class ConfluenceConnector(BaseConnector):
     def name(self) -> str:
         return "confluence"
 
     def _get_client(self):
-        return Confluence(
+        return self._cached_client(
+            Confluence,
             url=os.getenv("CONFLUENCE_URL"),
             username=os.getenv("JIRA_USERNAME"),
             password=os.getenv("CONFLUENCE_TOKEN"),
             verify_ssl=False
         )
 
-    def fetch(self, space_key: str = None, cql: str = None, limit: Optional[int] = 100) -> List[Dict]:
-        #if not cql and not space_key:
-         #   raise ValueError("space_key or cql must be provided")
+    def _build_cql(self, space_key: str = None, cql: str = None) -> str:
+        if cql:
+            return cql
+        if space_key:
+            return f'space = "{space_key}" ORDER BY lastmodified DESC'
+        return DEFAULT_CQL
+
+    def fetch(self, space_key: str = None, cql: str = None, limit: Optional[int] = 100, since: Optional[str] = None, fields: Optional[List[str]] = None, start: int = 0, incremental: bool = False) -> List[Dict]:
+        return [item for page in self.iter_pages(space_key=space_key, cql=cql, limit=limit, start=start, since=since, fields=fields, incremental=incremental) for item in page]
+
+    def iter_pages(self, space_key: str = None, cql: str = None, limit: Optional[int] = 100, start: int = 0, since: Optional[str] = None, fields: Optional[List[str]] = None, incremental: bool = False) -> Iterator[List[Dict]]:
         client = self._get_client()
-        
-       # query = cql or f'space = "{space_key}" ORDER BY lastmodified DESC'
-        #results = client.cql(query, limit=limit).get("results", [])
-        cql = 'creator = "Rick.Magana" ORDER BY lastmodified DESC'
-        results = client.cql(cql, limit=10).get("results", [])
-        final = []
-        for item in results[:limit]:
-            page = client.get_page_by_id(item["id"], expand="body.storage,version,history,metadata.labels")
-            body = page.get("body", {}).get("storage", {}).get("value", "")
-            labels = [l.get("name") for l in page.get("metadata", {}).get("labels", [])] if page.get("metadata") else []
-            final.append({
-                "source": "confluence",
-                "id": page.get("id"),
-                "title": page.get("title"),
-                "body": body,
-                "tags": labels,
-                "created_at": page.get("history", {}).get("createdDate") or page.get("version", {}).get("when")
-            })
-        return final
\ No newline at end of file
+        query = self._build_cql(space_key, cql)
+        if since:
+            query = and_clause(query, f'lastmodified >= "{query_time(since, self.timezone)}"')
+        if incremental:
+            # oldest change first, so a page cut off by limit never hides changes older than the new watermark
+            query = order_by(query, "lastmodified ASC")
+
+        def search(offset: int, size: int):
+            page = self._read(client, "cql", query, start=offset, limit=size, expand=search_expand(fields) or None)
+            results = page.get("results", [])
+            total = page.get("totalSize")
+            if total is None and not page.get("_links", {}).get("next"):
+                total = offset + len(results)
+            return results, total, page.get("limit")
+
+        for results in self._paginate(search, start, limit):
+            yield self._resolve_pages(client, results, fields)
+
+    def _resolve_pages(self, client, results: List[Dict], fields: Optional[List[str]] = None) -> List[Dict]:
+        pages = [item.get("content") or {"id": item.get("id")} for item in results]
+        # Servers that ignore the search expand still need a per-page lookup;
+        # run those concurrently instead of one after another.
+        needs_body = fields is None or "body" in fields
+        missing = [i for i, item in enumerate(results) if not item.get("content") or (needs_body and "body" not in pages[i])]
+        if missing:
+            expand = page_expand(fields)
+            fetched = self._map_concurrent(
+                lambda i: self._call(client, "get_page_by_id", pages[i]["id"], expand=expand or None), missing
+            )
+            for i, page in zip(missing, fetched):
+                pages[i] = page
+        return [self._to_item(page) for page in pages]
+
+    def changed_items(self, pages: List[Dict]) -> List[Dict]:
+        # page webhooks only carry metadata; read each changed page once, concurrently
+        client = self._get_client()
+        expand = page_expand()
+
+        def read(page: Dict) -> Any:
+            try:
+                return self._to_item(self._call(client, "get_page_by_id", page["id"], expand=expand))
+            except Exception as e:
+                # deleted or restricted since the event: drop it like a removal
+                if upstream_status(e) in (403, 404):
+                    return None
+                return e
+
+        return self._map_concurrent(read, pages)
+
+    def _to_item(self, page: Dict) -> Dict:
+        body = page.get("body", {}).get("storage", {}).get("value", "")
+        labels = (page.get("metadata") or {}).get("labels") or []
+        if isinstance(labels, dict):
+            # the REST API wraps labels in a paged {"results": [...]} envelope
+            labels = labels.get("results", [])
+        return {
+            "source": "confluence",
+            "id": page.get("id"),
+            "title": page.get("title"),
+            "body": body,
+            "tags": [l.get("name") for l in labels],
+            "created_at": page.get("history", {}).get("createdDate") or page.get("version", {}).get("when"),
+            "updated_at": page.get("version", {}).get("when")
+        }
@@ -1,55 +1,239 @@
-from typing import List, Dict, Optional
-from .base_connector import BaseConnector
+from datetime import timedelta
+from typing import Iterator, List, Dict, Optional
+from .base_connector import BaseConnector, and_clause, order_by, query_time
+from core.breaker import upstream_status
+from core.executor import run_in_executor
+from core.timestamps import parse_time
 from atlassian import Jira
+import logging
 import os
-import asyncio
+
+log = logging.getLogger(__name__)
+
+# source name the lazy registry lists without importing this module
+CONNECTOR_NAME = "jira"
+
+# normalized field -> Jira field it is read from; the issue key is always returned
+FIELD_MAP = {
+    "title": "summary",
+    "body": "description",
+    "tags": "labels",
+    "created_at": "created",
+    "updated_at": "updated",
+}
+
+def jira_fields(fields: Optional[List[str]] = None) -> List[str]:
+    return [FIELD_MAP[f] for f in (fields or FIELD_MAP) if f in FIELD_MAP]
+
+# Search is a GET, so the JQL ends up in the URL; keep the assignee list well under common URL limits
+MAX_ASSIGNEE_CLAUSE = 3000
+
+def jql_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def assignee_chunks(assignees: List[str], max_length: int = MAX_ASSIGNEE_CLAUSE) -> Iterator[List[str]]:
+    """Split assignees into groups whose quoted `assignee in (...)` list fits max_length."""
+    chunk: List[str] = []
+    length = 0
+    for assignee in assignees:
+        size = len(jql_string(assignee)) + 2
+        if chunk and length + size > max_length:
+            yield chunk
+            chunk, length = [], 0
+        chunk.append(assignee)
+        length += size
+    if chunk:
+        yield chunk
+
+def assignee_ids(issue: Dict) -> List[str]:
+    # Cloud identifies users by accountId, Server/DC by name/key; email only when the profile exposes it
+    assignee = issue.get("fields", {}).get("assignee") or {}
+    return [assignee[k].casefold() for k in ("accountId", "name", "key", "emailAddress") if assignee.get(k)]
 
 class JiraConnector(BaseConnector):
     def name(self) -> str:
         return "jira"
 
     def _get_client(self):
-        return Jira(
+        return self._cached_client(
+            Jira,
             url=os.getenv("JIRA_URL"),
             username=os.getenv("JIRA_USERNAME"),
             password=os.getenv("JIRA_API_TOKEN"),
             verify_ssl=False
         )
 
-    def fetch(self, jql: str = "ORDER BY created DESC", limit: Optional[int] = 200) -> List[Dict]:
+    def fetch(self, jql: str = "ORDER BY created DESC", limit: Optional[int] = 200, since: Optional[str] = None, fields: Optional[List[str]] = None, start: int = 0, incremental: bool = False) -> List[Dict]:
+        return [item for page in self.iter_pages(jql=jql, limit=limit, start=start, since=since, fields=fields, incremental=incremental) for item in page]
+
+    def iter_pages(self, jql: str = "ORDER BY created DESC", limit: Optional[int] = 200, start: int = 0, since: Optional[str] = None, fields: Optional[List[str]] = None, incremental: bool = False) -> Iterator[List[Dict]]:
         client = self._get_client()
-        issues = client.jql(jql, limit=limit).get("issues", [])
-        results = []
-        for issue in issues:
-            fields = issue.get("fields", {})
-            results.append({
-                "source": "jira",
-                "id": issue.get("key"),
-                "title": fields.get("summary"),
-                "body": fields.get("description") or "",
-                "tags": fields.get("labels") or [],
-                "created_at": fields.get("created")
-            })
-        return results
+        # only ask Jira for what the normalizer will keep
+        wanted = jira_fields(fields)
+        if since:
+            jql = and_clause(jql, f'updated >= "{query_time(since, self.timezone)}"')
+        if incremental:
+            # oldest change first, so a page cut off by limit never hides changes older than the new watermark
+            jql = order_by(jql, "updated ASC, key ASC")
+
+        for issues in self._issue_pages(client, jql, limit, start, wanted):
+            yield [self._to_item(issue) for issue in issues]
+
+    def _issue_pages(self, client, jql: str, limit: int, start: int, wanted: List[str]) -> Iterator[List[Dict]]:
+        def search(offset: int, size: int):
+            page = self._read(client, "jql", jql, fields=wanted, start=offset, limit=size)
+            issues = page.get("issues", [])
+            return issues, page.get("total", offset + len(issues)), page.get("maxResults")
+
+        return self._paginate(search, start, limit)
+
+    def changed_items(self, issues: List[Dict]) -> List[Dict]:
+        # issue webhooks carry the full issue, fields included
+        return [self._to_item(issue) for issue in issues]
+
+    def _to_item(self, issue: Dict) -> Dict:
+        fields = issue.get("fields", {})
+        return {
+            "source": "jira",
+            "id": issue.get("key"),
+            "title": fields.get("summary"),
+            "body": fields.get("description") or "",
+            "tags": fields.get("labels") or [],
+            "created_at": fields.get("created"),
+            "updated_at": fields.get("updated")
+        }
 
     async def fetch_async(self, jql: str = "ORDER BY created DESC", limit: Optional[int] = 200) -> List[Dict]:
-       
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.fetch, jql, limit)
+        return await run_in_executor(self.name(), self.fetch, jql, limit)
 
     async def get_projects(self):
-            return await asyncio.to_thread(self.client.get_all_projects)
+        return await run_in_executor(self.name(), lambda: self._call(self._get_client(), "get_all_projects"))
 
     async def search_issues(self, jql):
-        return await asyncio.to_thread(self.client.jql, jql)
-    
+        return await run_in_executor(self.name(), lambda: self._call(self._get_client(), "jql", jql))
+
     async def get_assigned_issues(self, assignee_email):
         jql = f'assignee = "{assignee_email}" ORDER BY created DESC'
-        return await asyncio.to_thread(self.client.jql, jql)
-        
+        return await run_in_executor(self.name(), lambda: self._call(self._get_client(), "jql", jql))
+
     async def get_all_users(self, query=""):
-        return await asyncio.to_thread(self._get_client().user_find_by_user_string, query)
+        return await run_in_executor(self.name(), lambda: self._call(self._get_client(), "user_find_by_user_string", query))
+
+    def list_users(self, max_users: int = 50000, page_size: int = 1000) -> List[Dict]:
+        # bulk listing for the user directory; app/bot accounts are left out
+        client = self._get_client()
+        users: List[Dict] = []
+        start = 0
+        # the server may cap maxResults below page_size; a page shorter than its cap is the last
+        server_page = 0
+        while len(users) < max_users:
+            page = self._call(client, "users_get_all", start=start, limit=page_size) or []
+            users.extend(u for u in page if u.get("accountType", "atlassian") == "atlassian")
+            server_page = max(server_page, len(page))
+            if not page or len(page) < server_page:
+                break
+            start += len(page)
+        return users[:max_users]
 
     def fetch_assigned(self, assignee: str, limit: Optional[int] = 200) -> List[Dict]:
         jql = f'assignee = "{assignee}" ORDER BY created DESC'
-        return self.fetch(jql=jql, limit=limit)
\ No newline at end of file
+        return self.fetch(jql=jql, limit=limit)
+
+    def fetch_assigned_many(self, assignees: List[str], limit: int = 200, fields: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+        """Newest `limit` issues for each assignee, from one `assignee in (...)` search per chunk of assignees.
+
+        Assignees are accountIds (Cloud), usernames (Server/DC) or emails.
+        Emails are looked up first, since issues rarely expose them; an
+        assignee Jira rejects gets an empty list rather than failing the rest.
+        """
+        client = self._get_client()
+        # created bounds follow-up rounds; assignee routes each issue to its person
+        wanted = list(dict.fromkeys(jira_fields(fields) + ["created", "assignee"]))
+        results: Dict[str, List[Dict]] = {assignee: [] for assignee in assignees}
+        # the id each assignee is searched by -> everyone asking for it
+        owners: Dict[str, List[str]] = {}
+        for assignee, user_id in self._resolve_emails(client, list(results)).items():
+            owners.setdefault(user_id, []).append(assignee)
+        for chunk in assignee_chunks(list(owners)):
+            self._assigned_chunk(client, chunk, limit, wanted, owners, results)
+        return results
+
+    def _resolve_emails(self, client, assignees: List[str]) -> Dict[str, str]:
+        # one user search per email, run side by side; anything else is already an id
+        def resolve(assignee: str) -> str:
+            if "@" not in assignee:
+                return assignee
+            # Cloud searches by query; Server/DC matches emails through username
+            search = {"query": assignee} if getattr(client, "cloud", False) else {"username": assignee}
+            users = self._call(client, "user_find_by_user_string", **search)
+            if not isinstance(users, list):
+                # the client answers unsupported parameter combinations with a message string
+                return assignee
+            exact = [u for u in users if (u.get("emailAddress") or "").casefold() == assignee.casefold()]
+            # emails are often hidden from search results too; a single hit is the one we asked for
+            found = exact if len(exact) == 1 else users if len(users) == 1 else []
+            return next((found[0][k] for k in ("accountId", "name", "key") if found and found[0].get(k)), assignee)
+
+        return dict(zip(assignees, self._map_concurrent(resolve, assignees)))
+
+    def _assigned_chunk(self, client, chunk: List[str], limit: int, wanted: List[str], owners: Dict[str, List[str]], results: Dict[str, List[Dict]]) -> None:
+        routes = {user_id.casefold(): user_id for user_id in chunk}
+        short = lambda user_id: any(len(results[a]) < limit for a in owners[user_id])
+        seen = set()
+        active = chunk
+        oldest = None
+        while active:
+            # Pull up to limit issues per person in one pass. Someone with many
+            # recent issues can crowd others out of that window, so people still
+            # short get another round, bounded to issues created before the minute
+            # after the oldest one seen. JQL dates are minute-precision, so that
+            # overlaps the last round; the seen set drops the repeats.
+            jql = f"assignee in ({', '.join(jql_string(a) for a in active)})"
+            if oldest:
+                bound = parse_time(oldest).astimezone(self.timezone).replace(second=0, microsecond=0) + timedelta(minutes=1)
+                jql += f' AND created < "{bound:%Y-%m-%d %H:%M}"'
+            cap = limit * len(active)
+            fetched = added = unrouted = 0
+            matched = set()
+            try:
+                for issues in self._issue_pages(client, jql + " ORDER BY created DESC", cap, 0, wanted):
+                    for issue in issues:
+                        fetched += 1
+                        if issue.get("key") in seen:
+                            continue
+                        seen.add(issue.get("key"))
+                        added += 1
+                        oldest = issue.get("fields", {}).get("created") or oldest
+                        user_id = next((routes[i] for i in assignee_ids(issue) if i in routes), None)
+                        if user_id is None:
+                            unrouted += 1
+                            continue
+                        matched.add(user_id)
+                        for owner in owners[user_id]:
+                            if len(results[owner]) < limit:
+                                results[owner].append(self._to_item(issue))
+            except Exception as e:
+                # Jira rejects the whole query when it doesn't know one of the
+                # users; ask for each one alone so only that one comes back empty
+                if upstream_status(e) != 400 or fetched or oldest:
+                    raise
+                if len(active) == 1:
+                    log.warning("jira rejected assignee %s: %s", active[0], e)
+                    return
+                for user_id in active:
+                    self._assigned_chunk(client, [user_id], limit, wanted, owners, results)
+                return
+            if fetched < cap or not added:
+                return
+            active = [a for a in active if short(a)]
+            if unrouted:
+                # Some issues matched no one: an id the issues don't echo back.
+                # Walking further back for its owner would only find more of the
+                # same, so check who that is among those that matched nothing.
+                active = [a for a in active if a in matched or self._routes_back(client, a)]
+
+    def _routes_back(self, client, user_id: str) -> bool:
+        # does this user's newest issue name them the way we searched for them?
+        page = self._read(client, "jql", f"assignee in ({jql_string(user_id)}) ORDER BY created DESC", fields=["assignee"], start=0, limit=1)
+        issues = page.get("issues", [])
+        return bool(issues) and user_id.casefold() in assignee_ids(issues[0])
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from core.metrics import ADMISSION_INFLIGHT, ADMISSION_QUEUED, ADMISSION_SHED, ADMISSION_WAIT
+
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_QUEUE_TIMEOUT = 10.0
+# weight of the newest sample in the service-time average
+SERVICE_SMOOTHING = 0.2
+
+# Who is asking and by when they need an answer; set per request by AdmissionMiddleware.
+CLIENT: ContextVar[str] = ContextVar("octofetch_client", default="")
+DEADLINE: ContextVar[Optional[float]] = ContextVar("octofetch_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """Too much work is already queued for this upstream; shed instead of waiting."""
+
+    def __init__(self, upstream: str, retry_after: float, reason: str):
+        super().__init__(f"{upstream} is overloaded ({reason}); retry after {retry_after:.0f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """Caps in-flight upstream work per source, with a bounded fair wait queue.
+
+    Waiters are queued per client and a freed slot goes to the next client in
+    round-robin order, so one client with many requests queued can't hold up
+    everyone else. A request is shed up front when the queue is full or when
+    the expected wait would already miss its deadline, and later when its
+    deadline passes while still queued.
+    """
+
+    def __init__(self, name: str, max_inflight: int, max_queue: int = DEFAULT_MAX_QUEUE, queue_timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.queued = 0
+        # client -> its waiters, oldest first; dict order is the round-robin order
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # smoothed seconds a request holds its slot; None until the first one finishes
+        self.service_time: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, name: str, max_inflight: int) -> "AdmissionController":
+        prefix = name.upper()
+        return cls(
+            name,
+            max_inflight=int(os.getenv(f"{prefix}_MAX_INFLIGHT", max_inflight)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)),
+        )
+
+    def expected_wait(self, position: int) -> float:
+        if self.service_time is None:
+            return 0.0
+        return position / self.max_inflight * self.service_time
+
+    def _shed(self, reason: str, retry_after: float) -> Overloaded:
+        ADMISSION_SHED.inc(self.name, reason)
+        return Overloaded(self.name, max(1.0, retry_after), reason)
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        deadline = DEADLINE.get()
+        deadline = now + self.queue_timeout if deadline is None else min(deadline, now + self.queue_timeout)
+        if self.inflight < self.max_inflight and not self.queued:
+            self.inflight += 1
+            ADMISSION_INFLIGHT.set(self.name, value=self.inflight)
+            ADMISSION_WAIT.observe(0.0, self.name)
+            return
+        expected = self.expected_wait(self.queued + 1)
+        if self.queued >= self.max_queue:
+            raise self._shed("queue_full", expected or self.queue_timeout)
+        if now + expected > deadline:
+            raise self._shed("deadline", expected)
+
+        client = CLIENT.get()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        ADMISSION_QUEUED.set(self.name, value=self.queued)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), deadline - now)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # handed a slot just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._forget(client, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._shed("timeout", self.expected_wait(self.queued + 1) or self.queue_timeout) from None
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.monotonic() - now, self.name)
+
+    def _forget(self, client: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiters.get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._waiters[client]
+            ADMISSION_QUEUED.set(self.name, value=self.queued)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        while self._waiters:
+            client, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            self.queued -= 1
+            # this client goes to the back of the line
+            del self._waiters[client]
+            if waiters:
+                self._waiters[client] = waiters
+            if not waiter.done():
+                return waiter
+        return None
+
+    def release(self, held: Optional[float] = None) -> None:
+        if held is not None:
+            self.service_time = held if self.service_time is None else (
+                (1 - SERVICE_SMOOTHING) * self.service_time + SERVICE_SMOOTHING * held)
+        waiter = self._next_waiter()
+        if waiter is not None:
+            # the slot moves straight to the waiter; inflight is unchanged
+            waiter.set_result(None)
+        else:
+            self.inflight -= 1
+        ADMISSION_QUEUED.set(self.name, value=self.queued)
+        ADMISSION_INFLIGHT.set(self.name, value=self.inflight)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict:
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "clients_waiting": len(self._waiters),
+            "service_time": self.service_time,
+        }
+
+
+def client_identity(scope) -> Tuple[str, Optional[float]]:
+    """(client key, absolute deadline) for an ASGI request: X-API-Key or else the peer address, and X-Request-Timeout seconds."""
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers") or ()}
+    api_key = headers.get("x-api-key")
+    peer = scope.get("client")
+    client = f"key:{api_key}" if api_key else f"ip:{peer[0]}" if peer else ""
+    deadline = None
+    try:
+        timeout = float(headers.get("x-request-timeout", ""))
+        if timeout > 0:
+            deadline = time.monotonic() + timeout
+    except ValueError:
+        pass
+    return client, deadline
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: records who is calling and their deadline for the admission queues."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        client, deadline = client_identity(scope)
+        client_token = CLIENT.set(client)
+        deadline_token = DEADLINE.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            CLIENT.reset(client_token)
+            DEADLINE.reset(deadline_token)
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_lock = threading.Lock()
+
+
+def get_admission(name: str, max_inflight: int) -> AdmissionController:
+    controller = _controllers.get(name)
+    if controller is None:
+        with _lock:
+            controller = _controllers.get(name)
+            if controller is None:
+                controller = _controllers[name] = AdmissionController.from_env(name, max_inflight)
+    return controller
+
+
+def reset_admission() -> None:
+    with _lock:
+        _controllers.clear()
@@ -0,0 +1,278 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from html import unescape
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+BODY_FORMATS = ("raw", "text", "markdown")
+
+_BLOCKS = {"p", "div", "br", "tr", "table", "ul", "ol", "blockquote", "pre", "hr",
+           "h1", "h2", "h3", "h4", "h5", "h6", "ac:structured-macro", "ac:layout-section"}
+_SKIP = {"script", "style", "ac:parameter"}
+
+
+class _StorageParser(HTMLParser):
+    # Confluence storage format is XHTML plus ac:/ri: macro tags.
+
+    def __init__(self, markdown: bool):
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.out: List[str] = []
+        self.skip = 0
+        self.lists: List[List] = []
+        self.href: Optional[str] = None
+        self.pre = 0
+        # cells open, and cells started in the current row
+        self.cell = 0
+        self.cells = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP:
+            self.skip += 1
+            return
+        if tag in _BLOCKS or tag == "li":
+            self._newline()
+        if tag == "tr":
+            self.cells = 0
+        elif tag in ("td", "th"):
+            # one line per row, cells separated like the Jira wiki path
+            if self.cells:
+                self._trim()
+                self.out.append(" | ")
+            self.cells += 1
+            self.cell += 1
+        md = self.markdown
+        if tag in ("ul", "ol"):
+            self.lists.append([tag, 0])
+        elif tag == "li" and self.lists:
+            kind = self.lists[-1]
+            kind[1] += 1
+            indent = "  " * (len(self.lists) - 1)
+            self.out.append(indent + (f"{kind[1]}. " if kind[0] == "ol" and md else "- "))
+        elif not md:
+            return
+        elif tag[:1] == "h" and tag[1:].isdigit():
+            self.out.append("#" * int(tag[1:]) + " ")
+        elif tag in ("strong", "b"):
+            self.out.append("**")
+        elif tag in ("em", "i"):
+            self.out.append("_")
+        elif tag == "code" and not self.pre:
+            self.out.append("`")
+        elif tag in ("pre", "ac:plain-text-body"):
+            self.pre += 1
+            self.out.append("```\n")
+        elif tag == "blockquote":
+            self.out.append("> ")
+        elif tag == "a":
+            self.href = dict(attrs).get("href")
+            self.out.append("[")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP:
+            self.skip = max(0, self.skip - 1)
+            return
+        md = self.markdown
+        if tag in ("ul", "ol") and self.lists:
+            self.lists.pop()
+        elif md and tag in ("strong", "b"):
+            self.out.append("**")
+        elif md and tag in ("em", "i"):
+            self.out.append("_")
+        elif md and tag == "code" and not self.pre:
+            self.out.append("`")
+        elif md and tag in ("pre", "ac:plain-text-body"):
+            self.pre = max(0, self.pre - 1)
+            self._newline()
+            self.out.append("```")
+        elif md and tag == "a":
+            self.out.append(f"]({self.href})" if self.href else "]")
+            self.href = None
+        elif tag in ("td", "th"):
+            self.cell = max(0, self.cell - 1)
+        if tag in _BLOCKS or tag == "li":
+            self._newline()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ("br", "hr"):
+            self._newline()
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        self.out.append(data if self.pre else re.sub(r"\s+", " ", data))
+
+    def unknown_decl(self, data):
+        # code macro bodies arrive as CDATA
+        if data.startswith("CDATA[") and not self.skip:
+            self.out.append(data[len("CDATA["):])
+
+    def _newline(self):
+        if self.cell:
+            # blocks inside a cell (Confluence wraps cell text in <p>) stay on the row
+            if self.out and not self.out[-1].endswith((" ", "\n")):
+                self.out.append(" ")
+        elif self.out and not self.out[-1].endswith("\n"):
+            self.out.append("\n")
+
+    def _trim(self):
+        while self.out and not self.out[-1].strip(" "):
+            self.out.pop()
+        if self.out:
+            self.out[-1] = self.out[-1].rstrip(" ")
+
+    def result(self) -> str:
+        lines = [line.rstrip() for line in "".join(self.out).splitlines()]
+        return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def storage_to_text(xhtml: str) -> str:
+    parser = _StorageParser(markdown=False)
+    parser.feed(xhtml)
+    parser.close()
+    return parser.result()
+
+
+def storage_to_markdown(xhtml: str) -> str:
+    parser = _StorageParser(markdown=True)
+    parser.feed(xhtml)
+    parser.close()
+    return parser.result()
+
+
+_WIKI_BLOCK = re.compile(r"\{(code|noformat)(?::([^}]*))?\}(.*?)\{\1\}", re.DOTALL)
+_WIKI_LINK = re.compile(r"\[(?:([^|\]]+)\|)?([^\]]+)\]")
+_WIKI_HEADING = re.compile(r"^h([1-6])\.\s*", re.MULTILINE)
+_WIKI_LIST = re.compile(r"^([*#-]+)\s+", re.MULTILINE)
+_WIKI_QUOTE = re.compile(r"^bq\.\s*", re.MULTILINE)
+_WIKI_TABLE_ROW = re.compile(r"^\|\|?(.*?)\|*$", re.MULTILINE)
+_WIKI_MACRO = re.compile(r"\{(?:color|panel|quote|anchor)(?::[^}]*)?\}")
+_WIKI_BOLD = re.compile(r"(?<![\w*])\*(?=\S)([^*\n]+?)\*(?![\w*])")
+_WIKI_ITALIC = re.compile(r"(?<![\w_])_(?=\S)([^_\n]+?)_(?![\w_])")
+_WIKI_STRIKE = re.compile(r"(?<![\w-])-(?=\S)([^-\n]+?)-(?![\w-])")
+_WIKI_MONO = re.compile(r"\{\{(.+?)\}\}")
+
+
+def _wiki(markup: str, markdown: bool) -> str:
+    blocks: List[str] = []
+
+    def stash(match):
+        lang = (match.group(2) or "").split("|")[0] if match.group(1) == "code" else ""
+        body = match.group(3).strip("\n")
+        blocks.append(f"```{lang}\n{body}\n```" if markdown else body)
+        return f"\x00{len(blocks) - 1}\x00"
+
+    # keep code/noformat bodies verbatim
+    text = _WIKI_BLOCK.sub(stash, markup.replace("\r\n", "\n"))
+    text = _WIKI_MACRO.sub("", text)
+    text = _WIKI_MONO.sub(r"`\1`" if markdown else r"\1", text)
+    text = _WIKI_TABLE_ROW.sub(lambda m: " | ".join(c.strip() for c in re.split(r"\|\|?", m.group(1))), text)
+    if markdown:
+        text = _WIKI_LIST.sub(lambda m: "  " * (len(m.group(1)) - 1) + ("1. " if m.group(1)[-1] == "#" else "- "), text)
+        text = _WIKI_HEADING.sub(lambda m: "#" * int(m.group(1)) + " ", text)
+        text = _WIKI_QUOTE.sub("> ", text)
+        text = _WIKI_LINK.sub(lambda m: f"[{m.group(1)}]({m.group(2)})" if m.group(1) else f"<{m.group(2)}>", text)
+        text = _WIKI_BOLD.sub(r"**\1**", text)
+        text = _WIKI_STRIKE.sub(r"~~\1~~", text)
+    else:
+        text = _WIKI_HEADING.sub("", text)
+        text = _WIKI_LIST.sub(lambda m: "  " * (len(m.group(1)) - 1) + "- ", text)
+        text = _WIKI_QUOTE.sub("", text)
+        text = _WIKI_LINK.sub(lambda m: m.group(1) or m.group(2), text)
+        text = _WIKI_BOLD.sub(r"\1", text)
+        text = _WIKI_ITALIC.sub(r"\1", text)
+        text = _WIKI_STRIKE.sub(r"\1", text)
+    text = re.sub(r"\x00(\d+)\x00", lambda m: blocks[int(m.group(1))], text)
+    lines = [line.rstrip() for line in unescape(text).splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def wiki_to_text(markup: str) -> str:
+    return _wiki(markup, markdown=False)
+
+
+def wiki_to_markdown(markup: str) -> str:
+    return _wiki(markup, markdown=True)
+
+
+_CONVERTERS = {
+    ("confluence", "text"): storage_to_text,
+    ("confluence", "markdown"): storage_to_markdown,
+    ("jira", "text"): wiki_to_text,
+    ("jira", "markdown"): wiki_to_markdown,
+}
+
+
+def convert(body: str, source: str, body_format: str) -> str:
+    converter = _CONVERTERS.get((source, body_format))
+    if converter is None or not body:
+        return body
+    return converter(body)
+
+
+def convert_batch(jobs: List[Tuple[str, str, str]]) -> List[str]:
+    # runs in a worker process; one pickle round trip per batch, not per item
+    return [convert(body, source, body_format) for body, source, body_format in jobs]
+
+
+def content_key(body: str, source: str, body_format: str) -> Tuple[str, str, str]:
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest(), source, body_format
+
+
+class ConversionCache:
+    """Converted bodies keyed by content hash, bounded LRU."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+def body_workers() -> int:
+    return int(os.getenv("OCTOFETCH_BODY_WORKERS", os.cpu_count() or 1))
+
+
+def get_pool() -> Executor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Never fork: the server already runs connector threads, and a child
+            # forked while one of them holds a lock can deadlock on it.
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=body_workers(), mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from core.metrics import BREAKER_REJECTED, BREAKER_STATE
+from core.ratelimit import Throttled
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """The connector's breaker is open; calls fail fast until it probes again."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is unavailable (circuit open); retry after {retry_after:.0f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def upstream_status(exc: BaseException) -> Optional[int]:
+    """HTTP status behind an upstream error, if any; atlassian's ApiError keeps the HTTPError in .reason."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        response = getattr(getattr(exc, "reason", None), "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_failure(exc: BaseException) -> bool:
+    # Throttling has its own limiter and a bad query is the caller's problem;
+    # neither says the upstream is unhealthy.
+    if isinstance(exc, (Throttled, CircuitOpen)):
+        return False
+    status = upstream_status(exc)
+    return status is None or status >= 500
+
+
+class CircuitBreaker:
+    """Closed -> open on too many failed or slow calls in a rolling window;
+    open -> half-open after open_seconds, closing again once probe calls succeed."""
+
+    def __init__(self, name: str, error_rate: float = 0.5, slow_seconds: float = 10.0, slow_rate: float = 0.8,
+                 min_calls: int = 10, window: int = 50, open_seconds: float = 30.0, probes: int = 3):
+        self.name = name
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.state = CLOSED
+        # (failed, slow) per recent call
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(name, value=_STATE_VALUES[CLOSED])
+
+    @classmethod
+    def from_env(cls, name: str) -> "CircuitBreaker":
+        prefix = f"{name.upper()}_BREAKER"
+        return cls(
+            name,
+            error_rate=float(os.getenv(f"{prefix}_ERROR_RATE", 0.5)),
+            slow_seconds=float(os.getenv(f"{prefix}_SLOW_SECONDS", 10.0)),
+            slow_rate=float(os.getenv(f"{prefix}_SLOW_RATE", 0.8)),
+            min_calls=int(os.getenv(f"{prefix}_MIN_CALLS", 10)),
+            window=int(os.getenv(f"{prefix}_WINDOW", 50)),
+            open_seconds=float(os.getenv(f"{prefix}_OPEN_SECONDS", 30.0)),
+        )
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def check(self) -> None:
+        """Fail fast while open, without taking a half-open probe slot."""
+        if self.state == OPEN and self.retry_after() > 0:
+            BREAKER_REJECTED.inc(self.name)
+            raise CircuitOpen(self.name, self.retry_after())
+
+    def _admit(self) -> bool:
+        # returns whether this call is a half-open probe
+        with self._lock:
+            if self.state == OPEN:
+                if self.retry_after() > 0:
+                    BREAKER_REJECTED.inc(self.name)
+                    raise CircuitOpen(self.name, self.retry_after())
+                self._set_state(HALF_OPEN)
+                self._probing = self._probe_successes = 0
+            if self.state == HALF_OPEN:
+                if self._probing >= self.probes:
+                    BREAKER_REJECTED.inc(self.name)
+                    raise CircuitOpen(self.name, 0.0)
+                self._probing += 1
+                return True
+            return False
+
+    def _record(self, probe: bool, failed: bool, slow: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing -= 1
+                if self.state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._trip()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                return
+            if self.state != CLOSED:
+                return
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._outcomes if f)
+            slows = sum(1 for _, s in self._outcomes if s)
+            if failures / calls >= self.error_rate or slows / calls >= self.slow_rate:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        BREAKER_STATE.set(self.name, value=_STATE_VALUES[state])
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        probe = self._admit()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self._record(probe, is_failure(e), time.monotonic() - started >= self.slow_seconds)
+            raise
+        except BaseException:
+            self._record(probe, False, False)
+            raise
+        self._record(probe, False, time.monotonic() - started >= self.slow_seconds)
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker.from_env(name)
+    return breaker
+
+
+def reset_breakers() -> None:
+    with _lock:
+        _breakers.clear()
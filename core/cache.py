@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    # Rough payload size; close enough to bound memory without serializing.
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + len(value)
+    return 8
+
+
+class ResponseCache:
+    """In-process TTL/LRU cache that coalesces concurrent identical misses."""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            ttl=float(os.getenv("OCTOFETCH_CACHE_TTL", 30)),
+            max_entries=int(os.getenv("OCTOFETCH_CACHE_MAX_ENTRIES", 1024)),
+            max_bytes=int(os.getenv("OCTOFETCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            stale_ttl=float(os.getenv("OCTOFETCH_CACHE_STALE_TTL", 0)),
+        )
+
+    @staticmethod
+    def make_key(source: str, query: Optional[str], limit: int, **variant) -> Hashable:
+        # Whitespace differences in JQL/CQL shouldn't split the cache.
+        return (source, " ".join((query or "").split()), limit, tuple(sorted(variant.items())))
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age < self.ttl or (allow_stale and age < self.ttl + self.stale_ttl):
+            self._entries.move_to_end(key)
+            return value
+        return None
+
+    def last_known(self, key: Hashable) -> Optional[Any]:
+        # any age, for when the upstream can't be asked at all
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self.invalidate(key)
+        self._entries[key] = (value, size, time.monotonic())
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def invalidate_source(self, source: str) -> None:
+        for key in [k for k in self._entries if k[0] == source]:
+            self.invalidate(key)
+
+    def patch(self, source: str, changed: Dict[str, Dict], removed: Iterable[str] = ()) -> int:
+        """Update or drop individual items inside this source's cached results, in place.
+
+        Each cached item keeps its own projection, and entries keep their age.
+        Returns how many entries were touched.
+        """
+        removed = set(removed)
+        touched = 0
+        for key, (value, size, stored_at) in list(self._entries.items()):
+            if key[0] != source or not isinstance(value, list):
+                continue
+            if not any(isinstance(i, dict) and (i.get("id") in changed or i.get("id") in removed) for i in value):
+                continue
+            patched = [
+                {k: changed[i["id"]].get(k, v) for k, v in i.items()} if i.get("id") in changed else i
+                for i in value
+                if i.get("id") not in removed
+            ]
+            new_size = estimate_size(patched)
+            self._entries[key] = (patched, new_size, stored_at)
+            self._bytes += new_size - size
+            touched += 1
+        return touched
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], bypass: bool = False) -> Any:
+        if not bypass and self.ttl > 0:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            value = self.get(key, allow_stale=self.stale_ttl > 0)
+            if value is not None:
+                # serve stale now, refresh in the background
+                self.stale_hits += 1
+                self._load(key, loader)
+                return value
+        self.misses += 1
+        # shield so one caller disconnecting doesn't cancel the shared load
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.ttl > 0:
+            self.set(key, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "inflight": len(self._inflight),
+        }
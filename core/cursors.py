@@ -0,0 +1,49 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from typing import Optional
+
+
+def fingerprint(source: str, query: Optional[str], **variant) -> str:
+    # whitespace-insensitive, like the cache key
+    canonical = json.dumps([source, " ".join((query or "").split()), sorted(variant.items())])
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class CursorSigner:
+    """Opaque, HMAC-signed page cursors carrying the upstream offset for one query."""
+
+    def __init__(self, secret: Optional[str] = None):
+        # without a configured secret, cursors only survive as long as this process
+        self._key = (secret or secrets.token_hex(32)).encode("utf-8")
+
+    @classmethod
+    def from_env(cls) -> "CursorSigner":
+        return cls(os.getenv("OCTOFETCH_CURSOR_SECRET"))
+
+    def _sign(self, payload: bytes) -> str:
+        digest = hmac.new(self._key, payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def encode(self, offset: int, source: str, query: Optional[str], **variant) -> str:
+        payload = json.dumps({"o": offset, "f": fingerprint(source, query, **variant)}, separators=(",", ":")).encode("utf-8")
+        body = base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+        return f"{body}.{self._sign(payload)}"
+
+    def decode(self, token: str, source: str, query: Optional[str], **variant) -> int:
+        """Return the offset a cursor resumes from; ValueError if it is forged or for another query."""
+        try:
+            body, signature = token.split(".", 1)
+            payload = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4))
+        except ValueError:
+            raise ValueError("malformed cursor")
+        # bytes: compare_digest raises TypeError on non-ASCII str
+        if not hmac.compare_digest(signature.encode("utf-8"), self._sign(payload).encode("ascii")):
+            raise ValueError("invalid cursor")
+        data = json.loads(payload)
+        if data.get("f") != fingerprint(source, query, **variant):
+            raise ValueError("cursor belongs to a different query")
+        return int(data["o"])
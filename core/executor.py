@@ -0,0 +1,73 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+DEFAULT_MAX_WORKERS = 8
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def max_workers_for(name: str) -> int:
+    # e.g. JIRA_MAX_WORKERS / CONFLUENCE_MAX_WORKERS
+    return int(os.getenv(f"{name.upper()}_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+
+
+def get_executor(name: str, max_workers: Optional[int] = None) -> ThreadPoolExecutor:
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers or max_workers_for(name),
+                    thread_name_prefix=f"octofetch-{name}",
+                )
+                _executors[name] = executor
+    return executor
+
+
+async def run_in_executor(name: str, fn: Callable, *args, **kwargs) -> Any:
+    # Copy the caller's context so request-scoped contextvars survive the hop.
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
+
+
+async def call_connector(connector, method: str, **kwargs) -> Any:
+    fn = getattr(connector, method)
+    if inspect.iscoroutinefunction(fn):
+        return await fn(**kwargs)
+    return await run_in_executor(connector.name(), fn, **kwargs)
+
+
+async def iterate_in_executor(name: str, iterator: Iterator) -> AsyncIterator:
+    # Drive a blocking iterator one step at a time without holding the event loop.
+    done = object()
+    try:
+        while True:
+            value = await run_in_executor(name, next, iterator, done)
+            if value is done:
+                return
+            yield value
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # still running in a worker thread after a cancelled await
+                pass
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
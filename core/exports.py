@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from core.executor import run_in_executor
+from core.serialization import dumps
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+COMPRESSIONS = ("zstd", "gzip")
+SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+# resumed on startup; anything else is finished
+ACTIVE = ("queued", "running")
+
+
+def default_compression() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    # Each page becomes its own gzip member / zstd frame. Concatenated members
+    # decode as one stream, and a page is either fully on disk or cut off by
+    # truncating to the last checkpoint.
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ExportManager:
+    """Background export jobs writing compressed JSONL, checkpointed after every page.
+
+    pages(job) yields lists of finished (normalized, projected, converted)
+    items starting at job["cursor"]; the manager owns files and checkpoints.
+    """
+
+    def __init__(self, directory: str, pages: Callable[[Dict], AsyncIterator[List[Dict]]], max_jobs: int = 2):
+        self.directory = directory
+        self.pages = pages
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            if name.endswith(".json"):
+                with open(os.path.join(directory, name)) as f:
+                    job = json.load(f)
+                self._jobs[job["id"]] = job
+
+    @classmethod
+    def from_env(cls, pages: Callable[[Dict], AsyncIterator[List[Dict]]]) -> "ExportManager":
+        return cls(
+            os.getenv("OCTOFETCH_EXPORT_DIR", "exports"),
+            pages,
+            max_jobs=int(os.getenv("OCTOFETCH_EXPORT_JOBS", 2)),
+        )
+
+    def create(self, source: str, query: Optional[str], fields: Optional[List[str]] = None, body_format: str = "raw",
+               compression: Optional[str] = None, page_concurrency: Optional[int] = None, limit: Optional[int] = None) -> Dict:
+        compression = compression or default_compression()
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"unknown compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        os.makedirs(self.directory, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "source": source,
+            "query": query,
+            "fields": fields,
+            "body_format": body_format,
+            "compression": compression,
+            "page_concurrency": page_concurrency,
+            "limit": limit,
+            "status": "queued",
+            "path": os.path.join(self.directory, job_id + SUFFIXES[compression]),
+            # upstream offset to resume from, items written, and file size at that point
+            "cursor": 0,
+            "items": 0,
+            "bytes": 0,
+            "error": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        self._jobs[job_id] = job
+        self._checkpoint(job)
+        self.start(job_id)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def start(self, job_id: str) -> None:
+        if job_id not in self._tasks:
+            task = asyncio.ensure_future(self._run(self._jobs[job_id]))
+            self._tasks[job_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    def resume(self) -> List[str]:
+        """Restart jobs a previous process left queued or running."""
+        resumed = [job_id for job_id, job in self._jobs.items() if job["status"] in ACTIVE]
+        for job_id in resumed:
+            self.start(job_id)
+        return resumed
+
+    async def shutdown(self) -> None:
+        # checkpoints stay "running", so the next process picks them up
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Dict) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_jobs)
+        async with self._semaphore:
+            job["status"] = "running"
+            try:
+                await run_in_executor("exports", self._prepare, job)
+                async for page in self.pages(job):
+                    if page:
+                        await run_in_executor("exports", self._append, job, page)
+                job["status"] = "done"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+            job["updated_at"] = _now()
+            await run_in_executor("exports", self._checkpoint, job)
+
+    def _prepare(self, job: Dict) -> None:
+        # drop anything written after the last checkpoint; that page is fetched again
+        with open(job["path"], "ab") as f:
+            f.truncate(job["bytes"])
+        self._checkpoint(job)
+
+    def _append(self, job: Dict, page: List[Dict]) -> None:
+        data = compress(b"".join(dumps(item) + b"\n" for item in page), job["compression"])
+        with open(job["path"], "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        job["cursor"] += len(page)
+        job["items"] += len(page)
+        job["bytes"] += len(data)
+        job["updated_at"] = _now()
+        self._checkpoint(job)
+
+    def _checkpoint(self, job: Dict) -> None:
+        path = os.path.join(self.directory, job["id"] + ".json")
+        with self._lock:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(job, f)
+            os.replace(tmp, path)
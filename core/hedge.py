@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.metrics import HEDGED_CALLS
+
+# below this many samples the quantile is noise; don't hedge yet
+MIN_SAMPLES = 20
+# hedges may add at most this fraction of extra upstream calls
+HEDGE_BUDGET = 0.1
+# never hedge sooner than this, however fast the upstream usually is
+MIN_DELAY = 0.05
+
+
+class LatencyWindow:
+    """Recent successful-call latencies for one (connector, method)."""
+
+    def __init__(self, connector: str = "", method: str = "", size: int = 256):
+        self.connector = connector
+        self.method = method
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def allow_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > HEDGE_BUDGET * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def note_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+
+_windows: Dict[Tuple[str, str], LatencyWindow] = {}
+_lock = threading.Lock()
+
+
+def latency_window(connector: str, method: str) -> LatencyWindow:
+    key = (connector, method)
+    window = _windows.get(key)
+    if window is None:
+        with _lock:
+            window = _windows.setdefault(key, LatencyWindow(connector, method))
+    return window
+
+
+def hedged(fn: Callable[[], Any], window: LatencyWindow, executor: Executor, quantile: float = 0.95) -> Any:
+    """Run fn; if it outlives the window's quantile latency, race a second copy.
+
+    Only for idempotent reads. The slower copy is left to finish on its own;
+    its result is discarded.
+    """
+    window.note_call()
+    delay = window.quantile(quantile)
+    if delay is None:
+        return fn()
+    primary = executor.submit(fn)
+    done, _ = wait([primary], timeout=max(delay, MIN_DELAY))
+    if done or not window.allow_hedge():
+        return primary.result()
+    HEDGED_CALLS.inc(window.connector, window.method)
+    pending = {primary, executor.submit(fn)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+    return primary.result()
+
+
+def reset_windows() -> None:
+    with _lock:
+        _windows.clear()
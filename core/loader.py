@@ -1,9 +1,14 @@
+import ast
+import os
 import pkgutil
 import importlib
 import inspect
-from typing import List, Type
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Type
 from connectors.base_connector import BaseConnector
 
+ENTRY_POINT_GROUP = "octofetch.connectors"
+
 def load_connector_classes() -> List[Type[BaseConnector]]:
     connector_classes = []
     import connectors
@@ -19,3 +24,42 @@ def load_connector_classes() -> List[Type[BaseConnector]]:
             except TypeError:
                 continue
     return connector_classes
+
+def _declared_connector(path: str, module: str) -> Optional[tuple]:
+    # Read CONNECTOR_NAME and the BaseConnector subclass from source, without importing it.
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    name = cls = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "CONNECTOR_NAME" for t in node.targets):
+            if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                name = node.value.value
+        elif isinstance(node, ast.ClassDef) and cls is None:
+            if any(isinstance(b, ast.Name) and b.id == "BaseConnector" for b in node.bases):
+                cls = node.name
+    if cls is None:
+        return None
+    return name or cls.replace("Connector", "").lower(), f"{module}:{cls}"
+
+def discover_connectors() -> Dict[str, str]:
+    """Map source name -> "module:Class" for bundled connectors and installed plugins.
+
+    Nothing is imported; modules load when the registry first needs them.
+    """
+    specs: Dict[str, str] = {}
+    import connectors
+    for path in connectors.__path__:
+        for _, name, ispkg in pkgutil.iter_modules([path]):
+            if ispkg or name.startswith("__") or name == "base_connector":
+                continue
+            declared = _declared_connector(os.path.join(path, f"{name}.py"), f"connectors.{name}")
+            if declared:
+                specs[declared[0]] = declared[1]
+    # third-party connectors: [project.entry-points."octofetch.connectors"] jira = "pkg.mod:Class"
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        specs[ep.name] = ep.value
+    return specs
+
+def resolve_connector(target: str) -> Type[BaseConnector]:
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
@@ -0,0 +1,225 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last slot is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+REQUEST_DURATION = METRICS.register(Histogram(
+    "octofetch_request_duration_seconds", "HTTP request latency by route and source.", ("route", "source", "status")))
+RESPONSE_ITEMS = METRICS.register(Histogram(
+    "octofetch_response_items", "Items returned per response.", ("route", "source"), buckets=COUNT_BUCKETS))
+UPSTREAM_DURATION = METRICS.register(Histogram(
+    "octofetch_upstream_duration_seconds", "Upstream call latency by connector and client method.", ("connector", "method")))
+UPSTREAM_CALLS = METRICS.register(Counter(
+    "octofetch_upstream_calls_total", "Upstream calls by connector, client method and outcome.", ("connector", "method", "outcome")))
+UPSTREAM_INFLIGHT = METRICS.register(Gauge(
+    "octofetch_upstream_inflight", "Upstream calls currently in flight.", ("connector",)))
+UPSTREAM_THROTTLED = METRICS.register(Counter(
+    "octofetch_upstream_throttled_total", "Throttled (429 / 503 with Retry-After) upstream responses.", ("connector",)))
+BREAKER_STATE = METRICS.register(Gauge(
+    "octofetch_breaker_state", "Circuit breaker state per connector (0 closed, 1 half-open, 2 open).", ("connector",)))
+BREAKER_REJECTED = METRICS.register(Counter(
+    "octofetch_breaker_rejected_total", "Calls failed fast by an open circuit breaker.", ("connector",)))
+HEDGED_CALLS = METRICS.register(Counter(
+    "octofetch_hedged_calls_total", "Backup requests sent because the primary passed the latency quantile.", ("connector", "method")))
+RATE_LIMIT_WINDOW = METRICS.register(Gauge(
+    "octofetch_rate_limit_window", "Concurrent upstream calls currently allowed by the adaptive limiter.", ("connector",)))
+ADMISSION_INFLIGHT = METRICS.register(Gauge(
+    "octofetch_admission_inflight", "Requests holding an upstream slot per source.", ("source",)))
+ADMISSION_QUEUED = METRICS.register(Gauge(
+    "octofetch_admission_queue_depth", "Requests waiting for an upstream slot per source.", ("source",)))
+ADMISSION_WAIT = METRICS.register(Histogram(
+    "octofetch_admission_wait_seconds", "Time requests spent waiting for an upstream slot.", ("source",)))
+ADMISSION_SHED = METRICS.register(Counter(
+    "octofetch_admission_shed_total", "Requests rejected by admission control (queue_full, deadline, timeout).", ("source", "reason")))
+
+
+@contextmanager
+def upstream_call(connector: str, method: str) -> Iterator[None]:
+    UPSTREAM_INFLIGHT.inc(connector)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_INFLIGHT.dec(connector)
+        UPSTREAM_DURATION.observe(time.perf_counter() - started, connector, method)
+        UPSTREAM_CALLS.inc(connector, method, outcome)
+
+
+# Per-request stage durations, reported in the Server-Timing header.
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("octofetch_timings", default=None)
+
+
+def start_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency histogram plus a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        from starlette.datastructures import MutableHeaders
+
+        timings = start_timings()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings["total"] = time.perf_counter() - started
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            # unknown sources 404; don't let arbitrary path segments become label values
+            source = scope.get("path_params", {}).get("source", "") if status != 404 else ""
+            REQUEST_DURATION.observe(time.perf_counter() - started, getattr(route, "path", "unmatched"), source, str(status))
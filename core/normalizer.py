@@ -1,11 +1,98 @@
-from typing import Dict
+import asyncio
+import heapq
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from core.bodies import ConversionCache, body_workers, content_key, convert_batch, get_pool
+from core.executor import run_in_executor
 
-def normalize(item: Dict) -> Dict:
-    return {
+FIELDS = ("source", "id", "title", "body", "tags", "created_at", "updated_at")
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+BODY_CACHE = ConversionCache(int(os.getenv("OCTOFETCH_BODY_CACHE_SIZE", 4096)))
+
+def normalize(item: Dict, fields: Optional[Iterable[str]] = None) -> Dict:
+    record = {
         "source": item.get("source", ""),
         "id": str(item.get("id", "")),
         "title": item.get("title", "") or "",
         "body": item.get("body", "") or "",
         "tags": item.get("tags", []) or [],
-        "created_at": item.get("created_at", "")
+        "created_at": item.get("created_at", ""),
+        "updated_at": item.get("updated_at", "")
     }
+    return project(record, fields) if fields else record
+
+def project(record: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    if not fields:
+        return record
+    return {k: record[k] for k in fields if k in record}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated field list; raises ValueError on unknown names."""
+    if not fields:
+        return None
+    wanted = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return wanted or None
+
+async def normalize_pages(pages: AsyncIterator[List[Dict]], fields: Optional[Iterable[str]] = None) -> AsyncIterator[List[Dict]]:
+    async for page in pages:
+        yield [normalize(i, fields) for i in page]
+
+async def convert_bodies(items: List[Dict], body_format: str = "raw", max_body: Optional[int] = None) -> List[Dict]:
+    """Convert item bodies to text/markdown off the event loop and cap their length.
+
+    Returns new dicts; the input items (which may be shared with the cache) are untouched.
+    """
+    if body_format == "raw" and max_body is None:
+        return items
+    bodies: List[Optional[str]] = [i.get("body") for i in items]
+    if body_format != "raw":
+        misses: Dict[tuple, List[int]] = {}
+        for idx, item in enumerate(items):
+            if not bodies[idx]:
+                continue
+            key = content_key(bodies[idx], item.get("source", ""), body_format)
+            cached = BODY_CACHE.get(key)
+            if cached is not None:
+                bodies[idx] = cached
+            else:
+                misses.setdefault(key, []).append(idx)
+        if misses:
+            keys = list(misses)
+            jobs = [(bodies[misses[k][0]], k[1], body_format) for k in keys]
+            for key, converted in zip(keys, await _convert(jobs)):
+                BODY_CACHE.set(key, converted)
+                for idx in misses[key]:
+                    bodies[idx] = converted
+    if max_body is not None:
+        bodies = [b[:max_body] if b else b for b in bodies]
+    return [dict(item, body=body) if "body" in item else item for item, body in zip(items, bodies)]
+
+async def _convert(jobs: List[tuple]) -> List[str]:
+    workers = body_workers()
+    if workers <= 0:
+        return await run_in_executor("bodies", convert_batch, jobs)
+    # one batch per worker process keeps pickling overhead per call, not per item
+    loop = asyncio.get_running_loop()
+    size = -(-len(jobs) // workers)
+    batches = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(get_pool(), convert_batch, b) for b in batches))
+    return [body for batch in results for body in batch]
+
+def created_key(item: Dict) -> datetime:
+    # Jira ("+0000") and Confluence ("Z") timestamps compared as aware UTC datetimes
+    try:
+        when = datetime.fromisoformat(item.get("created_at") or "")
+    except (TypeError, ValueError):
+        return _EPOCH
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+def merge_newest_first(*feeds: List[Dict]) -> Iterator[Dict]:
+    """Lazily k-way merge per-source feeds into one feed ordered by created_at, newest first."""
+    ordered = [sorted(feed, key=created_key, reverse=True) for feed in feeds]
+    return heapq.merge(*ordered, key=created_key, reverse=True)
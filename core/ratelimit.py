@@ -0,0 +1,247 @@
+import email.utils
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from core.metrics import RATE_LIMIT_WINDOW, UPSTREAM_THROTTLED
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_RETRY_MAX_WAIT = 30.0
+# base of the full-jitter exponential backoff between retries, in seconds
+RETRY_BASE = 0.5
+# pause used when a 429 carries no Retry-After/X-RateLimit-Reset hint
+DEFAULT_PAUSE = 1.0
+# many in-flight calls see the same 429 burst; count it as one congestion event
+DECREASE_COOLDOWN = 1.0
+
+
+class Throttled(Exception):
+    """The upstream is still throttling us after the allowed retries."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is rate limiting requests; retry after {retry_after:.0f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    # delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now or time.time()))
+
+
+def parse_reset(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    # Atlassian sends an ISO 8601 timestamp; other servers send epoch or delta seconds
+    if not value:
+        return None
+    now = now or time.time()
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, when.timestamp() - now)
+    return max(0.0, number - now) if number > 1e9 else number
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def is_throttle(status: int, headers: Mapping[str, str]) -> bool:
+    # a 503 only counts as throttling when the server says when to come back
+    return status == 429 or (status == 503 and "Retry-After" in headers)
+
+
+def throttle_response(exc: BaseException) -> Optional[Any]:
+    response = getattr(exc, "response", None)
+    if response is None or not is_throttle(response.status_code, response.headers):
+        return None
+    return response
+
+
+class RateLimiter:
+    """Token bucket plus an AIMD concurrency window for one upstream.
+
+    Every connector call takes a slot; response headers seen on the shared
+    session feed back into the window, the refill rate and a pause gate that
+    all waiting workers honour together.
+    """
+
+    def __init__(self, name: str, rate: float = 0.0, burst: Optional[float] = None, max_concurrency: int = 16):
+        self.name = name
+        # requests per second; 0 leaves the rate uncapped until the upstream advertises one
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.max_concurrency = max_concurrency
+        self.window = float(max_concurrency)
+        self.inflight = 0
+        self.paused_until = 0.0
+        self._refilled = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        RATE_LIMIT_WINDOW.set(name, value=self.window)
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrency: int) -> "RateLimiter":
+        prefix = name.upper()
+        burst = os.getenv(f"{prefix}_RATE_BURST")
+        return cls(
+            name,
+            rate=float(os.getenv(f"{prefix}_RATE_LIMIT", 0)),
+            burst=float(burst) if burst else None,
+            max_concurrency=max_concurrency,
+        )
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        # seconds until a slot could be free; None means wait for a release
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.inflight >= max(1, int(self.window)):
+            return None
+        if self.rate and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def acquire(self, max_wait: Optional[float] = None) -> None:
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now)
+                if wait == 0.0:
+                    break
+                if deadline is not None:
+                    if wait is not None and now + wait > deadline:
+                        raise Throttled(self.name, wait)
+                    wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    if wait <= 0:
+                        raise Throttled(self.name, 0.0)
+                self._cond.wait(wait)
+            self.inflight += 1
+            if self.rate:
+                self.tokens -= 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, max_wait: Optional[float] = None) -> Iterator[None]:
+        self.acquire(max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> None:
+        """Feed one upstream response back into the limiter."""
+        now = time.monotonic()
+        with self._cond:
+            self._learn_rate(headers)
+            if is_throttle(status, headers):
+                UPSTREAM_THROTTLED.inc(self.name)
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self.window = max(1.0, self.window / 2)
+                    self._last_decrease = now
+                pause = parse_retry_after(headers.get("Retry-After"))
+                if pause is None:
+                    pause = parse_reset(headers.get("X-RateLimit-Reset"))
+                self._pause(now, DEFAULT_PAUSE if pause is None else pause)
+            else:
+                if status < 400:
+                    # roughly +1 slot per window's worth of successful calls
+                    self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+                if _header_float(headers, "X-RateLimit-Remaining") == 0:
+                    reset = parse_reset(headers.get("X-RateLimit-Reset"))
+                    if reset:
+                        self._pause(now, reset)
+            RATE_LIMIT_WINDOW.set(self.name, value=self.window)
+            self._cond.notify_all()
+
+    def _learn_rate(self, headers: Mapping[str, str]) -> None:
+        # Atlassian Cloud advertises its bucket: Limit tokens, refilled FillRate per Interval-Seconds
+        fill = _header_float(headers, "X-RateLimit-FillRate")
+        interval = _header_float(headers, "X-RateLimit-Interval-Seconds") or 1.0
+        if not fill:
+            return
+        advertised = fill / interval
+        self.rate = min(self.configured_rate, advertised) if self.configured_rate else advertised
+        self.burst = _header_float(headers, "X-RateLimit-Limit") or max(self.burst, 1.0)
+        self.tokens = min(self.tokens, self.burst)
+
+    def _pause(self, now: float, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, now + seconds)
+
+    def call(self, fn: Callable[[], Any], retries: int = DEFAULT_MAX_RETRIES, max_wait: float = DEFAULT_RETRY_MAX_WAIT) -> Any:
+        """Run fn under a slot, retrying throttled responses with full-jitter backoff.
+
+        The pause gate makes every worker honour Retry-After together; the
+        jitter then spreads their retries so they don't land as one burst.
+        """
+        retrying = Retrying(
+            retry=retry_if_exception(lambda e: throttle_response(e) is not None),
+            wait=wait_random_exponential(multiplier=RETRY_BASE, max=max_wait),
+            stop=stop_after_attempt(retries + 1),
+            reraise=True,
+        )
+        try:
+            for attempt in retrying:
+                with attempt:
+                    with self.slot(max_wait):
+                        return fn()
+        except Exception as e:
+            response = throttle_response(e)
+            if response is None:
+                raise
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            raise Throttled(self.name, DEFAULT_PAUSE if retry_after is None else retry_after) from e
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_limiter(name: str, max_concurrency: int) -> RateLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = RateLimiter.from_env(name, max_concurrency)
+    return limiter
+
+
+def reset_limiters() -> None:
+    with _lock:
+        _limiters.clear()
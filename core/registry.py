@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from connectors.base_connector import BaseConnector
+
+log = logging.getLogger(__name__)
+
+
+class ConnectorUnavailable(Exception):
+    """A declared source whose connector can't be imported or built right now."""
+
+    def __init__(self, source: str, cause: BaseException):
+        super().__init__(f"{source} connector is unavailable: {cause}")
+        self.source = source
+        self.cause = cause
+
+
+class ConnectorRegistry:
+    """Process-wide connector instances, built once and looked up by name()."""
+
+    def __init__(self, classes: Iterable[type], config_factory: Callable[[type], Dict] = lambda cls: {}):
+        self._connectors: Dict[str, BaseConnector] = {}
+        self._names: List[str] = []
+        for cls in classes:
+            try:
+                inst = cls(config_factory(cls))
+                name = inst.name()
+            except Exception:
+                # keep listing the source even if it can't be built right now
+                self._names.append(getattr(cls, "__name__", "").replace("Connector", "").lower())
+                continue
+            self._connectors[name] = inst
+            self._names.append(name)
+
+    def get(self, name: str) -> Optional[BaseConnector]:
+        return self._connectors.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._connectors
+
+    def __iter__(self):
+        return iter(self._connectors.values())
+
+
+class LazyConnectorRegistry(ConnectorRegistry):
+    """Connectors declared by name; each module is imported and built on first get()."""
+
+    def __init__(self, specs: Dict[str, str], config_factory: Callable[[type], Dict] = lambda cls: {},
+                 resolve: Optional[Callable[[str], type]] = None):
+        from core.loader import resolve_connector
+
+        self._specs = dict(specs)
+        self._config_factory = config_factory
+        self._resolve = resolve or resolve_connector
+        self._connectors: Dict[str, BaseConnector] = {}
+        self._names = list(self._specs)
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[BaseConnector]:
+        inst = self._connectors.get(name)
+        if inst is not None or name not in self._specs:
+            return inst
+        with self._lock:
+            inst = self._connectors.get(name)
+            if inst is None:
+                try:
+                    cls = self._resolve(self._specs[name])
+                    inst = cls(self._config_factory(cls))
+                except Exception as e:
+                    # listed but unusable right now; try again on the next request,
+                    # with a full traceback only when the failure changes
+                    if self._errors.get(name) != repr(e):
+                        self._errors[name] = repr(e)
+                        log.exception("loading the %s connector failed", name)
+                    else:
+                        log.warning("loading the %s connector failed: %s", name, e)
+                    raise ConnectorUnavailable(name, e) from e
+                self._errors.pop(name, None)
+                self._connectors[name] = inst
+        return inst
+
+    def loaded(self) -> List[str]:
+        return list(self._connectors)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self):
+        instances = []
+        for name in self._names:
+            try:
+                instances.append(self.get(name))
+            except ConnectorUnavailable:
+                continue
+        return iter(instances)
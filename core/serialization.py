@@ -0,0 +1,51 @@
+import hashlib
+import json
+from typing import Any, Iterable, Optional
+from starlette.responses import JSONResponse, Response
+from core.metrics import stage
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Encode already-normalized content straight to bytes, skipping pydantic and jsonable_encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            return dumps(content)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            return super().render(content)
+
+
+def etag(items: Iterable[dict], **variant) -> str:
+    """Strong ETag from each item's id and upstream update time, plus anything else that shapes the bytes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(sorted(variant.items())).encode("utf-8"))
+    for item in items:
+        digest.update(f"{item.get('id')}\x00{item.get('updated_at') or ''}\x01".encode("utf-8"))
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any((c[2:] if c.startswith("W/") else c) == tag for c in candidates)
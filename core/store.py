@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.timestamps import parse_time
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    source TEXT NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    body TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT,
+    updated_at TEXT,
+    created_utc TEXT,
+    PRIMARY KEY (source, id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, body, tags, content='items', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, title, body, tags) VALUES (new.rowid, new.title, new.body, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, body, tags) VALUES ('delete', old.rowid, old.title, old.body, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, body, tags) VALUES ('delete', old.rowid, old.title, old.body, old.tags);
+    INSERT INTO items_fts(rowid, title, body, tags) VALUES (new.rowid, new.title, new.body, new.tags);
+END;
+"""
+
+UPSERT = """
+INSERT INTO items (source, id, title, body, tags, created_at, updated_at, created_utc)
+VALUES (:source, :id, :title, :body, :tags, :created_at, :updated_at, :created_utc)
+ON CONFLICT (source, id) DO UPDATE SET
+    title = excluded.title,
+    body = excluded.body,
+    tags = excluded.tags,
+    created_at = excluded.created_at,
+    updated_at = excluded.updated_at,
+    created_utc = excluded.created_utc
+"""
+
+COLUMNS = ("source", "id", "title", "body", "tags", "created_at", "updated_at")
+
+
+# fixed width, so string order is time order
+UTC_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def utc_key(timestamp: Optional[str]) -> Optional[str]:
+    """A timestamp as UTC text in UTC_FORMAT; None if it doesn't parse."""
+    if not timestamp:
+        return None
+    try:
+        instant = parse_time(timestamp)
+    except ValueError:
+        return None
+    return instant.astimezone(timezone.utc).strftime(UTC_FORMAT)
+
+
+def match_expression(q: str) -> str:
+    # Quote every term so user input can't trip FTS5 query syntax; terms are AND-ed.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+
+class ItemStore:
+    """Normalized items in SQLite with an FTS5 index over title, body and tags."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self) -> None:
+        # stores written before created_utc existed: add it and fill it from created_at
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(items)")}
+        if "created_utc" not in columns:
+            self._conn.execute("ALTER TABLE items ADD COLUMN created_utc TEXT")
+            rows = self._conn.execute("SELECT rowid, created_at FROM items WHERE created_at IS NOT NULL").fetchall()
+            self._conn.executemany(
+                "UPDATE items SET created_utc = ? WHERE rowid = ?", [(utc_key(row["created_at"]), row["rowid"]) for row in rows])
+        self._conn.execute("DROP INDEX IF EXISTS items_created_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_created_utc ON items (created_utc)")
+
+    @classmethod
+    def from_env(cls) -> "ItemStore":
+        return cls(os.getenv("OCTOFETCH_STORE_PATH", ":memory:"))
+
+    def upsert_many(self, items: Iterable[Dict]) -> int:
+        rows = [
+            {
+                "source": i.get("source", ""),
+                "id": str(i.get("id", "")),
+                "title": i.get("title") or "",
+                "body": i.get("body") or "",
+                "tags": json.dumps(i.get("tags") or []),
+                "created_at": i.get("created_at"),
+                "updated_at": i.get("updated_at"),
+                "created_utc": utc_key(i.get("created_at")),
+            }
+            for i in items
+        ]
+        if not rows:
+            return 0
+        # one transaction per batch
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def delete_many(self, keys: Iterable[Tuple[str, str]]) -> int:
+        rows = [(source, str(item_id)) for source, item_id in keys]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM items WHERE source = ? AND id = ?", rows)
+        return len(rows)
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """Matching items; since/until bound created_at by instant and raise ValueError when they don't parse."""
+        where: List[str] = []
+        params: List = []
+        if q and q.strip():
+            where.append("items_fts MATCH ?")
+            params.append(match_expression(q))
+        if source:
+            where.append("items.source = ?")
+            params.append(source)
+        for tag in tags or []:
+            where.append("EXISTS (SELECT 1 FROM json_each(items.tags) WHERE value = ?)")
+            params.append(tag)
+        # created_at keeps the upstream's offsets; compare normalized UTC instead
+        for bound, op in ((since, ">="), (until, "<=")):
+            if bound:
+                where.append(f"items.created_utc {op} ?")
+                params.append(parse_time(bound).astimezone(timezone.utc).strftime(UTC_FORMAT))
+
+        columns = ", ".join(f"items.{c}" for c in COLUMNS)
+        if q and q.strip():
+            sql = f"SELECT {columns} FROM items_fts JOIN items ON items.rowid = items_fts.rowid"
+            order = "bm25(items_fts)"
+        else:
+            sql = f"SELECT {columns} FROM items"
+            order = "items.created_utc DESC"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_item(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def _to_item(self, row: sqlite3.Row) -> Dict:
+        item = dict(row)
+        item["tags"] = json.loads(item["tags"])
+        return item
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class StoreWriter:
+    """Applies store writes in order on one background thread, off the request path.
+
+    At most `max_pending` writes wait at once. `submit` never blocks and drops
+    the write when the queue is full: write-through copies of fetched items are
+    best effort, the next fetch writes them again. `put` waits for room instead,
+    for writes that must not be lost, and returns a future for the outcome.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[Optional[Tuple[Callable, tuple, Optional[Future]]]]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> "StoreWriter":
+        return cls(max_pending=int(os.getenv("OCTOFETCH_STORE_QUEUE", 1000)))
+
+    def _start(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="octofetch-store-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, fn: Callable, *args) -> bool:
+        """Queue fn(*args); False, and the write is dropped, when the queue is full."""
+        self._start()
+        try:
+            self._queue.put_nowait((fn, args, None))
+        except queue.Full:
+            self.dropped += 1
+            log.warning("store write queue full; dropping a write")
+            return False
+        return True
+
+    def put(self, fn: Callable, *args) -> Future:
+        """Queue fn(*args), waiting for room if needed; the future resolves once it has run."""
+        self._start()
+        done: Future = Future()
+        self._queue.put((fn, args, done))
+        return done
+
+    def _run(self) -> None:
+        while True:
+            write = self._queue.get()
+            try:
+                if write is None:
+                    return
+                fn, args, done = write
+                try:
+                    result = fn(*args)
+                    self.written += 1
+                except Exception as e:
+                    self.failed += 1
+                    if done is None:
+                        log.exception("store write failed")
+                    else:
+                        done.set_exception(e)
+                else:
+                    if done is not None:
+                        done.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every write queued so far has been applied."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
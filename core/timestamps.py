@@ -0,0 +1,17 @@
+import re
+from datetime import datetime, timezone
+
+# "+0200" (Jira) -> "+02:00"; fromisoformat on older Pythons wants the colon
+_OFFSET = re.compile(r"([+-]\d{2}):?(\d{2})$")
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def parse_time(timestamp: str) -> datetime:
+    """Aware datetime for an upstream ISO 8601 timestamp; one without an offset is taken as UTC."""
+    text = timestamp.strip().replace(" ", "T", 1)
+    if text[-1:] in ("Z", "z"):
+        text = text[:-1] + "+00:00"
+    text = _OFFSET.sub(r"\1:\2", text)
+    text = _FRACTION.sub(lambda m: "." + (m.group(1) + "000000")[:6], text)
+    parsed = datetime.fromisoformat(text)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import sys
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.breaker import upstream_status
+
+log = logging.getLogger(__name__)
+
+# what the typeahead needs; Cloud identifies users by accountId, Server/DC by name/key
+USER_FIELDS = ("accountId", "name", "key", "displayName", "emailAddress", "active")
+# bounds the work a one-letter prefix can cause
+MAX_SCAN = 2000
+
+# rank of a match, best first
+EXACT, NAME_PREFIX, WORD_PREFIX, EMAIL_PREFIX = range(4)
+
+
+def fold(text: str) -> str:
+    # case- and accent-insensitive: "José" and "jose" index the same
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def _tokens(user: Dict) -> List[Tuple[str, int]]:
+    name = fold(user.get("displayName", ""))
+    email = fold(user.get("emailAddress", ""))
+    tokens = []
+    if name:
+        tokens.append((name, NAME_PREFIX))
+        tokens.extend((word, WORD_PREFIX) for word in name.split()[1:])
+    if email:
+        tokens.append((email, EMAIL_PREFIX))
+    for handle in (user.get("name"), user.get("key")):
+        if handle and fold(handle) not in (name, email):
+            tokens.append((fold(handle), EMAIL_PREFIX))
+    return tokens
+
+
+class UserDirectory:
+    """Users held in memory behind a sorted-array prefix index.
+
+    Index entries are (folded token, rank, user position) kept in one sorted
+    list; a query is a bisect to the first token >= the prefix and a short
+    scan forward. Rebuilt wholesale on refresh and swapped in atomically.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Dict]]], max_entries: int = 50000, refresh_interval: float = 600.0):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self._users: List[Dict] = []
+        self._index: List[Tuple[str, int, int]] = []
+        self._keys: List[str] = []
+        self.loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        # set when the upstream has no bulk user listing (Jira Server/DC); lookups stay live
+        self.unsupported = False
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self, users: List[Dict]) -> None:
+        users = [{k: u[k] for k in USER_FIELDS if k in u} for u in users[:self.max_entries]]
+        index = sorted((token, rank, pos) for pos, user in enumerate(users) for token, rank in _tokens(user))
+        # single assignment so readers never see a half-built index
+        self._users, self._index, self._keys = users, index, [entry[0] for entry in index]
+        self.loaded_at = time.monotonic()
+
+    def search(self, q: str, limit: int = 20) -> List[Dict]:
+        users, index, keys = self._users, self._index, self._keys
+        prefix = fold(q)
+        best: Dict[int, int] = {}
+        start = bisect_left(keys, prefix)
+        for token, rank, pos in index[start:start + MAX_SCAN]:
+            if not token.startswith(prefix):
+                break
+            if token == prefix and rank == NAME_PREFIX:
+                rank = EXACT
+            if rank < best.get(pos, EMAIL_PREFIX + 1):
+                best[pos] = rank
+        ranked = sorted(best, key=lambda pos: (best[pos], fold(users[pos].get("displayName", ""))))
+        found = [users[pos] for pos in ranked[:limit]]
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    async def refresh(self) -> None:
+        try:
+            self.load(await self.loader())
+            self.refreshes += 1
+        except Exception as e:
+            self.errors += 1
+            if upstream_status(e) == 404:
+                self.unsupported = True
+                log.warning("the upstream has no bulk user listing (%s); serving /users from live search only", e)
+            else:
+                log.exception("loading the user directory failed")
+
+    def start(self) -> None:
+        """Load in the background now and every refresh_interval after that."""
+        if not self.unsupported and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            if self.unsupported:
+                return
+            await asyncio.sleep(self.refresh_interval)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def memory_bytes(self) -> int:
+        # shallow but honest: strings and containers we own, shared small ints aside
+        size = sys.getsizeof(self._users) + sys.getsizeof(self._index) + sys.getsizeof(self._keys)
+        size += sum(sys.getsizeof(entry) + sys.getsizeof(entry[0]) for entry in self._index)
+        size += sum(sys.getsizeof(u) + sum(sys.getsizeof(v) for v in u.values()) for u in self._users)
+        return size
+
+    def stats(self) -> Dict:
+        return {
+            "loaded": self.loaded,
+            "unsupported": self.unsupported,
+            "entries": len(self._users),
+            "max_entries": self.max_entries,
+            "index_entries": len(self._index),
+            "memory_bytes": self.memory_bytes(),
+            "age_seconds": time.monotonic() - self.loaded_at if self.loaded else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.timestamps import parse_time
+
+
+def _minute(instant: datetime) -> datetime:
+    # upstream queries only resolve whole minutes
+    return instant.replace(second=0, microsecond=0)
+
+
+class WatermarkStore:
+    """Last-seen upstream update time per (source, query), optionally persisted to JSON.
+
+    Queries only match by minute, so each mark also keeps a resume point inside
+    its minute: the ids already returned at exactly the mark's instant, and how
+    many items were returned from the mark's minute in total. The next call asks
+    for that many extra rows and drops the ones it has already handed out, so a
+    minute with more than `limit` changes is worked through instead of being
+    returned from its start every time.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._marks: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                # older files hold a bare timestamp per key
+                self._marks = {k: v if isinstance(v, dict) else {"at": v, "ids": [], "seen": 0} for k, v in json.load(f).items()}
+
+    @classmethod
+    def from_env(cls) -> "WatermarkStore":
+        return cls(os.getenv("OCTOFETCH_WATERMARK_FILE"))
+
+    @staticmethod
+    def key(source: str, query: Optional[str]) -> str:
+        return f"{source}:{' '.join((query or '').split())}"
+
+    def get(self, source: str, query: Optional[str]) -> Optional[str]:
+        mark = self._marks.get(self.key(source, query))
+        return mark["at"] if mark else None
+
+    def resume(self, source: str, query: Optional[str]) -> Tuple[Optional[str], int]:
+        """(since, rows from the mark's minute already returned) for the next incremental call."""
+        mark = self._marks.get(self.key(source, query))
+        return (mark["at"], mark["seen"]) if mark else (None, 0)
+
+    def unseen(self, source: str, query: Optional[str], items: Iterable[Dict]) -> List[Dict]:
+        """Drop items the stored mark has already covered."""
+        mark = self._marks.get(self.key(source, query))
+        if not mark:
+            return list(items)
+        at, ids = parse_time(mark["at"]), set(mark["ids"])
+        kept = []
+        for item in items:
+            updated = item.get("updated_at")
+            if updated:
+                instant = parse_time(updated)
+                if instant < at or (instant == at and item.get("id") in ids):
+                    continue
+            kept.append(item)
+        return kept
+
+    def advance(self, source: str, query: Optional[str], items: Iterable[Dict]) -> Optional[str]:
+        key = self.key(source, query)
+        items = [i for i in items if i.get("updated_at")]
+        with self._lock:
+            mark = self._marks.get(key)
+            # compare instants: upstream timestamps carry differing UTC offsets
+            latest = max((i["updated_at"] for i in items), key=parse_time, default=None)
+            if latest:
+                at = parse_time(latest)
+                current = parse_time(mark["at"]) if mark else None
+                if current is None or at >= current:
+                    minute = _minute(at)
+                    ids = [i.get("id") for i in items if parse_time(i["updated_at"]) == at]
+                    seen = sum(1 for i in items if _minute(parse_time(i["updated_at"])) == minute)
+                    if current is not None and _minute(current) == minute:
+                        seen += mark["seen"]
+                        if at == current:
+                            ids = mark["ids"] + ids
+                            latest = mark["at"]
+                    self._marks[key] = {"at": latest, "ids": ids, "seen": seen}
+                    self._save()
+            mark = self._marks.get(key)
+            return mark["at"] if mark else None
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._marks, f)
+        os.replace(tmp, self.path)
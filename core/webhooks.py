@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+UPSERT, DELETE = "upsert", "delete"
+
+# (action, item id, payload object the connector turns into an item, whether the item is new)
+Change = Tuple[str, str, Dict, bool]
+
+
+def parse_jira(payload: Dict) -> Optional[Change]:
+    event = payload.get("webhookEvent", "")
+    issue = payload.get("issue") or {}
+    if not issue.get("key"):
+        return None
+    if event == "jira:issue_deleted":
+        return DELETE, issue["key"], issue, False
+    if event in ("jira:issue_created", "jira:issue_updated"):
+        return UPSERT, issue["key"], issue, event == "jira:issue_created"
+    return None
+
+
+def parse_confluence(payload: Dict) -> Optional[Change]:
+    event = payload.get("event") or payload.get("webhookEvent") or ""
+    content = payload.get("page") or payload.get("blog") or {}
+    if not content.get("id"):
+        return None
+    kind, _, action = event.partition("_")
+    if kind not in ("page", "blog", "blogpost"):
+        return None
+    if action in ("removed", "trashed"):
+        return DELETE, str(content["id"]), content, False
+    if action in ("created", "updated", "restored"):
+        return UPSERT, str(content["id"]), content, action != "updated"
+    return None
+
+
+PARSERS = {"jira": parse_jira, "confluence": parse_confluence}
+
+
+def verify_signature(secret: Optional[str], body: bytes, header: Optional[str]) -> bool:
+    # Jira/Confluence webhooks registered with a secret send X-Hub-Signature: sha256=<hex>
+    if not secret:
+        # nothing to check against: an unsigned event could come from anyone
+        return False
+    if not header or "=" not in header:
+        return False
+    algorithm, _, signature = header.partition("=")
+    if algorithm not in ("sha256", "sha1"):
+        return False
+    expected = hmac.new(secret.encode("utf-8"), body, getattr(hashlib, algorithm)).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class ChangeQueue:
+    """Bounded buffer of pending item changes, de-duplicated per (source, id) and applied in batches.
+
+    A later event for an item replaces the pending one, so a burst of edits
+    costs one store write and one upstream lookup at most.
+    """
+
+    def __init__(self, apply: Callable[[List[Tuple[str, Change]]], Awaitable[Optional[List[Tuple[str, Change]]]]],
+                 max_pending: int = 10000, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_attempts: int = 5, retry_delay: float = 1.0):
+        # apply(batch) returns the changes to try again later (or None); raising retries the whole batch
+        self.apply = apply
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._pending: "OrderedDict[Tuple[str, str], Change]" = OrderedDict()
+        self._attempts: Dict[Tuple[str, str], int] = {}
+        self._retries: Set[asyncio.TimerHandle] = set()
+        self._ready: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.received = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.applied = 0
+        self.retried = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls, apply: Callable[[List[Tuple[str, Change]]], Awaitable[Optional[List[Tuple[str, Change]]]]]) -> "ChangeQueue":
+        return cls(
+            apply,
+            max_pending=int(os.getenv("OCTOFETCH_WEBHOOK_QUEUE", 10000)),
+            batch_size=int(os.getenv("OCTOFETCH_WEBHOOK_BATCH", 500)),
+            flush_interval=float(os.getenv("OCTOFETCH_WEBHOOK_FLUSH", 0.5)),
+            max_attempts=int(os.getenv("OCTOFETCH_WEBHOOK_ATTEMPTS", 5)),
+        )
+
+    def put(self, source: str, change: Change) -> bool:
+        """Queue a change; False when the queue is full."""
+        key = (source, change[1])
+        previous = self._pending.get(key)
+        if previous is None and len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            return False
+        self.received += 1
+        if previous is not None:
+            self.deduplicated += 1
+            # created-then-updated is still a creation
+            change = (change[0], change[1], change[2], change[3] or previous[3])
+        self._pending[key] = change
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        self._ready.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        return True
+
+    def _take(self) -> List[Tuple[str, Change]]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            (source, _), change = self._pending.popitem(last=False)
+            batch.append((source, change))
+        if not self._pending:
+            self._ready.clear()
+        return batch
+
+    async def _apply(self, batch: List[Tuple[str, Change]]) -> None:
+        try:
+            failed = await self.apply(batch) or []
+        except Exception:
+            log.exception("applying %d webhook changes failed", len(batch))
+            failed = batch
+        retry = {(source, change[1]) for source, change in failed}
+        for source, change in batch:
+            if (source, change[1]) not in retry:
+                self._attempts.pop((source, change[1]), None)
+                self.applied += 1
+        for source, change in failed:
+            self._retry(source, change)
+
+    def _retry(self, source: str, change: Change) -> None:
+        key = (source, change[1])
+        attempt = self._attempts.get(key, 0) + 1
+        if attempt >= self.max_attempts:
+            self._attempts.pop(key, None)
+            self.failed += 1
+            log.warning("dropping webhook change for %s %s after %d attempts", source, change[1], attempt)
+            return
+        self._attempts[key] = attempt
+        self.retried += 1
+        # exponential backoff so a struggling upstream isn't hit every flush
+        handle = asyncio.get_running_loop().call_later(
+            self.retry_delay * 2 ** (attempt - 1), lambda: self._requeue(source, change, handle))
+        self._retries.add(handle)
+
+    def _requeue(self, source: str, change: Change, handle: asyncio.TimerHandle) -> None:
+        self._retries.discard(handle)
+        previous = self._pending.get((source, change[1]))
+        if previous is not None:
+            # a newer event for the item is already queued and supersedes this one
+            if change[3] and not previous[3]:
+                self._pending[(source, change[1])] = previous[:3] + (True,)
+            return
+        if not self.put(source, change):
+            self.failed += 1
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            if len(self._pending) < self.batch_size:
+                # let a burst collect so it lands as one batch
+                await asyncio.sleep(self.flush_interval)
+            batch = self._take()
+            if batch:
+                await self._apply(batch)
+
+    async def drain(self) -> None:
+        while self._pending:
+            await self._apply(self._take())
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._retries:
+            log.warning("dropping %d webhook changes still waiting to be retried", len(self._retries))
+            for handle in self._retries:
+                handle.cancel()
+            self.failed += len(self._retries)
+            self._retries.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "applied": self.applied,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
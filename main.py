@@ -1,78 +1,663 @@
 import os
 import asyncio
-from fastapi import FastAPI, HTTPException, Query
-from core.loader import load_connector_classes
-from core.normalizer import normalize
-from typing import List
-from pydantic import BaseModel
+import json
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from connectors.base_connector import order_by
+from core.admission import AdmissionMiddleware, Overloaded
+from core.cache import ResponseCache
+from core.cursors import CursorSigner
+from core.bodies import shutdown_pool
+from core.breaker import CircuitOpen
+from core.executor import call_connector, run_in_executor, shutdown_executors
+from core.exports import ExportManager
+from core.loader import discover_connectors
+from core.metrics import METRICS, RESPONSE_ITEMS, MetricsMiddleware, stage
+from core.normalizer import convert_bodies, merge_newest_first, normalize, normalize_pages, parse_fields, project
+from core.ratelimit import Throttled
+from core.registry import ConnectorUnavailable, LazyConnectorRegistry
+from core.serialization import FastJSONResponse, TimedJSONResponse, dumps, etag, etag_matches
+from core.store import ItemStore, StoreWriter
+from core.timestamps import parse_time
+from core.users import UserDirectory
+from core.watermarks import WatermarkStore
+from core.webhooks import DELETE, PARSERS, ChangeQueue, verify_signature
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="OctoFetch - Async Pluggable Content Extractor")
+log = logging.getLogger(__name__)
 
-CONNECTOR_CLASSES = load_connector_classes()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    EXPORTS.resume()
+    yield
+    await EXPORTS.shutdown()
+    await CHANGES.close()
+    for directory in USER_DIRECTORIES.values():
+        await directory.close()
+    shutdown_executors()
+    shutdown_pool()
+    STORE_WRITES.close()
+    STORE.close()
+
+app = FastAPI(title="OctoFetch - Async Pluggable Content Extractor", lifespan=lifespan, default_response_class=TimedJSONResponse)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(AdmissionMiddleware)
+
+# connector modules (and the atlassian client) are imported on first use, not at startup
+CONNECTOR_SPECS = discover_connectors()
 
 def build_config(prefix: str):
     # prefix expected like 'JIRA' or 'CONFLUENCE'
     return {
         "base_url": os.getenv(f"{prefix}_URL"),
         "token": os.getenv(f"{prefix}_TOKEN"),
-        "user": os.getenv(f"{prefix}_USER")
+        "user": os.getenv(f"{prefix}_USER"),
+        "pool_size": os.getenv(f"{prefix}_POOL_SIZE"),
+        "page_concurrency": os.getenv(f"{prefix}_PAGE_CONCURRENCY"),
+        "page_size": os.getenv(f"{prefix}_PAGE_SIZE"),
+        "max_retries": os.getenv(f"{prefix}_MAX_RETRIES"),
+        "retry_max_wait": os.getenv(f"{prefix}_RETRY_MAX_WAIT"),
+        "timezone": os.getenv(f"{prefix}_TIMEZONE")
     }
 
+def connector_config(cls) -> dict:
+    return build_config(cls.__name__.replace("Connector", "").upper())
+
+REGISTRY = LazyConnectorRegistry(CONNECTOR_SPECS, connector_config)
+
+MAX_FETCH_LIMIT = int(os.getenv("OCTOFETCH_MAX_LIMIT", 50000))
+FANOUT_TIMEOUT = float(os.getenv("OCTOFETCH_FANOUT_TIMEOUT", 30))
+BATCH_CONCURRENCY = int(os.getenv("OCTOFETCH_BATCH_CONCURRENCY", 8))
+MAX_BATCH_ENTRIES = int(os.getenv("OCTOFETCH_MAX_BATCH", 100))
+FAST_RESPONSES = os.getenv("OCTOFETCH_FAST_RESPONSES", "").lower() in ("1", "true", "yes")
+
+CACHE = ResponseCache.from_env()
+WATERMARKS = WatermarkStore.from_env()
+CURSORS = CursorSigner.from_env()
+STORE = ItemStore.from_env()
+STORE_WRITES = StoreWriter.from_env()
+
+def remember(items: List[dict]) -> None:
+    # write-through so /search can answer repeat lookups locally; queued, so no response waits on SQLite
+    if items:
+        STORE_WRITES.submit(STORE.upsert_many, items)
+
+async def store_write(fn, *args) -> None:
+    # a write that must not be dropped: wait for room in the queue, then for the write itself
+    done = await run_in_executor("store", STORE_WRITES.put, fn, *args)
+    await asyncio.wrap_future(done)
+
 @app.get("/")
 async def root():
     return {"message": "OctoFetch API is running 🚀"}
 
 @app.get("/sources")
 async def list_sources():
-    # instantiate each class with dummy config to call name()
-    names = []
-    for cls in CONNECTOR_CLASSES:
-        try:
-            inst = cls({})
-            names.append(inst.name())
-        except Exception:
-            # if instantiation fails, fallback to class name heuristic
-            names.append(cls.__name__.replace('Connector', '').lower())
-    return names
+    return REGISTRY.names()
+
+@app.exception_handler(ConnectorUnavailable)
+async def connector_unavailable(request: Request, exc: ConnectorUnavailable):
+    # listed in /sources but can't be loaded: not the caller's fault, and not a 404
+    return TimedJSONResponse({"detail": str(exc)}, status_code=503)
+
+def upstream_error(e: Exception) -> HTTPException:
+    if isinstance(e, (Throttled, CircuitOpen, Overloaded)):
+        # pass the upstream's back-off on instead of a bare 500
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    if isinstance(e, ConnectorUnavailable):
+        return HTTPException(status_code=503, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+def fetch_kwargs(source: str, q: str, limit: int, since: Optional[str] = None, fields: Optional[List[str]] = None, start: int = 0, incremental: bool = False) -> dict:
+    if source == "jira":
+        kwargs = {"jql": q or "ORDER BY created DESC", "limit": limit}
+    elif source == "confluence":
+        kwargs = {"space_key": q, "limit": limit}
+    else:
+        kwargs = {"query": q, "limit": limit}
+    if since:
+        kwargs["since"] = since
+    if fields:
+        kwargs["fields"] = fields
+    if start:
+        kwargs["start"] = start
+    if incremental:
+        kwargs["incremental"] = True
+    return kwargs
+
+def requested_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+FIELDS_QUERY = Query(None, description="Comma-separated normalized fields to return, e.g. id,title,created_at")
+BODY_FORMAT_QUERY = Query("raw", description="Convert bodies (Confluence storage XHTML, Jira wiki markup) to text or markdown")
+MAX_BODY_QUERY = Query(None, ge=0, description="Truncate each body to this many characters")
+FAST_QUERY = Query(None, description="Skip response-model validation and encode items straight to JSON bytes (default: OCTOFETCH_FAST_RESPONSES)")
+
+def respond(content: dict, fast: Optional[bool], headers: Optional[Dict[str, str]] = None):
+    # Items come out of normalize() with a fixed shape, so the fast path can
+    # bypass FastAPI's validation/re-encoding; the OpenAPI schema still comes
+    # from the route's response_model.
+    if FAST_RESPONSES if fast is None else fast:
+        return FastJSONResponse(content, headers=headers)
+    return content
+
+# what a conditional GET asks upstream for: no bodies, just enough to version the result
+VERSION_FIELDS = ["id", "updated_at"]
+
+def with_version_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    return fields + [f for f in VERSION_FIELDS if f not in fields] if fields else fields
+
+def no_cache(request: Request) -> bool:
+    return "no-cache" in request.headers.get("cache-control", "").lower()
+
+async def load_items(inst, source: str, q: Optional[str], limit: int, fields: Optional[List[str]] = None, since: Optional[str] = None, start: int = 0, incremental: bool = False) -> List[dict]:
+    # run blocking connectors on their own bounded executor so a slow
+    # upstream call never stalls the event loop; admission sheds what would only queue
+    with stage("upstream"):
+        async with inst.admission.admit():
+            raw = await call_connector(inst, "fetch", **fetch_kwargs(source, q, limit, since, fields, start, incremental))
+    with stage("normalize"):
+        items = [normalize(i) for i in raw]
+    if fields is None:
+        # only complete records go to the local store
+        remember(items)
+    return items
+
+async def cached_items(inst, source: str, q: Optional[str], limit: int, fields: Optional[List[str]] = None, bypass: bool = False, start: int = 0) -> List[dict]:
+    async def load():
+        return [project(i, fields) for i in await load_items(inst, source, q, limit, fields, start=start)]
+
+    key = CACHE.make_key(source, q, limit, fields=tuple(fields or ()), start=start)
+    try:
+        return await CACHE.get_or_load(key, load, bypass=bypass)
+    except CircuitOpen:
+        # the upstream is known to be down: old data beats an error
+        value = CACHE.last_known(key)
+        if value is None:
+            raise
+        return value
 
 class FetchResponse(BaseModel):
     items: List[dict]
+    watermark: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+class FanOutResponse(BaseModel):
+    items: List[dict]
+    sources: Dict[str, dict]
+
+@app.get("/fetch", response_model=FanOutResponse)
+async def fetch_many(
+    request: Request,
+    sources: str = Query(None, description="Comma-separated sources to query; all registered sources by default"),
+    q: str = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_FETCH_LIMIT),
+    timeout: float = Query(FANOUT_TIMEOUT, gt=0, description="Per-source timeout in seconds"),
+    fields: str = FIELDS_QUERY,
+    body_format: Literal["raw", "text", "markdown"] = BODY_FORMAT_QUERY,
+    max_body: int = MAX_BODY_QUERY,
+    fast: bool = FAST_QUERY,
+):
+    wanted = requested_fields(fields)
+    if wanted and "created_at" not in wanted:
+        raise HTTPException(status_code=400, detail="fields must include created_at to merge sources")
+    names = [s.strip() for s in sources.split(",") if s.strip()] if sources else REGISTRY.names()
+    names = list(dict.fromkeys(names))
+
+    async def one(name: str) -> List[dict]:
+        inst = REGISTRY.get(name)
+        if inst is None:
+            raise LookupError("source not found")
+        return await asyncio.wait_for(cached_items(inst, name, q, limit, wanted, bypass=no_cache(request)), timeout)
+
+    # all sources in flight at once: total latency is the slowest source, not the sum
+    results = await asyncio.gather(*(one(name) for name in names), return_exceptions=True)
+    status: Dict[str, dict] = {}
+    feeds = []
+    for name, result in zip(names, results):
+        if isinstance(result, asyncio.TimeoutError):
+            status[name] = {"status": "timeout"}
+        elif isinstance(result, LookupError):
+            status[name] = {"status": "not_found"}
+        elif isinstance(result, Throttled):
+            status[name] = {"status": "throttled", "retry_after": result.retry_after}
+        elif isinstance(result, CircuitOpen):
+            status[name] = {"status": "circuit_open", "retry_after": result.retry_after}
+        elif isinstance(result, Overloaded):
+            status[name] = {"status": "overloaded", "retry_after": result.retry_after}
+        elif isinstance(result, ConnectorUnavailable):
+            status[name] = {"status": "unavailable", "detail": str(result)}
+        elif isinstance(result, Exception):
+            status[name] = {"status": "error", "detail": str(result)}
+        else:
+            status[name] = {"status": "ok", "count": len(result)}
+            feeds.append(result)
+    with stage("normalize"):
+        items = await convert_bodies(list(islice(merge_newest_first(*feeds), limit)), body_format, max_body)
+    RESPONSE_ITEMS.observe(len(items), "/fetch", "")
+    return respond({"items": items, "sources": status}, fast)
+
+class BatchEntry(BaseModel):
+    source: str
+    q: Optional[str] = None
+    limit: int = Field(100, ge=1, le=MAX_FETCH_LIMIT)
+    fields: Optional[str] = None
+    key: Optional[str] = Field(None, description="Name for this entry in results (default: its position)")
+
+class BatchResponse(BaseModel):
+    results: Dict[str, dict]
+
+@app.post("/fetch/batch", response_model=BatchResponse)
+async def fetch_batch(
+    request: Request,
+    entries: List[BatchEntry] = Body(..., min_length=1, max_length=MAX_BATCH_ENTRIES),
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=64, description="Entries running upstream at once"),
+    fast: bool = FAST_QUERY,
+):
+    keys = [entry.key or str(index) for index, entry in enumerate(entries)]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="entry keys must be unique")
+    budget = asyncio.Semaphore(concurrency)
+
+    async def run(entry: BatchEntry, wanted: Optional[List[str]]) -> List[dict]:
+        inst = REGISTRY.get(entry.source)
+        if inst is None:
+            raise HTTPException(status_code=404, detail="source not found")
+        async with budget:
+            return await cached_items(inst, entry.source, entry.q, entry.limit, wanted, bypass=no_cache(request))
+
+    results: Dict[str, dict] = {}
+    runs: Dict[tuple, asyncio.Future] = {}
+    pending = []
+    for key, entry in zip(keys, entries):
+        try:
+            wanted = parse_fields(entry.fields)
+        except ValueError as e:
+            results[key] = {"status": "error", "status_code": 400, "detail": str(e)}
+            continue
+        # identical entries in one batch run once and share the result
+        run_key = CACHE.make_key(entry.source, entry.q, entry.limit, fields=tuple(wanted or ()))
+        if run_key not in runs:
+            runs[run_key] = asyncio.ensure_future(run(entry, wanted))
+        pending.append((key, entry.source, runs[run_key]))
+    await asyncio.gather(*runs.values(), return_exceptions=True)
+
+    for key, source, task in pending:
+        error = task.exception()
+        if error is None:
+            results[key] = {"status": "ok", "items": task.result()}
+            RESPONSE_ITEMS.observe(len(task.result()), "/fetch/batch", source)
+            continue
+        if not isinstance(error, HTTPException):
+            error = upstream_error(error)
+        results[key] = {"status": "error", "status_code": error.status_code, "detail": error.detail}
+    return respond({"results": {key: results[key] for key in keys}}, fast)
 
 @app.get("/fetch/{source}", response_model=FetchResponse)
-async def fetch_source(source: str, q: str = Query(None), limit: int = Query(100, le=1000)):
-    for cls in CONNECTOR_CLASSES:
-        # Use the connector's name() method to get the correct prefix for env vars
-        inst = cls(build_config(cls.__name__.split(".")[-1].upper()))
-        if inst.name() == source:
-            try:
-                if source == "jira":
-                    items =  inst.fetch(jql=q or "ORDER BY created DESC", limit=limit)
-                 
-                elif source == "confluence":
-                    items =  inst.fetch(space_key=q, limit=limit)
-                else:
-                    items =  inst.fetch(query=q, limit=limit)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
-            return {"items": [normalize(i) for i in items]}
-    raise HTTPException(status_code=404, detail="source not found")
+async def fetch_source(
+    request: Request,
+    response: Response,
+    source: str,
+    q: str = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_FETCH_LIMIT),
+    incremental: bool = Query(False, description="Only return items changed since the last incremental call for this query"),
+    since: str = Query(None, description="Override the stored watermark (ISO 8601) for an incremental call"),
+    fields: str = FIELDS_QUERY,
+    body_format: Literal["raw", "text", "markdown"] = BODY_FORMAT_QUERY,
+    max_body: int = MAX_BODY_QUERY,
+    fast: bool = FAST_QUERY,
+    cursor: str = Query(None, description="next_cursor from the previous page of this query"),
+):
+    inst = REGISTRY.get(source)
+    if inst is None:
+        raise HTTPException(status_code=404, detail="source not found")
+    wanted = requested_fields(fields)
+    start = 0
+    if cursor:
+        if incremental:
+            raise HTTPException(status_code=400, detail="cursor can't be combined with incremental")
+        try:
+            start = CURSORS.decode(cursor, source, q)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if since:
+        try:
+            parse_time(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be an ISO 8601 timestamp")
+
+    try:
+        if incremental:
+            # the watermark needs updated_at even when the caller didn't ask for it
+            upstream_fields = wanted + ["updated_at"] if wanted and "updated_at" not in wanted else wanted
+            if upstream_fields and "id" not in upstream_fields:
+                upstream_fields = upstream_fields + ["id"]
+            # ascending update order: the watermark moves to the last change returned, never past one cut off by limit
+            mark, seen = (since, 0) if since else WATERMARKS.resume(source, q)
+            # the bound only resolves minutes: fetch past the rows of the mark's minute already returned, then drop them
+            items = await load_items(inst, source, q, limit + seen, upstream_fields, mark, incremental=True)
+            if not since:
+                items = WATERMARKS.unseen(source, q, items)
+            items = items[:limit]
+            watermark = WATERMARKS.advance(source, q, items)
+            with stage("normalize"):
+                items = await convert_bodies([project(i, wanted) for i in items], body_format, max_body)
+            RESPONSE_ITEMS.observe(len(items), "/fetch/{source}", source)
+            return respond({"items": items, "watermark": watermark}, fast)
+        # everything that changes the response bytes besides the items themselves
+        variant = dict(source=source, fields=wanted, body_format=body_format, max_body=max_body, start=start, limit=limit, fast=fast)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            # cheap revalidation: ids and update times only, no bodies
+            versions = await cached_items(inst, source, q, limit, VERSION_FIELDS, bypass=no_cache(request), start=start)
+            tag = etag(versions, **variant)
+            if etag_matches(if_none_match, tag):
+                return Response(status_code=304, headers={"ETag": tag})
+        items = await cached_items(inst, source, q, limit, with_version_fields(wanted), bypass=no_cache(request), start=start)
+        tag = etag(items, **variant)
+        with stage("normalize"):
+            items = await convert_bodies([project(i, wanted) for i in items], body_format, max_body)
+    except Exception as e:
+        raise upstream_error(e)
+    RESPONSE_ITEMS.observe(len(items), "/fetch/{source}", source)
+    # a full page means there may be more; the cursor resumes at the next upstream offset
+    next_cursor = CURSORS.encode(start + len(items), source, q) if len(items) == limit else None
+    response.headers["ETag"] = tag
+    return respond({"items": items, "next_cursor": next_cursor}, fast, headers={"ETag": tag})
+
+@app.get("/fetch/{source}/stream")
+async def stream_source(
+    source: str,
+    q: str = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_FETCH_LIMIT),
+    fields: str = FIELDS_QUERY,
+    body_format: Literal["raw", "text", "markdown"] = BODY_FORMAT_QUERY,
+    max_body: int = MAX_BODY_QUERY,
+):
+    inst = REGISTRY.get(source)
+    if inst is None:
+        raise HTTPException(status_code=404, detail="source not found")
+    wanted = requested_fields(fields)
+    # The stream holds an admission slot until its last page is sent; the
+    # generator's finally and the background task both release it, whichever runs.
+    slot = AsyncExitStack()
+    # Wait for the first page before committing to a 200 so upstream
+    # failures still surface as a proper error status.
+    try:
+        await slot.enter_async_context(inst.admission.admit())
+        pages = normalize_pages(inst.stream(**fetch_kwargs(source, q, limit, fields=wanted)), wanted)
+        first = await pages.__anext__()
+    except StopAsyncIteration:
+        first = []
+    except Exception as e:
+        await slot.aclose()
+        raise upstream_error(e)
+
+    async def lines(page: List[dict]) -> bytes:
+        if wanted is None:
+            remember(page)
+        return b"".join(dumps(i) + b"\n" for i in await convert_bodies(page, body_format, max_body))
+
+    async def ndjson():
+        try:
+            yield await lines(first)
+            async for page in pages:
+                yield await lines(page)
+        except Exception as e:
+            # headers are already out; report the failure in-band
+            yield dumps({"error": str(e)}) + b"\n"
+        finally:
+            await slot.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", background=BackgroundTask(slot.aclose))
+
+def export_kwargs(source: str, query: Optional[str]) -> dict:
+    # A JQL/CQL query, always oldest-first: jobs resume by offset, so the order
+    # must not move under them, and new items then land after the checkpoint.
+    if source == "jira":
+        return {"jql": order_by(query or "", "created ASC, key ASC")}
+    if source == "confluence":
+        if not (query or "").strip():
+            # the connector's fallback query is a personal, last-modified-first one
+            raise ValueError("confluence exports need a CQL query")
+        return {"cql": order_by(query, "created ASC")}
+    return {"query": query}
+
+async def export_pages(job: dict) -> AsyncIterator[List[dict]]:
+    inst = REGISTRY.get(job["source"])
+    if inst is None:
+        raise LookupError("source not found")
+    if job["page_concurrency"]:
+        inst = type(inst)({**inst.config, "page_concurrency": job["page_concurrency"]})
+    kwargs = export_kwargs(job["source"], job["query"])
+    kwargs["limit"] = job["limit"] - job["cursor"] if job["limit"] else MAX_EXPORT_ITEMS
+    if job["fields"]:
+        kwargs["fields"] = job["fields"]
+    if job["cursor"]:
+        kwargs["start"] = job["cursor"]
+    async for page in inst.stream(**kwargs):
+        yield await convert_bodies([normalize(i, job["fields"]) for i in page], job["body_format"])
+
+MAX_EXPORT_ITEMS = int(os.getenv("OCTOFETCH_EXPORT_MAX_ITEMS", 10_000_000))
+EXPORTS = ExportManager.from_env(export_pages)
+
+class ExportRequest(BaseModel):
+    source: str
+    query: Optional[str] = Field(None, description="JQL for Jira, CQL for Confluence")
+    fields: Optional[str] = Field(None, description="Comma-separated normalized fields to export")
+    body_format: Literal["raw", "text", "markdown"] = "raw"
+    compression: Optional[Literal["zstd", "gzip"]] = Field(None, description="zstd when installed, otherwise gzip")
+    page_concurrency: Optional[int] = Field(None, ge=1, le=64, description="Upstream pages in flight (default: <SOURCE>_PAGE_CONCURRENCY)")
+    limit: Optional[int] = Field(None, ge=1, description="Stop after this many items")
+
+@app.post("/exports", status_code=202)
+async def create_export(request: ExportRequest):
+    if request.source not in REGISTRY:
+        raise HTTPException(status_code=404, detail="source not found")
+    wanted = requested_fields(request.fields)
+    try:
+        export_kwargs(request.source, request.query)
+        return EXPORTS.create(request.source, request.query, wanted, request.body_format,
+                              request.compression, request.page_concurrency, request.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/exports/{job_id}")
+async def get_export(job_id: str):
+    job = EXPORTS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="export not found")
+    return job
+
+async def apply_source_changes(source: str, changes: list) -> list:
+    inst = REGISTRY.get(source)
+    removed = [item_id for action, item_id, _, _ in changes if action == DELETE]
+    upserts = [change for change in changes if change[0] != DELETE]
+    results = await run_in_executor(source, inst.changed_items, [obj for _, _, obj, _ in upserts]) if upserts else []
+    items, retry = [], []
+    for change, result in zip(upserts, results):
+        if result is None:
+            # gone or hidden upstream since the event
+            removed.append(change[1])
+        elif isinstance(result, Exception):
+            retry.append(change)
+        else:
+            items.append(normalize(result))
+    # through the same queue as fetched items, so an older queued copy can't land after this
+    if items:
+        await store_write(STORE.upsert_many, items)
+    if removed:
+        await store_write(STORE.delete_many, [(source, item_id) for item_id in removed])
+    CACHE.patch(source, {i["id"]: i for i in items}, removed)
+    if any(created for _, _, _, created in changes):
+        # a new item may belong to any cached query for this source
+        CACHE.invalidate_source(source)
+    return retry
+
+async def apply_changes(batch) -> list:
+    """Apply queued webhook changes; returns the ones CHANGES should retry."""
+    by_source: Dict[str, list] = {}
+    for source, change in batch:
+        by_source.setdefault(source, []).append(change)
+    failed = []
+    for source, changes in by_source.items():
+        # one source failing must not hold back the others
+        try:
+            failed.extend((source, change) for change in await apply_source_changes(source, changes))
+        except Exception:
+            log.exception("applying %d %s webhook changes failed", len(changes), source)
+            failed.extend((source, change) for change in changes)
+    return failed
+
+WEBHOOK_SECRET = os.getenv("OCTOFETCH_WEBHOOK_SECRET")
+CHANGES = ChangeQueue.from_env(apply_changes)
+
+@app.post("/webhooks/{source}", status_code=202)
+async def receive_webhook(source: str, request: Request):
+    parse = PARSERS.get(source)
+    if parse is None or source not in REGISTRY:
+        raise HTTPException(status_code=404, detail="source not found")
+    if not WEBHOOK_SECRET:
+        # events go straight into the store and cache, so unsigned ones aren't accepted at all
+        raise HTTPException(status_code=503, detail="webhooks are disabled until OCTOFETCH_WEBHOOK_SECRET is set")
+    body = await request.body()
+    if not verify_signature(WEBHOOK_SECRET, body, request.headers.get("x-hub-signature")):
+        raise HTTPException(status_code=401, detail="invalid signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="invalid JSON payload")
+    change = parse(payload)
+    if change is None:
+        # an event we don't track (comments, attachments, ...)
+        return {"accepted": False}
+    if not CHANGES.put(source, change):
+        raise HTTPException(status_code=503, detail="webhook queue is full", headers={"Retry-After": "1"})
+    return {"accepted": True}
+
+@app.get("/webhooks/stats")
+async def webhook_stats():
+    return CHANGES.stats()
+
+@app.get("/search", response_model=FetchResponse)
+async def search_items(
+    q: str = Query(None, description="Keywords matched against title, body and tags"),
+    tags: str = Query(None, description="Comma-separated tags; items must carry all of them"),
+    source: str = Query(None),
+    since: str = Query(None, description="Earliest created_at (ISO 8601)"),
+    until: str = Query(None, description="Latest created_at (ISO 8601)"),
+    limit: int = Query(100, ge=1, le=1000),
+    fast: bool = FAST_QUERY,
+):
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else None
+    try:
+        items = await run_in_executor("store", STORE.search, q=q, tags=tag_list, source=source, since=since, until=until, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since and until must be ISO 8601 timestamps")
+    RESPONSE_ITEMS.observe(len(items), "/search", source or "")
+    return respond({"items": items}, fast)
+
+@app.get("/search/stats")
+async def search_stats():
+    return STORE_WRITES.stats()
+
+USER_DIRECTORY_SIZE = int(os.getenv("OCTOFETCH_USER_DIRECTORY_SIZE", 50000))
+USER_REFRESH = float(os.getenv("OCTOFETCH_USER_REFRESH", 600))
+USER_DIRECTORIES: Dict[str, UserDirectory] = {}
+
+def user_directory(source: str, inst) -> UserDirectory:
+    directory = USER_DIRECTORIES.get(source)
+    if directory is None:
+        loader = lambda: run_in_executor(source, inst.list_users, USER_DIRECTORY_SIZE)
+        directory = USER_DIRECTORIES[source] = UserDirectory(loader, USER_DIRECTORY_SIZE, USER_REFRESH)
+    # (re)starts the background load/refresh loop if it isn't running
+    directory.start()
+    return directory
 
 @app.get("/users/{source}")
-async def get_users(source: str, q: str = Query("")):
-    for cls in CONNECTOR_CLASSES:
-        inst = cls(build_config(cls.__name__.split(".")[-1].upper()))
-        if inst.name() == source:
-            try:
-                if source == "jira":
-                    return await inst.get_all_users(query=q)
-                else:
-                    raise HTTPException(status_code=400, detail=f"Getting users not supported for {source}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
-    raise HTTPException(status_code=404, detail="source not found")
+async def get_users(source: str, q: str = Query(""), limit: int = Query(20, ge=1, le=1000)):
+    inst = REGISTRY.get(source)
+    if inst is None:
+        raise HTTPException(status_code=404, detail="source not found")
+    try:
+        if source == "jira":
+            directory = user_directory(source, inst)
+            if directory.loaded:
+                found = directory.search(q, limit)
+                if found:
+                    return found
+            # not loaded yet, or a user the directory doesn't hold (new account, over the size cap)
+            return await inst.get_all_users(query=q)
+        else:
+            raise HTTPException(status_code=400, detail=f"Getting users not supported for {source}")
+    except Exception as e:
+        raise upstream_error(e)
+
+@app.get("/users/{source}/stats")
+async def user_directory_stats(source: str):
+    directory = USER_DIRECTORIES.get(source)
+    if directory is None:
+        raise HTTPException(status_code=404, detail="no user directory for this source")
+    return directory.stats()
+
+MAX_ASSIGNEES = int(os.getenv("OCTOFETCH_MAX_ASSIGNEES", 500))
+
+class AssignedRequest(BaseModel):
+    assignees: List[str] = Field(..., min_length=1, max_length=MAX_ASSIGNEES, description="accountIds, usernames or emails")
+    limit: int = Field(50, ge=1, le=1000, description="Issues per assignee")
+    fields: Optional[str] = None
+
+class AssignedResponse(BaseModel):
+    assignees: Dict[str, List[dict]]
+
+@app.post("/assigned/{source}", response_model=AssignedResponse)
+async def fetch_assigned(request: Request, source: str, body: AssignedRequest, fast: bool = FAST_QUERY):
+    inst = REGISTRY.get(source)
+    if inst is None:
+        raise HTTPException(status_code=404, detail="source not found")
+    if not hasattr(inst, "fetch_assigned_many"):
+        raise HTTPException(status_code=400, detail=f"Assigned issues not supported for {source}")
+    wanted = requested_fields(body.fields)
+    assignees = list(dict.fromkeys(a.strip() for a in body.assignees if a.strip()))
+
+    async def load():
+        with stage("upstream"):
+            async with inst.admission.admit():
+                found = await call_connector(inst, "fetch_assigned_many", assignees=assignees, limit=body.limit, fields=wanted)
+        with stage("normalize"):
+            found = {a: [normalize(i) for i in items] for a, items in found.items()}
+        if wanted is None:
+            remember([i for items in found.values() for i in items])
+        return {a: [project(i, wanted) for i in items] for a, items in found.items()}
+
+    key = CACHE.make_key(source, None, body.limit, assignees=tuple(sorted(assignees)), fields=tuple(wanted or ()))
+    try:
+        found = await CACHE.get_or_load(key, load, bypass=no_cache(request))
+    except Exception as e:
+        raise upstream_error(e)
+    RESPONSE_ITEMS.observe(sum(len(items) for items in found.values()), "/assigned/{source}", source)
+    return respond({"assignees": found}, fast)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return CACHE.stats()
 
 if __name__ == "__main__":
     input("\nDebug pause: Press Enter to exit...")
@@ -8,6 +8,27 @@ def client():
     """Create a test client for the FastAPI application."""
     return TestClient(app)
 
+@pytest.fixture(autouse=True)
+def reset_cache():
+    """Give every test a fresh, empty response cache and no user directories."""
+    from core.cache import ResponseCache
+    # user directories hold a background task bound to the test's event loop
+    with patch('main.CACHE', ResponseCache.from_env()), patch('main.USER_DIRECTORIES', {}):
+        yield
+
+@pytest.fixture(autouse=True)
+def reset_upstream_state():
+    """Breakers, limiters, latency windows and admission queues are process-wide; start every test fresh."""
+    from core.admission import reset_admission
+    from core.breaker import reset_breakers
+    from core.hedge import reset_windows
+    from core.ratelimit import reset_limiters
+    for reset in (reset_admission, reset_breakers, reset_limiters, reset_windows):
+        reset()
+    yield
+    for reset in (reset_admission, reset_breakers, reset_limiters, reset_windows):
+        reset()
+
 @pytest.fixture
 def mock_jira_connector():
     """Mock the JiraConnector class for testing."""
@@ -0,0 +1,159 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from core.admission import CLIENT, DEADLINE, AdmissionController, Overloaded, client_identity
+from core.metrics import ADMISSION_SHED
+from core.registry import ConnectorRegistry
+
+async def hold(controller, client, order, release):
+    CLIENT.set(client)
+    async with controller.admit():
+        order.append(client)
+        await release.wait()
+
+@pytest.mark.asyncio
+async def test_sheds_when_queue_full():
+    """Test requests beyond in-flight plus queue capacity are rejected at once."""
+    controller = AdmissionController("test", max_inflight=1, max_queue=1)
+    release = asyncio.Event()
+    order = []
+    tasks = [asyncio.ensure_future(hold(controller, c, order, release)) for c in ("a", "b")]
+    await asyncio.sleep(0)
+    assert (controller.inflight, controller.queued) == (1, 1)
+
+    before = ADMISSION_SHED.value("test", "queue_full")
+    with pytest.raises(Overloaded) as excinfo:
+        await controller.acquire()
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after >= 1
+    assert ADMISSION_SHED.value("test", "queue_full") == before + 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["a", "b"]
+    assert (controller.inflight, controller.queued) == (0, 0)
+
+@pytest.mark.asyncio
+async def test_slots_rotate_between_clients():
+    """Test a client with many queued requests can't starve one that queued later."""
+    controller = AdmissionController("test", max_inflight=1, max_queue=10)
+    order = []
+    releases = {}
+
+    async def one(client, name):
+        CLIENT.set(client)
+        async with controller.admit():
+            order.append(name)
+            releases[name] = asyncio.Event()
+            await releases[name].wait()
+
+    tasks = [asyncio.ensure_future(one("batch", f"batch{n}")) for n in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(one("user", "user0")))
+    await asyncio.sleep(0)
+    for _ in range(4):
+        releases[order[-1]].set()
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    assert order == ["batch0", "batch1", "user0", "batch2"]
+
+@pytest.mark.asyncio
+async def test_queued_request_times_out_at_its_deadline():
+    """Test a waiter past its deadline is shed and leaves the queue."""
+    controller = AdmissionController("test", max_inflight=1, max_queue=10, queue_timeout=0.05)
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(hold(controller, "a", [], release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as excinfo:
+        await controller.acquire()
+    assert excinfo.value.reason == "timeout"
+    assert controller.queued == 0
+
+    release.set()
+    await holder
+    assert controller.inflight == 0
+
+@pytest.mark.asyncio
+async def test_rejects_up_front_when_expected_wait_misses_deadline():
+    """Test a request whose expected queueing time exceeds its deadline isn't queued at all."""
+    controller = AdmissionController("test", max_inflight=1, max_queue=10)
+    controller.service_time = 5.0
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(hold(controller, "a", [], release))
+    await asyncio.sleep(0)
+
+    DEADLINE.set(time.monotonic() + 1.0)
+    with pytest.raises(Overloaded) as excinfo:
+        await controller.acquire()
+    assert excinfo.value.reason == "deadline"
+    assert excinfo.value.retry_after == 5.0
+    assert controller.queued == 0
+
+    release.set()
+    await holder
+
+def test_client_identity_prefers_api_key():
+    """Test clients are keyed by API key, else by peer address, with an optional timeout header."""
+    scope = {"headers": [(b"x-api-key", b"k1"), (b"x-request-timeout", b"2")], "client": ("10.0.0.1", 1234)}
+    client, deadline = client_identity(scope)
+    assert client == "key:k1"
+    assert deadline is not None
+
+    client, deadline = client_identity({"headers": [(b"x-request-timeout", b"soon")], "client": ("10.0.0.1", 1234)})
+    assert (client, deadline) == ("ip:10.0.0.1", None)
+
+def test_fetch_sheds_with_retry_after(client):
+    """Test /fetch/{source} answers 503 with Retry-After when the source's queue is full."""
+    controller = AdmissionController("jira", max_inflight=1, max_queue=0)
+    controller.inflight = 1
+    mock_jira = MagicMock()
+    mock_jira.name.return_value = "jira"
+    mock_jira.admission = controller
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira])):
+        response = client.get("/fetch/jira?q=test")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
+    mock_jira.fetch.assert_not_called()
+
+def test_stream_holds_a_slot_until_done(client):
+    """Test /fetch/{source}/stream is admitted like /fetch and frees its slot once the stream ends."""
+    controller = AdmissionController("jira", max_inflight=1, max_queue=0)
+    mock_jira = MagicMock()
+    mock_jira.name.return_value = "jira"
+    mock_jira.admission = controller
+
+    async def stream(**kwargs):
+        assert controller.inflight == 1
+        yield [{"source": "jira", "id": "X-1"}]
+        yield [{"source": "jira", "id": "X-2"}]
+    mock_jira.stream.side_effect = stream
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira])):
+        response = client.get("/fetch/jira/stream?fields=id")
+        assert response.status_code == 200
+        assert response.text.splitlines() == ['{"id":"X-1"}', '{"id":"X-2"}']
+        assert controller.inflight == 0
+
+        controller.inflight = 1
+        shed = client.get("/fetch/jira/stream")
+    assert shed.status_code == 503
+    assert "Retry-After" in shed.headers
+
+def test_connector_cap_follows_its_executor():
+    """Test a connector's default in-flight cap is its executor's worker count, not its HTTP pool size."""
+    import os
+    from connectors.base_connector import BaseConnector
+
+    class Plain(BaseConnector):
+        def name(self):
+            return "plain"
+
+        def fetch(self, **kwargs):
+            return []
+
+    with patch.dict(os.environ, {"PLAIN_MAX_WORKERS": "3", "PLAIN_POOL_SIZE": "16"}):
+        assert Plain({}).admission.max_inflight == 3
@@ -0,0 +1,95 @@
+import os
+import pytest
+from unittest.mock import patch
+from core.bodies import storage_to_markdown, storage_to_text, wiki_to_markdown, wiki_to_text
+from core.normalizer import BODY_CACHE, convert_bodies
+from core.registry import ConnectorRegistry
+
+STORAGE = (
+    '<h2>Setup</h2><p>Run <strong>make</strong> &amp; see <a href="https://example.com">docs</a></p>'
+    '<ul><li>one</li><li>two</li></ul>'
+    '<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">bash</ac:parameter>'
+    '<ac:plain-text-body><![CDATA[make build]]></ac:plain-text-body></ac:structured-macro>'
+)
+WIKI = "h2. Setup\nRun *make* and see [docs|https://example.com]\n* one\n# two\n{code:bash}\nmake build\n{code}"
+
+@pytest.fixture(autouse=True)
+def clear_body_cache():
+    """Start every test with an empty conversion cache."""
+    BODY_CACHE.clear()
+
+def test_storage_to_text():
+    """Test Confluence storage XHTML is flattened to plain text without macro parameters."""
+    assert storage_to_text(STORAGE) == "Setup\nRun make & see docs\n- one\n- two\nmake build"
+
+def test_storage_to_markdown():
+    """Test Confluence storage XHTML is converted to markdown."""
+    assert storage_to_markdown(STORAGE) == \
+        "## Setup\nRun **make** & see [docs](https://example.com)\n- one\n- two\n```\nmake build\n```"
+
+def test_storage_tables_keep_cells_apart():
+    """Test table cells are separated like the Jira wiki path, with cell paragraphs kept on the row."""
+    table = (
+        "<table><tbody><tr><th>a</th><th>b</th></tr>"
+        "<tr><td><p>1</p></td><td><p>2</p><p>3</p></td></tr></tbody></table>"
+    )
+    assert storage_to_text(table) == "a | b\n1 | 2 3"
+    assert storage_to_markdown(table) == wiki_to_markdown("||a||b||\n|1|2 3|")
+
+def test_wiki_to_text_and_markdown():
+    """Test Jira wiki markup is converted to plain text and markdown."""
+    assert wiki_to_text(WIKI) == "Setup\nRun make and see docs\n- one\n- two\nmake build"
+    assert wiki_to_markdown(WIKI) == \
+        "## Setup\nRun **make** and see [docs](https://example.com)\n- one\n1. two\n```bash\nmake build\n```"
+
+@pytest.mark.asyncio
+async def test_convert_bodies_in_process_pool():
+    """Test the conversion stage converts per source, caps bodies and leaves inputs untouched."""
+    items = [
+        {"source": "confluence", "id": "1", "body": STORAGE},
+        {"source": "jira", "id": "2", "body": WIKI},
+        {"source": "jira", "id": "3", "body": WIKI},
+        {"source": "jira", "id": "4", "body": ""},
+    ]
+    with patch.dict(os.environ, {"OCTOFETCH_BODY_WORKERS": "2"}):
+        converted = await convert_bodies(items, "text", max_body=5)
+
+    assert [i["body"] for i in converted] == ["Setup", "Setup", "Setup", ""]
+    assert items[0]["body"] == STORAGE
+    assert await convert_bodies(items, "raw") is items
+
+def test_pool_does_not_fork():
+    """Test body workers start via forkserver/spawn, never fork from the threaded server."""
+    from core.bodies import get_pool, shutdown_pool
+
+    shutdown_pool()
+    try:
+        assert get_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        shutdown_pool()
+
+@pytest.mark.asyncio
+async def test_convert_bodies_uses_content_cache():
+    """Test identical bodies are converted once and then served from the hash cache."""
+    items = [{"source": "jira", "id": "1", "body": WIKI}]
+    with patch.dict(os.environ, {"OCTOFETCH_BODY_WORKERS": "0"}), \
+         patch("core.normalizer.convert_batch", wraps=__import__("core.bodies").bodies.convert_batch) as batch:
+        await convert_bodies(items, "markdown")
+        again = await convert_bodies(items, "markdown")
+
+    assert batch.call_count == 1
+    assert again[0]["body"].startswith("## Setup")
+
+def test_fetch_body_format(client, mock_jira_connector):
+    """Test body_format=text converts bodies in the /fetch response."""
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "TEST-1", "body": "h1. Title\n*bold*"}]
+
+    with patch.dict(os.environ, {"OCTOFETCH_BODY_WORKERS": "0"}), \
+         patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        response = client.get("/fetch/jira?q=test&body_format=text")
+        raw = client.get("/fetch/jira?q=test")
+        bad = client.get("/fetch/jira?q=test&body_format=html")
+
+    assert response.json()["items"][0]["body"] == "Title\nbold"
+    assert raw.json()["items"][0]["body"] == "h1. Title\n*bold*"
+    assert bad.status_code == 422
@@ -0,0 +1,134 @@
+import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+from requests import HTTPError, Response
+from core.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from core.hedge import LatencyWindow, hedged
+from core.registry import ConnectorRegistry
+
+def http_error(status):
+    response = Response()
+    response.status_code = status
+    return HTTPError(str(status), response=response)
+
+def fail(exc):
+    def fn():
+        raise exc
+    return fn
+
+def test_breaker_opens_on_errors_and_recovers():
+    """Test closed -> open on errors, fail fast while open, half-open probes close it again."""
+    breaker = CircuitBreaker("test", min_calls=4, open_seconds=0.05, probes=2)
+    for _ in range(4):
+        with pytest.raises(HTTPError):
+            breaker.call(fail(http_error(502)))
+    assert breaker.state == OPEN
+
+    fn = MagicMock(return_value="ok")
+    with pytest.raises(CircuitOpen):
+        breaker.call(fn)
+    fn.assert_not_called()
+
+    time.sleep(0.06)
+    assert breaker.call(fn) == "ok"
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(fn) == "ok"
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens():
+    """Test a failing half-open probe opens the breaker again."""
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0.01)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail(ConnectionError()))
+    time.sleep(0.02)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail(ConnectionError()))
+    assert breaker.state == OPEN
+
+def test_client_errors_and_slow_calls():
+    """Test 4xx responses don't count as failures but slow calls do trip the breaker."""
+    breaker = CircuitBreaker("test", min_calls=3)
+    for _ in range(5):
+        with pytest.raises(HTTPError):
+            breaker.call(fail(http_error(400)))
+    assert breaker.state == CLOSED
+
+    slow = CircuitBreaker("test", min_calls=3, slow_seconds=0.01, slow_rate=0.5)
+    for _ in range(3):
+        slow.call(lambda: time.sleep(0.02))
+    assert slow.state == OPEN
+
+def warmed(latency=0.01, calls=100):
+    window = LatencyWindow("test", "jql")
+    for _ in range(calls):
+        window.note_call()
+        window.record(latency)
+    return window
+
+def test_hedge_wins_against_slow_primary():
+    """Test a call slower than p95 gets a backup and the faster answer is returned."""
+    delays = iter([0.5, 0.0])
+    fn = MagicMock(side_effect=lambda: (time.sleep(next(delays)), "done")[1])
+    with ThreadPoolExecutor(4) as executor:
+        started = time.monotonic()
+        assert hedged(fn, warmed(), executor) == "done"
+        assert time.monotonic() - started < 0.4
+    assert fn.call_count == 2
+
+def test_no_hedge_without_history_or_budget():
+    """Test hedging waits for enough samples and stays within its budget."""
+    fn = MagicMock(side_effect=lambda: time.sleep(0.1) or "done")
+    with ThreadPoolExecutor(4) as executor:
+        assert hedged(fn, LatencyWindow(), executor) == "done"
+        assert fn.call_count == 1
+
+        window = warmed(calls=0)
+        window.calls = 5
+        assert hedged(fn, window, executor) == "done"
+        assert fn.call_count == 2
+
+def test_open_breaker_serves_cached_items(client):
+    """Test an open circuit serves the last cached response, or fails fast with 503."""
+    import main
+    from connectors.jira_connector import JiraConnector
+
+    connector = JiraConnector({})
+    jira = MagicMock()
+    jira.jql.return_value = {"issues": [{"key": "TEST-1", "fields": {"summary": "cached"}}], "total": 1}
+    with patch.object(JiraConnector, "_get_client", return_value=jira), \
+         patch('main.REGISTRY', ConnectorRegistry([lambda _: connector])), \
+         patch.object(main.CACHE, "ttl", 0.01):
+        assert client.get("/fetch/jira?q=x").status_code == 200
+        connector.breaker._trip()
+        time.sleep(0.02)
+        response = client.get("/fetch/jira?q=x")
+        assert response.status_code == 200
+        assert response.json()["items"][0]["title"] == "cached"
+
+        response = client.get("/fetch/jira?q=other")
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+    assert jira.jql.call_count == 1
+
+def test_connector_hedges_slow_search():
+    """Test JiraConnector sends a backup jql search when one call stalls."""
+    from connectors.jira_connector import JiraConnector
+
+    connector = JiraConnector({"hedge": "1"})
+    calls = []
+
+    def jql(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.5 if len(calls) == 30 else 0)
+        return {"issues": [{"key": "TEST-1"}], "total": 1}
+
+    jira = MagicMock()
+    jira.jql.side_effect = jql
+    with patch.object(JiraConnector, "_get_client", return_value=jira):
+        for _ in range(29):
+            connector.fetch(jql="project = X", limit=1)
+        started = time.monotonic()
+        assert connector.fetch(jql="project = X", limit=1)[0]["id"] == "TEST-1"
+    assert time.monotonic() - started < 0.4
+    assert len(calls) == 31
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock
+from core.cache import ResponseCache
+from core.registry import ConnectorRegistry
+
+def test_make_key_normalizes_query():
+    """Test whitespace-only differences in the query share a cache key."""
+    assert ResponseCache.make_key("jira", "project = X  ORDER BY created", 10) == \
+        ResponseCache.make_key("jira", " project = X ORDER BY created ", 10)
+    assert ResponseCache.make_key("jira", "project = X", 10) != ResponseCache.make_key("jira", "project = X", 20)
+
+def test_lru_eviction_by_entries_and_bytes():
+    """Test least recently used entries are evicted past either bound."""
+    cache = ResponseCache(ttl=60, max_entries=2, max_bytes=100)
+    cache.set("a", ["x" * 10])
+    cache.set("b", ["x" * 10])
+    cache.get("a")
+    cache.set("c", ["x" * 10])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    cache.set("big", ["x" * 95])
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 100
+
+    cache.set("too-big", ["x" * 500])
+    assert cache.get("too-big") is None
+
+def test_ttl_expiry():
+    """Test entries stop being served once their TTL has passed."""
+    cache = ResponseCache(ttl=10)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", [1])
+    with patch("core.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == [1]
+    with patch("core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced():
+    """Test identical concurrent misses trigger a single upstream load."""
+    cache = ResponseCache(ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [{"id": "1"}]
+
+    results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(10)))
+
+    assert calls == 1
+    assert all(r == [{"id": "1"}] for r in results)
+    assert cache.stats()["coalesced"] == 9
+    assert await cache.get_or_load("k", loader) == [{"id": "1"}]
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    """Test stale entries are served immediately while a refresh runs."""
+    cache = ResponseCache(ttl=10, stale_ttl=60)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        cache.set("k", ["old"])
+
+    async def loader():
+        return ["new"]
+
+    with patch("core.cache.time.monotonic", return_value=120.0):
+        assert await cache.get_or_load("k", loader) == ["old"]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert cache.get("k") == ["new"]
+    assert cache.stats()["stale_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached():
+    """Test an upstream error propagates and leaves nothing behind."""
+    cache = ResponseCache(ttl=60)
+
+    async def loader():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", loader)
+    assert cache.get("k") is None
+    assert cache.stats()["inflight"] == 0
+
+def test_fetch_endpoint_uses_cache(client, mock_jira_connector):
+    """Test repeated /fetch calls hit the cache unless Cache-Control: no-cache is sent."""
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "TEST-1"}]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        assert client.get("/fetch/jira?q=project = X").status_code == 200
+        assert client.get("/fetch/jira?q=project  =  X").status_code == 200
+        assert mock_jira_connector.fetch.call_count == 1
+
+        client.get("/fetch/jira?q=project = X", headers={"Cache-Control": "no-cache"})
+        assert mock_jira_connector.fetch.call_count == 2
+
+        stats = client.get("/cache/stats").json()
+        assert stats["hits"] == 1
+        assert stats["entries"] == 1
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 from connectors.confluence_connector import ConfluenceConnector
 import os
 
@@ -34,9 +34,22 @@ def test_get_client(confluence_connector):
             url="https://test-confluence.example.com",
             username="test_user",
             password="test_token",
-            verify_ssl=False
+            verify_ssl=False,
+            session=ANY
         )
 
+def test_get_client_reuses_and_rotates(confluence_connector):
+    """Test the client is built once and rebuilt only when credentials change."""
+    with patch('connectors.confluence_connector.Confluence') as mock_confluence:
+        first = confluence_connector._get_client()
+        assert confluence_connector._get_client() is first
+        assert mock_confluence.call_count == 1
+
+        with patch.dict(os.environ, {"CONFLUENCE_TOKEN": "rotated_token"}):
+            confluence_connector._get_client()
+        assert mock_confluence.call_count == 2
+        assert mock_confluence.call_args.kwargs["password"] == "rotated_token"
+
 def test_fetch(confluence_connector, mock_confluence_client):
     """Test the fetch method returns normalized pages."""
     # Mock the cql method to return test data
@@ -69,6 +82,106 @@ def test_fetch(confluence_connector, mock_confluence_client):
     assert results[0]["created_at"] == "2023-01-01T00:00:00.000Z"
     
     # Verify the mock was called with the right parameters
-    # Note: The current implementation uses a hardcoded CQL query
-    mock_confluence_client.cql.assert_called_once_with('creator = "Rick.Magana" ORDER BY lastmodified DESC', limit=10)
-    mock_confluence_client.get_page_by_id.assert_called_once_with("12345", expand="body.storage,version,history,metadata.labels")
\ No newline at end of file
+    mock_confluence_client.cql.assert_called_once_with(
+        'space = "TEST" ORDER BY lastmodified DESC',
+        start=0,
+        limit=10,
+        expand="content.body.storage,content.version,content.history,content.metadata.labels"
+    )
+    # The search result carried no expanded content, so the page is looked up directly
+    mock_confluence_client.get_page_by_id.assert_called_once_with("12345", expand="body.storage,version,history,metadata.labels")
+
+def test_fetch_uses_search_expand(confluence_connector, mock_confluence_client):
+    """Test fetch reads bodies from the expanded search results without per-page lookups."""
+    mock_confluence_client.cql.return_value = {
+        "results": [
+            {
+                "content": {
+                    "id": str(i),
+                    "title": f"Page {i}",
+                    "body": {"storage": {"value": f"<p>{i}</p>"}},
+                    "metadata": {"labels": {"results": [{"name": "docs"}]}},
+                    "history": {"createdDate": "2023-01-01T00:00:00.000Z"}
+                }
+            }
+            for i in range(100)
+        ]
+    }
+
+    with patch('connectors.confluence_connector.ConfluenceConnector._get_client', return_value=mock_confluence_client):
+        results = confluence_connector.fetch(cql="type = page", limit=100)
+
+    assert [r["id"] for r in results] == [str(i) for i in range(100)]
+    assert results[42]["body"] == "<p>42</p>"
+    assert results[42]["tags"] == ["docs"]
+    mock_confluence_client.cql.assert_called_once()
+    mock_confluence_client.get_page_by_id.assert_not_called()
+
+def test_fetch_default_cql(confluence_connector, mock_confluence_client):
+    """Test fetch falls back to the default CQL when no space or query is given."""
+    mock_confluence_client.cql.return_value = {"results": []}
+
+    with patch('connectors.confluence_connector.ConfluenceConnector._get_client', return_value=mock_confluence_client):
+        assert confluence_connector.fetch(limit=10) == []
+
+    assert mock_confluence_client.cql.call_args.args[0] == 'creator = "Rick.Magana" ORDER BY lastmodified DESC'
+
+def test_iter_pages_follows_next_links(confluence_connector, mock_confluence_client):
+    """Test pages are walked until the search stops returning a next link."""
+    def cql(query, start=0, limit=None, expand=None):
+        ids = range(start, min(start + limit, 5))
+        links = {"next": "/rest/api/search?start=..."} if start + limit < 5 else {}
+        return {
+            "results": [{"content": {"id": str(i), "body": {"storage": {"value": ""}}}} for i in ids],
+            "limit": limit,
+            "_links": links
+        }
+
+    mock_confluence_client.cql.side_effect = cql
+    with patch.dict(os.environ, {"CONFLUENCE_PAGE_SIZE": "2"}), \
+         patch('connectors.confluence_connector.ConfluenceConnector._get_client', return_value=mock_confluence_client):
+        pages = list(confluence_connector.iter_pages(cql="type = page", limit=100))
+
+    assert [[item["id"] for item in page] for page in pages] == [["0", "1"], ["2", "3"], ["4"]]
+
+def test_fetch_projects_expand(confluence_connector, mock_confluence_client):
+    """Test a field projection trims the search expand and skips body lookups."""
+    mock_confluence_client.cql.return_value = {"results": [{"content": {"id": "1", "title": "Page"}}]}
+
+    with patch('connectors.confluence_connector.ConfluenceConnector._get_client', return_value=mock_confluence_client):
+        results = confluence_connector.fetch(cql="type = page", limit=10, fields=["id", "title", "tags"])
+
+    assert results[0]["title"] == "Page"
+    assert mock_confluence_client.cql.call_args.kwargs["expand"] == "content.metadata.labels"
+    mock_confluence_client.get_page_by_id.assert_not_called()
+
+def test_changed_items_reads_each_page(confluence_connector, mock_confluence_client):
+    """Test page webhooks (metadata only) are resolved with one full page read each."""
+    mock_confluence_client.get_page_by_id.side_effect = lambda page_id, expand=None: {
+        "id": page_id, "title": f"Page {page_id}", "body": {"storage": {"value": "<p>hi</p>"}}
+    }
+
+    items = confluence_connector.changed_items([{"id": "1"}, {"id": "2"}])
+
+    assert [(i["id"], i["body"]) for i in items] == [("1", "<p>hi</p>"), ("2", "<p>hi</p>")]
+    mock_confluence_client.get_page_by_id.assert_called_with("2", expand="body.storage,version,history,metadata.labels")
+
+def test_changed_items_reports_missing_and_failed_pages(confluence_connector, mock_confluence_client):
+    """Test a page gone since its event reads as None and other failures come back per page."""
+    from atlassian.errors import ApiError
+    from requests import HTTPError
+
+    def get_page(page_id, expand=None):
+        if page_id == "gone":
+            raise ApiError("There is no content with the given id", reason=HTTPError(response=MagicMock(status_code=404)))
+        if page_id == "broken":
+            raise HTTPError(response=MagicMock(status_code=502))
+        return {"id": page_id, "title": "ok"}
+    mock_confluence_client.get_page_by_id.side_effect = get_page
+
+    with patch.dict(os.environ, {"CONFLUENCE_MAX_RETRIES": "1"}):
+        results = confluence_connector.changed_items([{"id": "1"}, {"id": "gone"}, {"id": "broken"}])
+
+    assert results[0]["id"] == "1"
+    assert results[1] is None
+    assert isinstance(results[2], HTTPError)
@@ -87,4 +87,157 @@ def test_load_connector_classes():
         
         # Verify the result
         assert len(result) == 1
-        assert result[0] == MockConnector
\ No newline at end of file
+        assert result[0] == MockConnector
+
+@pytest.mark.asyncio
+async def test_run_in_executor_uses_dedicated_pool():
+    """Test blocking calls run on the named connector pool, not the event loop thread."""
+    import threading
+    from core.executor import run_in_executor
+
+    thread_name = await run_in_executor("mock", lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("octofetch-mock")
+
+@pytest.mark.asyncio
+async def test_call_connector_sync_and_async():
+    """Test call_connector offloads sync methods and awaits async ones."""
+    from core.executor import call_connector
+
+    sync_connector = MagicMock()
+    sync_connector.name.return_value = "mock"
+    sync_connector.fetch.return_value = [{"id": 1}]
+    assert await call_connector(sync_connector, "fetch", limit=5) == [{"id": 1}]
+    sync_connector.fetch.assert_called_once_with(limit=5)
+
+    async_connector = MockConnector({})
+    assert await call_connector(async_connector, "fetch", limit=5) == []
+
+def test_connector_registry_builds_once():
+    """Test the registry instantiates each connector once and looks it up by name."""
+    from core.registry import ConnectorRegistry
+
+    factory = MagicMock(side_effect=lambda config: MockConnector(config))
+    registry = ConnectorRegistry([factory], lambda cls: {"pool_size": 4})
+
+    assert registry.names() == ["mock"]
+    assert registry.get("mock") is registry.get("mock")
+    assert registry.get("mock").pool_size == 4
+    assert registry.get("missing") is None
+    factory.assert_called_once_with({"pool_size": 4})
+
+def test_and_clause():
+    """Test clauses are AND-ed ahead of any ORDER BY."""
+    from connectors.base_connector import and_clause
+
+    assert and_clause("project = X ORDER BY created DESC", "updated >= \"2023-01-01 10:00\"") == \
+        '(project = X) AND updated >= "2023-01-01 10:00" ORDER BY created DESC'
+    assert and_clause("ORDER BY created DESC", "a = 1") == "a = 1 ORDER BY created DESC"
+    assert and_clause("type = page", "a = 1") == "(type = page) AND a = 1"
+
+def test_watermark_store(tmp_path):
+    """Test watermarks only move forward and survive a reload from disk."""
+    from core.watermarks import WatermarkStore
+
+    path = str(tmp_path / "marks.json")
+    store = WatermarkStore(path)
+    assert store.get("jira", "project = X") is None
+
+    items = [{"updated_at": "2023-01-02T00:00:00.000+0000"}, {"updated_at": "2023-01-01T00:00:00.000+0000"}]
+    assert store.advance("jira", "project = X", items) == "2023-01-02T00:00:00.000+0000"
+    assert store.advance("jira", "project  = X", [{"updated_at": "2022-12-31T00:00:00.000+0000"}]) == "2023-01-02T00:00:00.000+0000"
+    assert store.advance("jira", "project = X", []) == "2023-01-02T00:00:00.000+0000"
+
+    assert WatermarkStore(path).get("jira", "project = X") == "2023-01-02T00:00:00.000+0000"
+
+def test_watermark_reads_legacy_file(tmp_path):
+    """Test a watermark file holding bare timestamps still loads, with no resume point."""
+    import json
+    from core.watermarks import WatermarkStore
+
+    path = tmp_path / "marks.json"
+    path.write_text(json.dumps({"jira:project = X": "2023-01-02T00:00:00.000+0000"}))
+    store = WatermarkStore(str(path))
+    assert store.resume("jira", "project = X") == ("2023-01-02T00:00:00.000+0000", 0)
+    assert store.unseen("jira", "project = X", [{"id": "X-1", "updated_at": "2023-01-02T00:00:00.000+0000"}]) != []
+
+def test_watermark_compares_instants():
+    """Test watermarks order timestamps by instant, not by their text, when offsets differ."""
+    from core.watermarks import WatermarkStore
+
+    store = WatermarkStore()
+    # 09:00+0200 is 07:00Z, earlier than 08:00Z even though it sorts later as text
+    items = [{"updated_at": "2023-01-01T08:00:00.000+0000"}, {"updated_at": "2023-01-01T09:00:00.000+0200"}]
+    assert store.advance("jira", "q", items) == "2023-01-01T08:00:00.000+0000"
+    assert store.advance("jira", "q", [{"updated_at": "2023-01-01T09:30:00.000+0200"}]) == "2023-01-01T08:00:00.000+0000"
+
+def test_query_time_converts_to_account_timezone():
+    """Test JQL/CQL date literals are converted, not truncated, from the upstream offset."""
+    from datetime import timezone, timedelta
+    from connectors.base_connector import order_by, query_time
+
+    assert query_time("2024-01-01T10:05:30.000+0200") == "2024-01-01 08:05"
+    assert query_time("2024-01-01T10:05:30Z", timezone(timedelta(hours=-5))) == "2024-01-01 05:05"
+    assert query_time("2024-01-01T10:05:30") == "2024-01-01 10:05"
+    assert order_by("project = X ORDER BY created DESC", "updated ASC") == "project = X ORDER BY updated ASC"
+    assert order_by("", "updated ASC") == "ORDER BY updated ASC"
+
+def test_normalize_projection():
+    """Test normalize emits only the requested keys and parse_fields rejects unknown ones."""
+    from core.normalizer import parse_fields
+
+    item = {"source": "test", "id": 1, "title": "T", "body": "B" * 1000}
+    assert normalize(item, ["id", "title"]) == {"id": "1", "title": "T"}
+    assert parse_fields(" id, title ,id") == ["id", "title"]
+    assert parse_fields("") is None
+    with pytest.raises(ValueError):
+        parse_fields("id,assignee")
+
+def test_discover_connectors_reads_declarations_without_importing():
+    """Test bundled connectors are found from source, without importing their modules."""
+    import subprocess, sys
+    from core.loader import discover_connectors
+
+    specs = discover_connectors()
+    assert specs["jira"] == "connectors.jira_connector:JiraConnector"
+    assert specs["confluence"] == "connectors.confluence_connector:ConfluenceConnector"
+
+    code = "import sys, main; print('atlassian' in sys.modules, 'connectors.jira_connector' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["False", "False"]
+
+def test_lazy_registry_builds_on_first_get():
+    """Test the lazy registry lists names up front and resolves each connector once, on demand."""
+    from core.registry import ConnectorUnavailable, LazyConnectorRegistry
+
+    resolve = MagicMock(return_value=MockConnector)
+    registry = LazyConnectorRegistry({"mock": "tests.mock:MockConnector", "broken": "nowhere:Nothing"}, resolve=resolve)
+    assert registry.names() == ["mock", "broken"]
+    assert "mock" in registry
+    resolve.assert_not_called()
+
+    assert isinstance(registry.get("mock"), MockConnector)
+    assert registry.get("mock") is registry.get("mock")
+    resolve.assert_called_once_with("tests.mock:MockConnector")
+
+    resolve.side_effect = ImportError("no module")
+    with pytest.raises(ConnectorUnavailable, match="no module"):
+        registry.get("broken")
+    assert registry.get("missing") is None
+    assert registry.loaded() == ["mock"]
+    assert list(registry) == [registry.get("mock")]
+
+def test_unloadable_source_is_503_not_404(client):
+    """Test a listed source whose connector fails to load reports the cause instead of 'not found'."""
+    from core.registry import LazyConnectorRegistry
+
+    registry = LazyConnectorRegistry({"jira": "nowhere:Nothing"}, resolve=MagicMock(side_effect=ImportError("no atlassian")))
+    with patch('main.REGISTRY', registry):
+        response = client.get("/fetch/jira")
+        fanout = client.get("/fetch").json()
+        unknown = client.get("/fetch/unknown")
+
+    assert response.status_code == 503
+    assert "no atlassian" in response.json()["detail"]
+    assert fanout["sources"]["jira"]["status"] == "unavailable"
+    assert unknown.status_code == 404
@@ -0,0 +1,24 @@
+import pytest
+from core.cursors import CursorSigner
+
+def test_cursor_round_trip():
+    """Test a cursor decodes to its offset for the same query, whitespace aside."""
+    signer = CursorSigner("secret")
+    token = signer.encode(200, "jira", "project = X ORDER BY created")
+    assert signer.decode(token, "jira", "project = X  ORDER BY created") == 200
+
+def test_cursor_rejects_other_queries_and_forgeries():
+    """Test cursors are bound to their query and to the signing secret."""
+    signer = CursorSigner("secret")
+    token = signer.encode(200, "jira", "project = X")
+    with pytest.raises(ValueError):
+        signer.decode(token, "jira", "project = Y")
+    with pytest.raises(ValueError):
+        signer.decode(token, "confluence", "project = X")
+    with pytest.raises(ValueError):
+        CursorSigner("other").decode(token, "jira", "project = X")
+    with pytest.raises(ValueError):
+        signer.decode("garbage", "jira", "project = X")
+    for token in ("abc.\u00e9", "\u00e9.abc", token + "\u00e9"):
+        with pytest.raises(ValueError):
+            signer.decode(token, "jira", "project = X")
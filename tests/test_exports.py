@@ -0,0 +1,152 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from connectors.base_connector import BaseConnector
+from core.exports import ExportManager
+from core.registry import ConnectorRegistry
+from core.store import ItemStore
+
+ISSUES = [{"source": "paged", "id": str(n), "title": f"item {n}", "created_at": f"2024-01-{n + 1:02d}"} for n in range(7)]
+
+class PagedConnector(BaseConnector):
+    def name(self):
+        return "paged"
+
+    def fetch(self, **kwargs):
+        return [item for page in self.iter_pages(**kwargs) for item in page]
+
+    def iter_pages(self, query=None, limit=100, start=0, fields=None):
+        self.config.setdefault("page_size", 3)
+        yield from self._paginate(lambda offset, size: (ISSUES[offset:offset + size], len(ISSUES), 3), start, limit)
+
+def read_lines(path):
+    with gzip.open(path) as f:
+        return [json.loads(line) for line in f]
+
+@pytest.mark.asyncio
+async def test_export_writes_checkpointed_gzip_pages(tmp_path):
+    """Test a job writes one gzip member per page and checkpoints cursor and size after each."""
+    async def pages(job):
+        for n in range(0, 5, 2):
+            yield [{"id": str(i)} for i in range(n, min(n + 2, 5))]
+
+    manager = ExportManager(str(tmp_path), pages)
+    job = manager.create("jira", "project = X", compression="gzip")
+    await manager._tasks[job["id"]]
+
+    done = manager.get(job["id"])
+    assert done["status"] == "done"
+    assert (done["cursor"], done["items"]) == (5, 5)
+    assert done["bytes"] == os.path.getsize(done["path"])
+    assert [i["id"] for i in read_lines(done["path"])] == ["0", "1", "2", "3", "4"]
+    with open(tmp_path / f"{job['id']}.json") as f:
+        assert json.load(f)["status"] == "done"
+
+@pytest.mark.asyncio
+async def test_export_resumes_from_checkpoint(tmp_path):
+    """Test a restarted manager resumes running jobs from the cursor, dropping unchecked bytes."""
+    seen = []
+
+    async def first(job):
+        yield [{"id": "0"}, {"id": "1"}]
+        await asyncio.sleep(10)
+
+    manager = ExportManager(str(tmp_path), first)
+    job = manager.create("jira", None, compression="gzip")
+    while manager.get(job["id"])["items"] < 2:
+        await asyncio.sleep(0.01)
+    await manager.shutdown()
+    with open(job["path"], "ab") as f:
+        f.write(b"half a page")
+
+    async def rest(job):
+        seen.append(job["cursor"])
+        yield [{"id": "2"}]
+
+    restarted = ExportManager(str(tmp_path), rest)
+    assert restarted.resume() == [job["id"]]
+    await restarted._tasks[job["id"]]
+    assert seen == [2]
+    assert [i["id"] for i in read_lines(job["path"])] == ["0", "1", "2"]
+
+def test_export_endpoints(tmp_path):
+    """Test POST /exports runs a paged connector in the background and GET reports progress."""
+    import main
+
+    # the lifespan closes STORE on exit; give it one of its own
+    with patch('main.REGISTRY', ConnectorRegistry([PagedConnector])), \
+         patch('main.STORE', ItemStore()), \
+         patch('main.EXPORTS', ExportManager(str(tmp_path), main.export_pages)), \
+         TestClient(main.app) as client:
+        response = client.post("/exports", json={"source": "paged", "fields": "id,title", "compression": "gzip", "page_concurrency": 2})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        for _ in range(100):
+            job = client.get(f"/exports/{job_id}").json()
+            if job["status"] not in ("queued", "running"):
+                break
+            time.sleep(0.02)
+
+        assert job["status"] == "done", job
+        assert job["items"] == 7
+        assert read_lines(job["path"]) == [{"id": i["id"], "title": i["title"]} for i in ISSUES]
+        assert client.post("/exports", json={"source": "nope"}).status_code == 404
+        assert client.post("/exports", json={"source": "paged", "fields": "bogus"}).status_code == 400
+        assert client.get("/exports/missing").status_code == 404
+
+class SlowPagedConnector(BaseConnector):
+    """Pages of one item each, recording how many page reads overlap."""
+    active = 0
+    peak = 0
+
+    def name(self):
+        return "slowpaged"
+
+    def fetch(self, **kwargs):
+        return [item for page in self.iter_pages(**kwargs) for item in page]
+
+    def iter_pages(self, query=None, limit=100, start=0, fields=None):
+        self.config.setdefault("page_size", 1)
+
+        def search(offset, size):
+            cls = type(self)
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            time.sleep(0.02)
+            cls.active -= 1
+            return [{"source": "slowpaged", "id": str(offset)}], 24, 1
+        yield from self._paginate(search, start, limit)
+
+@pytest.mark.asyncio
+async def test_export_page_concurrency_is_applied():
+    """Test a job's page_concurrency sets the page reads in flight, even above the shared default pool."""
+    import main
+
+    job = {"source": "slowpaged", "query": None, "fields": None, "body_format": "raw", "limit": 24, "cursor": 0}
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: SlowPagedConnector({"page_concurrency": 2})])):
+        for concurrency in (None, 6):
+            SlowPagedConnector.peak = 0
+            pages = [page async for page in main.export_pages({**job, "page_concurrency": concurrency})]
+            assert sum(len(page) for page in pages) == 24
+            assert SlowPagedConnector.peak == (concurrency or 2)
+
+def test_export_queries_are_oldest_first(client):
+    """Test exports force a stable oldest-first order and refuse a Confluence export without CQL."""
+    import main
+
+    assert main.export_kwargs("jira", None) == {"jql": "ORDER BY created ASC, key ASC"}
+    assert main.export_kwargs("jira", "project = X ORDER BY updated DESC") == {"jql": "project = X ORDER BY created ASC, key ASC"}
+    assert main.export_kwargs("confluence", "space = DOC ORDER BY lastmodified DESC") == {"cql": "space = DOC ORDER BY created ASC"}
+    with pytest.raises(ValueError):
+        main.export_kwargs("confluence", " ")
+
+    confluence = MagicMock()
+    confluence.name.return_value = "confluence"
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: confluence])):
+        response = client.post("/exports", json={"source": "confluence"})
+    assert response.status_code == 400
@@ -1,7 +1,9 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from connectors.jira_connector import JiraConnector
+import re
+from unittest.mock import patch, MagicMock, ANY
+from connectors.jira_connector import JiraConnector, assignee_chunks, jql_string
 import os
+from core.timestamps import parse_time
 
 @pytest.fixture
 def mock_jira_client():
@@ -34,9 +36,22 @@ def test_get_client(jira_connector):
             url="https://test-jira.example.com",
             username="test_user",
             password="test_token",
-            verify_ssl=False
+            verify_ssl=False,
+            session=ANY
         )
 
+def test_get_client_reuses_and_rotates(jira_connector):
+    """Test the client is built once and rebuilt only when credentials change."""
+    with patch('connectors.jira_connector.Jira') as mock_jira:
+        first = jira_connector._get_client()
+        assert jira_connector._get_client() is first
+        assert mock_jira.call_count == 1
+
+        with patch.dict(os.environ, {"JIRA_API_TOKEN": "rotated_token"}):
+            jira_connector._get_client()
+        assert mock_jira.call_count == 2
+        assert mock_jira.call_args.kwargs["password"] == "rotated_token"
+
 def test_fetch(jira_connector, mock_jira_client):
     """Test the fetch method returns normalized issues."""
     # Mock the jql method to return test data
@@ -68,7 +83,32 @@ def test_fetch(jira_connector, mock_jira_client):
     assert results[0]["created_at"] == "2023-01-01T00:00:00.000Z"
     
     # Verify the mock was called with the right parameters
-    mock_jira_client.jql.assert_called_once_with("project = TEST", limit=10)
+    mock_jira_client.jql.assert_called_once_with(
+        "project = TEST", fields=["summary", "description", "labels", "created", "updated"], start=0, limit=10
+    )
+
+def test_fetch_paginates(jira_connector, mock_jira_client):
+    """Test fetch reads the total from the first page and pulls the rest in order."""
+    total = 250
+
+    def jql(query, fields=None, start=0, limit=None):
+        # Jira caps maxResults at 50 regardless of what was asked for
+        page = min(limit, 50)
+        keys = range(start, min(start + page, total))
+        return {
+            "total": total,
+            "maxResults": 50,
+            "issues": [{"key": f"TEST-{k}", "fields": {"summary": str(k)}} for k in keys]
+        }
+
+    mock_jira_client.jql.side_effect = jql
+    with patch('connectors.jira_connector.JiraConnector._get_client', return_value=mock_jira_client):
+        results = jira_connector.fetch(jql="project = TEST", limit=220)
+
+    assert [r["id"] for r in results] == [f"TEST-{k}" for k in range(220)]
+    starts = sorted(call.kwargs["start"] for call in mock_jira_client.jql.call_args_list)
+    assert starts == [0, 50, 100, 150, 200]
+    assert mock_jira_client.jql.call_args_list[-1].kwargs["limit"] <= 50
 
 @pytest.mark.asyncio
 async def test_fetch_async(jira_connector):
@@ -114,4 +154,145 @@ def test_fetch_assigned(jira_connector):
     assert results == [{"id": "TEST-123"}]
     
     # Verify the mock was called with the right parameters
-    mock_fetch.assert_called_once_with(jql='assignee = "test@example.com" ORDER BY created DESC', limit=10)
\ No newline at end of file
+    mock_fetch.assert_called_once_with(jql='assignee = "test@example.com" ORDER BY created DESC', limit=10)
+def test_fetch_since_adds_updated_clause(jira_connector, mock_jira_client):
+    """Test an incremental fetch filters on the updated watermark."""
+    mock_jira_client.jql.return_value = {"issues": [{"key": "TEST-1", "fields": {"updated": "2023-01-02T03:04:05.000+0000"}}]}
+
+    with patch('connectors.jira_connector.JiraConnector._get_client', return_value=mock_jira_client):
+        results = jira_connector.fetch(jql="project = TEST ORDER BY created DESC", limit=10, since="2023-01-01T10:15:30.000+0000")
+
+    assert results[0]["updated_at"] == "2023-01-02T03:04:05.000+0000"
+    mock_jira_client.jql.assert_called_once_with(
+        '(project = TEST) AND updated >= "2023-01-01 10:15" ORDER BY created DESC', fields=ANY, start=0, limit=10
+    )
+
+def test_fetch_projects_fields(jira_connector, mock_jira_client):
+    """Test a field projection is pushed down to the Jira fields list."""
+    mock_jira_client.jql.return_value = {"issues": []}
+
+    with patch('connectors.jira_connector.JiraConnector._get_client', return_value=mock_jira_client):
+        jira_connector.fetch(jql="project = TEST", limit=10, fields=["id", "title", "created_at"])
+
+    assert mock_jira_client.jql.call_args.kwargs["fields"] == ["summary", "created"]
+
+def test_list_users_pages_and_skips_apps(jira_connector, mock_jira_client):
+    """Test list_users pages through users_get_all and leaves out app accounts."""
+    pages = {
+        0: [{"accountId": "1", "accountType": "atlassian"}, {"accountId": "bot", "accountType": "app"}],
+        2: [{"accountId": "2", "accountType": "atlassian"}],
+    }
+    mock_jira_client.users_get_all.side_effect = lambda start, limit: pages.get(start, [])
+
+    users = jira_connector.list_users(page_size=2)
+
+    assert [u["accountId"] for u in users] == ["1", "2"]
+    assert [c.kwargs["start"] for c in mock_jira_client.users_get_all.call_args_list] == [0, 2]
+
+def fake_assigned_search(issues, aliases=None):
+    """A jql() stand-in that honours `assignee in (...)`, a `created <` bound (read as UTC) and paging.
+
+    aliases maps a name Jira accepts in JQL to the accountId its issues carry.
+    """
+    def jql(query, fields=None, start=0, limit=50):
+        names = re.search(r"assignee in \((.*?)\)", query).group(1)
+        wanted = {(aliases or {}).get(n, n) for n in (n.strip().strip('"') for n in names.split(","))}
+        bound = re.search(r'created < "(.*?)"', query)
+        matching = [
+            i for i in issues
+            if i["fields"]["assignee"]["accountId"] in wanted
+            and (not bound or parse_time(i["fields"]["created"]) < parse_time(bound.group(1)))
+        ]
+        matching.sort(key=lambda i: parse_time(i["fields"]["created"]), reverse=True)
+        return {"issues": matching[start:start + limit], "total": len(matching), "maxResults": limit}
+    return jql
+
+def assigned_issue(key, account, created):
+    return {"key": key, "fields": {"summary": key, "assignee": {"accountId": account}, "created": created}}
+
+def test_fetch_assigned_many_splits_one_query_per_assignee(jira_connector, mock_jira_client):
+    """Test several assignees are served by a single search and split back out per person."""
+    issues = [
+        assigned_issue("A-1", "alice", "2024-01-03T00:00:00.000+0000"),
+        assigned_issue("B-1", "bob", "2024-01-02T00:00:00.000+0000"),
+        assigned_issue("A-2", "alice", "2024-01-01T00:00:00.000+0000"),
+    ]
+    mock_jira_client.jql.side_effect = fake_assigned_search(issues)
+
+    results = jira_connector.fetch_assigned_many(["alice", "bob", "carol"], limit=5)
+
+    assert {a: [i["id"] for i in items] for a, items in results.items()} == {"alice": ["A-1", "A-2"], "bob": ["B-1"], "carol": []}
+    mock_jira_client.jql.assert_called_once()
+    query = mock_jira_client.jql.call_args.args[0]
+    assert query == 'assignee in ("alice", "bob", "carol") ORDER BY created DESC'
+    assert "assignee" in mock_jira_client.jql.call_args.kwargs["fields"]
+
+def test_fetch_assigned_many_refills_crowded_out_assignees(jira_connector, mock_jira_client):
+    """Test an assignee crowded out of the first pass gets a follow-up round that keeps the oldest minute."""
+    # all within one minute, with a +0200 offset: 12:05 local is 10:05 UTC
+    issues = [assigned_issue(f"A-{n}", "alice", f"2024-01-20T12:05:{50 - 10 * n}.000+0200") for n in range(4)]
+    issues.append(assigned_issue("B-1", "bob", "2024-01-20T12:05:05.000+0200"))
+    mock_jira_client.jql.side_effect = fake_assigned_search(issues)
+
+    results = jira_connector.fetch_assigned_many(["alice", "bob"], limit=2)
+
+    assert [i["id"] for i in results["alice"]] == ["A-0", "A-1"]
+    assert [i["id"] for i in results["bob"]] == ["B-1"]
+    queries = [c.args[0] for c in mock_jira_client.jql.call_args_list]
+    assert queries[-1] == 'assignee in ("bob") AND created < "2024-01-20 10:06" ORDER BY created DESC'
+
+def test_fetch_assigned_many_resolves_emails(jira_connector, mock_jira_client):
+    """Test email assignees are looked up to account ids, since issues don't carry emails."""
+    mock_jira_client.user_find_by_user_string.side_effect = lambda query: [
+        {"accountId": "alice", "emailAddress": "alice@example.com"}, {"accountId": "alicia", "emailAddress": "alicia@example.com"},
+    ] if query.startswith("alice") else []
+    mock_jira_client.jql.side_effect = fake_assigned_search([assigned_issue("A-1", "alice", "2024-01-03T00:00:00.000+0000")])
+
+    results = jira_connector.fetch_assigned_many(["alice@example.com", "alice", "bob"], limit=5)
+
+    assert {a: [i["id"] for i in items] for a, items in results.items()} == {"alice@example.com": ["A-1"], "alice": ["A-1"], "bob": []}
+    assert mock_jira_client.jql.call_args.args[0] == 'assignee in ("alice", "bob") ORDER BY created DESC'
+    mock_jira_client.user_find_by_user_string.assert_called_once_with(query="alice@example.com")
+
+def test_fetch_assigned_many_stops_for_unmatchable_assignees(jira_connector, mock_jira_client):
+    """Test an assignee whose issues can't be matched back doesn't walk their whole history."""
+    issues = [assigned_issue(f"G-{n}", "g-123", f"2024-01-{28 - n:02d}T00:00:00.000+0000") for n in range(20)]
+    issues.append(assigned_issue("B-1", "bob", "2024-01-01T00:00:00.000+0000"))
+    mock_jira_client.jql.side_effect = fake_assigned_search(issues, aliases={"ghost": "g-123"})
+
+    results = jira_connector.fetch_assigned_many(["ghost", "bob"], limit=2)
+
+    assert results == {"ghost": [], "bob": [jira_connector._to_item(issues[-1])]}
+    # one round, a one-issue check for each of ghost and bob, then a round for bob alone
+    queries = [c.args[0] for c in mock_jira_client.jql.call_args_list]
+    assert len(queries) == 4
+    assert queries[-1].startswith('assignee in ("bob") AND created <')
+
+def test_fetch_assigned_many_isolates_rejected_assignees(jira_connector, mock_jira_client):
+    """Test a user Jira rejects only empties their own result, not the whole chunk."""
+    from requests import HTTPError
+
+    search = fake_assigned_search([assigned_issue("B-1", "bob", "2024-01-01T00:00:00.000+0000")])
+
+    def jql(query, **kwargs):
+        if '"gone"' in query:
+            raise HTTPError("400 Client Error", response=MagicMock(status_code=400))
+        return search(query, **kwargs)
+    mock_jira_client.jql.side_effect = jql
+
+    results = jira_connector.fetch_assigned_many(["gone", "bob"], limit=5)
+
+    assert {a: [i["id"] for i in items] for a, items in results.items()} == {"gone": [], "bob": ["B-1"]}
+    assert [c.args[0] for c in mock_jira_client.jql.call_args_list] == [
+        'assignee in ("gone", "bob") ORDER BY created DESC',
+        'assignee in ("gone") ORDER BY created DESC',
+        'assignee in ("bob") ORDER BY created DESC',
+    ]
+
+def test_assignee_chunks_respect_clause_length():
+    """Test assignees are chunked so each quoted list stays within the length budget."""
+    assignees = [f"user{n:03d}" for n in range(10)]
+    chunks = list(assignee_chunks(assignees, max_length=40))
+    assert [a for chunk in chunks for a in chunk] == assignees
+    assert all(sum(len(jql_string(a)) + 2 for a in chunk) <= 40 for chunk in chunks)
+    assert jql_string('say "hi"') == '"say \\"hi\\""'
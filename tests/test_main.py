@@ -1,7 +1,9 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from main import app
+from core.registry import ConnectorRegistry
 
 def test_root_endpoint(client):
     """Test the root endpoint returns the expected message."""
@@ -16,7 +18,7 @@ def test_list_sources(client):
     mock_confluence = MagicMock()
     mock_confluence.name.return_value = "confluence"
     
-    with patch('main.CONNECTOR_CLASSES', [lambda _: mock_jira, lambda _: mock_confluence]):
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira, lambda _: mock_confluence])):
         response = client.get("/sources")
         assert response.status_code == 200
         assert response.json() == ["jira", "confluence"]
@@ -38,8 +40,8 @@ def test_fetch_jira_source(client, mock_jira_connector):
     # Set up the name method for the mock connector
     mock_jira_connector.name.return_value = "jira"
     
-    # Mock the load_connector_classes function to return our mock
-    with patch('main.CONNECTOR_CLASSES', [lambda _: mock_jira_connector]):
+    # Swap in a registry holding our mock
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
         response = client.get("/fetch/jira?q=test&limit=10")
         
         # Verify the response
@@ -70,8 +72,8 @@ def test_fetch_confluence_source(client, mock_confluence_connector):
     # Set up the name method for the mock connector
     mock_confluence_connector.name.return_value = "confluence"
     
-    # Mock the load_connector_classes function to return our mock
-    with patch('main.CONNECTOR_CLASSES', [lambda _: mock_confluence_connector]):
+    # Swap in a registry holding our mock
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_confluence_connector])):
         response = client.get("/fetch/confluence?q=TEST&limit=10")
         
         # Verify the response
@@ -87,7 +89,7 @@ def test_fetch_confluence_source(client, mock_confluence_connector):
 
 def test_fetch_source_not_found(client):
     """Test the /fetch/{source} endpoint returns 404 for unknown sources."""
-    with patch('main.CONNECTOR_CLASSES', []):
+    with patch('main.REGISTRY', ConnectorRegistry([])):
         response = client.get("/fetch/unknown")
         assert response.status_code == 404
         assert response.json() == {"detail": "source not found"}
@@ -104,8 +106,8 @@ def test_get_jira_users(client, mock_jira_connector):
     mock_jira_connector.get_all_users = mock_get_users
     mock_jira_connector.name.return_value = "jira"
     
-    # Mock the load_connector_classes function to return our mock
-    with patch('main.CONNECTOR_CLASSES', [lambda _: mock_jira_connector]):
+    # Swap in a registry holding our mock
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
         response = client.get("/users/jira?q=test")
         
         # Verify the response
@@ -120,7 +122,7 @@ def test_get_users_unsupported_source(client):
     mock_confluence = MagicMock()
     mock_confluence.name = lambda: "confluence"
     
-    with patch('main.CONNECTOR_CLASSES', [lambda _: mock_confluence]):
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_confluence])):
         response = client.get("/users/confluence")
         assert response.status_code == 500
         
@@ -128,7 +130,310 @@ def test_get_users_unsupported_source(client):
 
 def test_get_users_source_not_found(client):
     """Test the /users/{source} endpoint returns 404 for unknown sources."""
-    with patch('main.CONNECTOR_CLASSES', []):
+    with patch('main.REGISTRY', ConnectorRegistry([])):
         response = client.get("/users/unknown")
         assert response.status_code == 404
-        assert response.json() == {"detail": "source not found"}
\ No newline at end of file
+        assert response.json() == {"detail": "source not found"}
+def test_stream_source(client):
+    """Test the /fetch/{source}/stream endpoint emits one NDJSON line per item across pages."""
+    from tests.test_core import MockConnector
+
+    class PagedConnector(MockConnector):
+        def fetch(self, **kwargs):
+            return [item for page in self.iter_pages(**kwargs) for item in page]
+
+        def iter_pages(self, **kwargs):
+            yield [{"source": "mock", "id": 1, "title": "one"}]
+            yield [{"source": "mock", "id": 2, "title": "two"}, {"source": "mock", "id": 3}]
+
+    with patch('main.REGISTRY', ConnectorRegistry([PagedConnector])):
+        response = client.get("/fetch/mock/stream?q=test&limit=10")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["1", "2", "3"]
+    assert lines[2]["title"] == ""
+
+def test_stream_source_upstream_error(client):
+    """Test a failure before the first page is reported as a 500."""
+    mock_jira = MagicMock()
+    mock_jira.name.return_value = "jira"
+    mock_jira.stream.side_effect = RuntimeError("boom")
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira])):
+        response = client.get("/fetch/jira/stream")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "boom"}
+
+def test_fetch_incremental(client, mock_jira_connector):
+    """Test incremental fetches pass the stored watermark and advance it."""
+    from core.watermarks import WatermarkStore
+
+    mock_jira_connector.fetch.return_value = [
+        {"source": "jira", "id": "TEST-1", "updated_at": "2023-01-02T00:00:00.000+0000"}
+    ]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.WATERMARKS', WatermarkStore()):
+        first = client.get("/fetch/jira?q=project = X&incremental=true").json()
+        second = client.get("/fetch/jira?q=project = X&incremental=true").json()
+
+    assert first["watermark"] == "2023-01-02T00:00:00.000+0000"
+    # the minute-precision bound matches TEST-1 again, but it was already returned
+    assert second["items"] == []
+    assert second["watermark"] == "2023-01-02T00:00:00.000+0000"
+    assert mock_jira_connector.fetch.call_args_list[0].kwargs == {"jql": "project = X", "limit": 100, "incremental": True}
+    assert mock_jira_connector.fetch.call_args_list[1].kwargs == {
+        "jql": "project = X", "limit": 101, "since": "2023-01-02T00:00:00.000+0000", "incremental": True
+    }
+
+def test_fetch_incremental_more_changes_than_limit(client):
+    """Test changes cut off by limit come back on the next incremental call instead of being skipped."""
+    from core.admission import AdmissionController
+    from core.timestamps import parse_time
+    from core.watermarks import WatermarkStore
+
+    changes = [
+        {"source": "jira", "id": f"TEST-{n}", "updated_at": f"2023-01-0{n}T00:00:00.000+0000"} for n in range(1, 6)
+    ]
+
+    class FakeJira:
+        admission = AdmissionController("jira", max_inflight=4)
+
+        def name(self):
+            return "jira"
+
+        def fetch(self, jql, limit, since=None, incremental=False, **kwargs):
+            # an upstream that honours the minute-precision bound and the requested order
+            found = [c for c in changes if not since or parse_time(c["updated_at"]) >= parse_time(since).replace(second=0, microsecond=0)]
+            found.sort(key=lambda c: c["updated_at"], reverse=not incremental)
+            return found[:limit]
+
+    seen = []
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: FakeJira()])), \
+         patch('main.WATERMARKS', WatermarkStore()):
+        for _ in range(4):
+            response = client.get("/fetch/jira?q=project = X&incremental=true&limit=2")
+            seen.extend(i["id"] for i in response.json()["items"])
+
+    assert seen == [f"TEST-{n}" for n in range(1, 6)]
+
+def test_fetch_incremental_busy_minute(client):
+    """Test more changes than limit within the watermark's minute are worked through, not returned again."""
+    from core.admission import AdmissionController
+    from core.timestamps import parse_time
+    from core.watermarks import WatermarkStore
+
+    # five changes in one minute, two at the same instant, then one later
+    stamps = ["00:00:01", "00:00:02", "00:00:02", "00:00:30", "00:00:59", "00:05:00"]
+    changes = [
+        {"source": "jira", "id": f"TEST-{n}", "updated_at": f"2023-01-01T{t}.000+0000"} for n, t in enumerate(stamps, 1)
+    ]
+
+    class FakeJira:
+        admission = AdmissionController("jira", max_inflight=4)
+
+        def name(self):
+            return "jira"
+
+        def fetch(self, jql, limit, since=None, incremental=False, **kwargs):
+            found = [c for c in changes if not since or parse_time(c["updated_at"]) >= parse_time(since).replace(second=0, microsecond=0)]
+            found.sort(key=lambda c: (c["updated_at"], c["id"]))
+            return found[:limit]
+
+    seen = []
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: FakeJira()])), \
+         patch('main.WATERMARKS', WatermarkStore()):
+        for _ in range(5):
+            response = client.get("/fetch/jira?q=project = X&incremental=true&limit=2&fields=id")
+            seen.extend(i["id"] for i in response.json()["items"])
+
+    assert seen == [f"TEST-{n}" for n in range(1, 7)]
+
+def test_fetch_incremental_rejects_bad_since(client):
+    """Test a malformed since override is a client error."""
+    mock_jira = MagicMock()
+    mock_jira.name.return_value = "jira"
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira])):
+        response = client.get("/fetch/jira?incremental=true&since=yesterday")
+    assert response.status_code == 400
+
+def test_fetch_fields_projection(client, mock_jira_connector):
+    """Test fields= is pushed to the connector and trims the response items."""
+    mock_jira_connector.fetch.return_value = [
+        {"source": "jira", "id": "TEST-1", "title": "Issue", "body": "long body", "created_at": "2023-01-01"}
+    ]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        response = client.get("/fetch/jira?q=test&fields=id,title")
+        bad = client.get("/fetch/jira?q=test&fields=id,assignee")
+
+    assert response.json()["items"] == [{"id": "TEST-1", "title": "Issue"}]
+    mock_jira_connector.fetch.assert_called_once_with(jql="test", limit=100, fields=["id", "title", "updated_at"])
+    assert bad.status_code == 400
+
+def test_fetch_many_merges_sources(client, mock_jira_connector, mock_confluence_connector):
+    """Test /fetch fans out to every source and merges items newest first."""
+    mock_jira_connector.fetch.return_value = [
+        {"source": "jira", "id": "J-2", "created_at": "2023-03-01T00:00:00.000+0000"},
+        {"source": "jira", "id": "J-1", "created_at": "2023-01-01T00:00:00.000+0000"},
+    ]
+    mock_confluence_connector.fetch.return_value = [
+        {"source": "confluence", "id": "C-1", "created_at": "2023-02-01T00:00:00.000Z"},
+    ]
+    registry = ConnectorRegistry([lambda _: mock_jira_connector, lambda _: mock_confluence_connector])
+
+    with patch('main.REGISTRY', registry):
+        response = client.get("/fetch?sources=jira,confluence,unknown&q=TEST")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [i["id"] for i in data["items"]] == ["J-2", "C-1", "J-1"]
+    assert data["sources"]["jira"] == {"status": "ok", "count": 2}
+    assert data["sources"]["unknown"] == {"status": "not_found"}
+
+def test_fetch_many_partial_results(client, mock_jira_connector, mock_confluence_connector):
+    """Test a failing or slow source is reported without failing the whole fan-out."""
+    import time
+
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "J-1", "created_at": "2023-01-01"}]
+    mock_confluence_connector.fetch.side_effect = lambda **kwargs: time.sleep(0.5) or []
+    registry = ConnectorRegistry([lambda _: mock_jira_connector, lambda _: mock_confluence_connector])
+
+    with patch('main.REGISTRY', registry):
+        response = client.get("/fetch?timeout=0.05")
+
+    data = response.json()
+    assert [i["id"] for i in data["items"]] == ["J-1"]
+    assert data["sources"]["confluence"] == {"status": "timeout"}
+
+    mock_jira_connector.fetch.side_effect = RuntimeError("jira down")
+    with patch('main.REGISTRY', registry):
+        data = client.get("/fetch?sources=jira", headers={"Cache-Control": "no-cache"}).json()
+    assert data["sources"]["jira"] == {"status": "error", "detail": "jira down"}
+
+def test_fetch_fast_path(client, mock_jira_connector):
+    """Test fast=true returns the same items encoded directly, with the schema unchanged."""
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "TEST-1", "title": "Ünïcode", "tags": ["a"]}]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        slow = client.get("/fetch/jira?q=test").json()
+        fast = client.get("/fetch/jira?q=test&fast=true")
+
+    assert fast.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json()["items"] == slow["items"]
+
+    schema = client.get("/openapi.json").json()
+    ok = schema["paths"]["/fetch/{source}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ok == {"$ref": "#/components/schemas/FetchResponse"}
+
+def test_fetch_cursor_pagination(client, mock_jira_connector):
+    """Test next_cursor resumes at the upstream offset, so paging costs one call per page."""
+    issues = [{"source": "jira", "id": f"TEST-{n}"} for n in range(5)]
+    mock_jira_connector.fetch.side_effect = lambda jql, limit, start=0: issues[start:start + limit]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        seen, cursor = [], None
+        while True:
+            response = client.get("/fetch/jira", params={"q": "project = X", "limit": 2, "cursor": cursor})
+            assert response.status_code == 200
+            data = response.json()
+            seen += [i["id"] for i in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [i["id"] for i in issues]
+        assert [c.kwargs.get("start", 0) for c in mock_jira_connector.fetch.call_args_list] == [0, 2, 4]
+
+        first = client.get("/fetch/jira", params={"q": "project = X", "limit": 2}).json()["next_cursor"]
+        assert client.get("/fetch/jira", params={"q": "project = Y", "limit": 2, "cursor": first}).status_code == 400
+        assert client.get("/fetch/jira", params={"q": "project = X", "limit": 2, "cursor": first[:-2] + "xx"}).status_code == 400
+        assert client.get("/fetch/jira", params={"q": "project = X", "limit": 2, "cursor": "abc.\u00e9"}).status_code == 400
+
+def test_fetch_etag_conditional_get(client, mock_jira_connector):
+    """Test /fetch/{source} sends an ETag and answers a matching If-None-Match with 304 from a versions-only query."""
+    issues = [{"source": "jira", "id": "TEST-1", "body": "long text", "updated_at": "2024-01-01T00:00:00.000+0000"}]
+    mock_jira_connector.fetch.side_effect = lambda **kwargs: [dict(i) for i in issues]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        first = client.get("/fetch/jira?q=test")
+        tag = first.headers["etag"]
+        assert tag.startswith('"')
+
+        unchanged = client.get("/fetch/jira?q=test", headers={"If-None-Match": f'W/{tag}'})
+        assert unchanged.status_code == 304
+        assert unchanged.headers["etag"] == tag
+        assert mock_jira_connector.fetch.call_args.kwargs["fields"] == ["id", "updated_at"]
+
+        issues[0]["updated_at"] = "2024-02-01T00:00:00.000+0000"
+        changed = client.get("/fetch/jira?q=test", headers={"If-None-Match": tag, "Cache-Control": "no-cache"})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != tag
+        assert client.get("/fetch/jira?q=test&fast=true").headers["etag"] not in (tag, changed.headers["etag"])
+
+def test_fetch_batch(client, mock_jira_connector):
+    """Test /fetch/batch runs each distinct entry once and reports errors per entry."""
+    def fetch(jql, limit, **kwargs):
+        if jql == "broken":
+            raise RuntimeError("upstream exploded")
+        return [{"source": "jira", "id": f"{jql}-{n}"} for n in range(limit)]
+
+    mock_jira_connector.fetch.side_effect = fetch
+    entries = [
+        {"source": "jira", "q": "team = A", "limit": 2, "key": "a"},
+        {"source": "jira", "q": "team  = A", "limit": 2, "key": "a-again"},
+        {"source": "jira", "q": "team = B", "limit": 1},
+        {"source": "jira", "q": "broken"},
+        {"source": "nowhere"},
+        {"source": "jira", "fields": "bogus"},
+    ]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        response = client.post("/fetch/batch?concurrency=2", json=entries)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert list(results) == ["a", "a-again", "2", "3", "4", "5"]
+    assert [i["id"] for i in results["a"]["items"]] == ["team = A-0", "team = A-1"]
+    assert results["a-again"] == results["a"]
+    assert results["2"]["status"] == "ok" and len(results["2"]["items"]) == 1
+    assert results["3"] == {"status": "error", "status_code": 500, "detail": "upstream exploded"}
+    assert results["4"] == {"status": "error", "status_code": 404, "detail": "source not found"}
+    assert results["5"]["status_code"] == 400
+    assert mock_jira_connector.fetch.call_count == 3
+
+    duplicate_keys = [{"source": "jira", "key": "x"}, {"source": "jira", "key": "x"}]
+    assert client.post("/fetch/batch", json=duplicate_keys).status_code == 400
+    assert client.post("/fetch/batch", json=[]).status_code == 422
+
+def test_fetch_assigned_bulk(client):
+    """Test /assigned/{source} makes one bulk connector call and returns items per assignee."""
+    mock_jira = MagicMock()
+    mock_jira.name.return_value = "jira"
+    mock_jira.fetch_assigned_many.return_value = {
+        "alice": [{"source": "jira", "id": "A-1", "title": "One", "created_at": "2024-01-01T00:00:00.000+0000"}],
+        "bob": [],
+    }
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira])):
+        body = {"assignees": ["alice", "bob", "alice"], "limit": 5, "fields": "id,title"}
+        response = client.post("/assigned/jira", json=body)
+        again = client.post("/assigned/jira", json={**body, "assignees": ["bob", "alice"]})
+
+    assert response.status_code == 200
+    assert response.json() == {"assignees": {"alice": [{"id": "A-1", "title": "One"}], "bob": []}}
+    assert again.json() == response.json()
+    mock_jira.fetch_assigned_many.assert_called_once_with(assignees=["alice", "bob"], limit=5, fields=["id", "title"])
+
+def test_fetch_assigned_unsupported_source(client):
+    """Test /assigned/{source} rejects sources without a bulk assignee lookup."""
+    mock_confluence = MagicMock(spec=["name", "fetch"])
+    mock_confluence.name.return_value = "confluence"
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_confluence])):
+        response = client.post("/assigned/confluence", json={"assignees": ["alice"]})
+    assert response.status_code == 400
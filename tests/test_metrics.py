@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from core.metrics import Counter, Histogram, UPSTREAM_CALLS, UPSTREAM_DURATION
+from core.registry import ConnectorRegistry
+
+def test_histogram_render():
+    """Test histograms render cumulative buckets, sum and count in exposition format."""
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+
+def test_counter_escapes_labels():
+    """Test label values are escaped."""
+    counter = Counter("test_total", "Test.", ("q",))
+    counter.inc('a"b')
+    assert counter.render()[-1] == 'test_total{q="a\\"b"} 1'
+
+def test_upstream_calls_are_counted():
+    """Test connector calls through _call record latency and outcome."""
+    from connectors.jira_connector import JiraConnector
+
+    connector = JiraConnector({})
+    client = MagicMock()
+    client.jql.return_value = {"issues": []}
+    before = UPSTREAM_CALLS.value("jira", "jql", "ok")
+    with patch.object(JiraConnector, "_get_client", return_value=client):
+        connector.fetch(jql="project = X", limit=5)
+
+    assert UPSTREAM_CALLS.value("jira", "jql", "ok") == before + 1
+    assert UPSTREAM_DURATION.count("jira", "jql") >= 1
+
+    client.jql.side_effect = RuntimeError("down")
+    with patch.object(JiraConnector, "_get_client", return_value=client), pytest.raises(RuntimeError):
+        connector.fetch(jql="project = X", limit=5)
+    assert UPSTREAM_CALLS.value("jira", "jql", "error") >= 1
+
+def test_metrics_endpoint_and_server_timing(client, mock_jira_connector):
+    """Test /fetch responses carry Server-Timing and show up on /metrics."""
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "TEST-1"}]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])):
+        response = client.get("/fetch/jira?q=test")
+
+    timing = response.headers["server-timing"]
+    for name in ("upstream", "normalize", "serialize", "total"):
+        assert f"{name};dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'octofetch_request_duration_seconds_count{route="/fetch/{source}",source="jira",status="200"}' in metrics.text
+    assert 'octofetch_response_items_bucket{route="/fetch/{source}",source="jira",le="1"}' in metrics.text
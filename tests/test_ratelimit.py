@@ -0,0 +1,133 @@
+import pytest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from requests import HTTPError, Response
+from core import ratelimit
+from core.ratelimit import RateLimiter, Throttled, parse_reset, parse_retry_after
+from core.registry import ConnectorRegistry
+
+@pytest.fixture(autouse=True)
+def fast_retries():
+    """No real backoff sleeps."""
+    with patch.object(ratelimit, "RETRY_BASE", 0):
+        yield
+
+def throttled(status=429, **headers):
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers)
+    return HTTPError("throttled", response=response)
+
+def test_parse_headers():
+    """Test Retry-After and X-RateLimit-Reset parsing in their common forms."""
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("soon") is None
+    assert parse_reset("2015-10-21T07:28:00Z", now=1445412470) == 10
+    assert parse_reset("1445412480", now=1445412470) == 10
+    assert parse_reset("3") == 3
+
+def test_window_halves_once_per_burst_and_recovers():
+    """Test AIMD: one decrease per burst of 429s, additive increase on success."""
+    limiter = RateLimiter("test", max_concurrency=16)
+    for _ in range(5):
+        limiter.observe(429, {"Retry-After": "0"})
+    assert limiter.window == 8
+
+    for _ in range(40):
+        limiter.observe(200, {})
+    assert 8 < limiter.window <= 16
+
+def test_retry_after_pauses_all_callers():
+    """Test a Retry-After pause holds back every caller, not just the throttled one."""
+    limiter = RateLimiter("test")
+    limiter.observe(429, {"Retry-After": "0.2"})
+
+    started = time.monotonic()
+    with limiter.slot():
+        pass
+    assert time.monotonic() - started >= 0.15
+
+    limiter.observe(429, {"Retry-After": "60"})
+    with pytest.raises(Throttled) as e:
+        limiter.acquire(max_wait=0.1)
+    assert e.value.retry_after > 50
+
+def test_advertised_rate_is_adopted():
+    """Test Atlassian's X-RateLimit-FillRate headers set the token bucket rate."""
+    limiter = RateLimiter("test")
+    limiter.observe(200, {"X-RateLimit-FillRate": "10", "X-RateLimit-Interval-Seconds": "1", "X-RateLimit-Limit": "2"})
+    assert limiter.rate == 10 and limiter.burst == 2
+
+    started = time.monotonic()
+    for _ in range(4):
+        with limiter.slot():
+            pass
+    # two from the burst, two more at 10/s
+    assert time.monotonic() - started >= 0.15
+
+def test_concurrency_is_capped_by_window():
+    """Test no more than window calls run at once."""
+    limiter = RateLimiter("test", max_concurrency=2)
+    peak, running, lock = [0], [0], threading.Lock()
+
+    def work():
+        with limiter.slot():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+def test_call_retries_throttled_responses():
+    """Test throttled calls are retried and other errors are not."""
+    limiter = RateLimiter("test")
+    fn = MagicMock(side_effect=[throttled(), throttled(503, **{"Retry-After": "0"}), "ok"])
+    assert limiter.call(fn, retries=3) == "ok"
+    assert fn.call_count == 3
+
+    fn = MagicMock(side_effect=ValueError("boom"))
+    with pytest.raises(ValueError):
+        limiter.call(fn, retries=3)
+    assert fn.call_count == 1
+
+    fn = MagicMock(side_effect=throttled(**{"Retry-After": "0"}))
+    with pytest.raises(Throttled):
+        limiter.call(fn, retries=2)
+    assert fn.call_count == 3
+
+def test_throttled_fetch_returns_503(client):
+    """Test an upstream that keeps throttling surfaces as 503 with Retry-After."""
+    from connectors.jira_connector import JiraConnector
+
+    connector = JiraConnector({"max_retries": "1"})
+    jira = MagicMock()
+    jira.jql.side_effect = throttled(**{"Retry-After": "0"})
+    with patch.object(JiraConnector, "_get_client", return_value=jira), \
+         patch('main.REGISTRY', ConnectorRegistry([lambda _: connector])):
+        response = client.get("/fetch/jira?q=project = X")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert jira.jql.call_count == 2
+
+def test_session_responses_feed_limiter():
+    """Test responses on the pooled session drive the shared limiter."""
+    from connectors.jira_connector import JiraConnector
+
+    connector = JiraConnector({})
+    session = connector._new_session()
+    response = Response()
+    response.status_code = 429
+    for hook in session.hooks["response"]:
+        hook(response)
+    assert connector.rate_limiter.window == connector.pool_size / 2
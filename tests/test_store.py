@@ -0,0 +1,154 @@
+import threading
+import pytest
+from unittest.mock import patch
+from core.registry import ConnectorRegistry
+from core.store import ItemStore, StoreWriter
+
+@pytest.fixture
+def store():
+    """Create an in-memory item store with a few items."""
+    store = ItemStore()
+    store.upsert_many([
+        {"source": "jira", "id": "TEST-1", "title": "Login page broken", "body": "Users cannot log in",
+         "tags": ["bug", "auth"], "created_at": "2023-01-01T00:00:00.000+0000"},
+        {"source": "jira", "id": "TEST-2", "title": "Add dark mode", "body": "Feature request",
+         "tags": ["feature"], "created_at": "2023-02-01T00:00:00.000+0000"},
+        {"source": "confluence", "id": "123", "title": "Auth runbook", "body": "<p>How to reset a login</p>",
+         "tags": ["auth"], "created_at": "2023-03-01T00:00:00.000Z"},
+    ])
+    yield store
+    store.close()
+
+def test_upsert_replaces_by_source_and_id(store):
+    """Test upserts update in place and keep the full-text index in sync."""
+    store.upsert_many([{"source": "jira", "id": "TEST-1", "title": "Password reset broken", "tags": ["bug"]}])
+
+    assert store.count() == 3
+    assert store.search(q="login", source="jira") == []
+    assert [i["id"] for i in store.search(q="password")] == ["TEST-1"]
+
+def test_search_keywords_tags_and_dates(store):
+    """Test keyword, tag and date-range filters combine."""
+    assert {i["id"] for i in store.search(q="login")} == {"TEST-1", "123"}
+    assert [i["id"] for i in store.search(tags=["auth"], source="confluence")] == ["123"]
+    assert [i["id"] for i in store.search(tags=["bug", "auth"])] == ["TEST-1"]
+    assert [i["id"] for i in store.search(since="2023-01-15", until="2023-02-15")] == ["TEST-2"]
+    # newest first without a keyword query
+    assert [i["id"] for i in store.search()] == ["123", "TEST-2", "TEST-1"]
+    assert store.search(q='"unbalanced AND (')[:1] == []
+    assert store.search(q="login")[0]["tags"] in (["bug", "auth"], ["auth"])
+
+def test_fetch_writes_through_to_search(client, mock_jira_connector):
+    """Test items returned by /fetch become searchable locally."""
+    import main
+
+    mock_jira_connector.fetch.return_value = [
+        {"source": "jira", "id": "TEST-9", "title": "Flaky deploy pipeline", "tags": ["ci"]}
+    ]
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.STORE', ItemStore()):
+        client.get("/fetch/jira?q=project = X")
+        main.STORE_WRITES.flush()
+        response = client.get("/search?q=deploy&tags=ci")
+
+    assert response.status_code == 200
+    assert [i["id"] for i in response.json()["items"]] == ["TEST-9"]
+
+def test_fetch_does_not_wait_for_the_store(client, mock_jira_connector):
+    """Test a slow store write doesn't hold up the /fetch response."""
+    import main
+
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "TEST-9", "title": "Flaky deploy pipeline"}]
+    store = ItemStore()
+    release = threading.Event()
+    upsert_many = store.upsert_many
+
+    def slow_upsert(items):
+        release.wait(5)
+        return upsert_many(items)
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.STORE', store), patch.object(store, "upsert_many", slow_upsert):
+        response = client.get("/fetch/jira?q=project = X")
+        assert response.status_code == 200
+        assert store.count() == 0
+
+        release.set()
+        main.STORE_WRITES.flush()
+        assert store.count() == 1
+
+def test_store_writer_is_bounded_and_ordered():
+    """Test writes apply in order, a full queue drops best-effort writes, and put reports the outcome."""
+    writer = StoreWriter(max_pending=1)
+    applied = []
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+
+    assert writer.submit(blocked)
+    started.wait(5)
+    assert writer.submit(applied.append, 1)
+    assert not writer.submit(applied.append, 2)
+    release.set()
+    done = writer.put(applied.append, 3)
+    assert done.result(5) is None
+    failed = writer.put(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failed.result(5)
+    writer.close()
+
+    assert applied == [1, 3]
+    assert writer.stats() == {"pending": 0, "written": 3, "dropped": 1, "failed": 1}
+
+def test_search_compares_created_at_as_instants():
+    """Test date filters and newest-first order use the instant, not the text, when offsets differ."""
+    store = ItemStore()
+    store.upsert_many([
+        # 09:00+0200 is 07:00Z, earlier than 08:00Z even though it sorts later as text
+        {"source": "jira", "id": "A", "created_at": "2023-01-01T09:00:00.000+0200"},
+        {"source": "confluence", "id": "B", "created_at": "2023-01-01T08:00:00.000Z"},
+        {"source": "jira", "id": "C", "created_at": "2023-01-01T03:30:00.000-0500"},
+    ])
+
+    assert [i["id"] for i in store.search()] == ["C", "B", "A"]
+    assert [i["id"] for i in store.search(since="2023-01-01T07:30:00Z")] == ["C", "B"]
+    assert [i["id"] for i in store.search(until="2023-01-01T09:30:00+0200")] == ["A"]
+    assert store.search()[0]["created_at"] == "2023-01-01T03:30:00.000-0500"
+    with pytest.raises(ValueError):
+        store.search(since="last week")
+    store.close()
+
+def test_store_migrates_older_files(tmp_path):
+    """Test a store created before created_utc existed gains the column, filled from created_at."""
+    import sqlite3
+
+    path = str(tmp_path / "items.db")
+    store = ItemStore(path)
+    store.upsert_many([
+        {"source": "jira", "id": "A", "created_at": "2023-01-01T09:00:00.000+0200"},
+        {"source": "jira", "id": "B", "created_at": "2023-01-01T08:00:00.000+0000"},
+    ])
+    store.close()
+    # back to the older layout
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        DROP INDEX items_created_utc;
+        ALTER TABLE items DROP COLUMN created_utc;
+        CREATE INDEX items_created_at ON items (created_at);
+    """)
+    conn.close()
+
+    store = ItemStore(path)
+    assert [i["id"] for i in store.search(source="jira")] == ["B", "A"]
+    assert [i["id"] for i in store.search(q="", since="2023-01-01T07:30:00Z")] == ["B"]
+    store.close()
+
+def test_search_rejects_bad_dates(client):
+    """Test an unparseable since/until is a client error."""
+    with patch('main.STORE', ItemStore()):
+        response = client.get("/search?since=yesterday")
+    assert response.status_code == 400
@@ -0,0 +1,83 @@
+import time
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+from fastapi.testclient import TestClient
+from core.registry import ConnectorRegistry
+from core.store import ItemStore
+from core.users import UserDirectory
+
+USERS = [
+    {"accountId": "1", "displayName": "Ana Smith", "emailAddress": "ana@example.com", "avatarUrls": {"48x48": "..."}},
+    {"accountId": "2", "displayName": "José Anders", "emailAddress": "jose@example.com"},
+    {"accountId": "3", "displayName": "Ana", "emailAddress": "a.n@example.com"},
+    {"accountId": "4", "displayName": "Bob Stone", "emailAddress": "bob@example.com"},
+]
+
+async def no_loader():
+    return []
+
+def directory(users=USERS, **kwargs):
+    d = UserDirectory(no_loader, **kwargs)
+    d.load(users)
+    return d
+
+def test_prefix_search_ranks_matches():
+    """Test exact names rank first, then name prefixes, word prefixes and emails."""
+    d = directory()
+    assert [u["accountId"] for u in d.search("an")] == ["3", "1", "2"]
+    assert [u["accountId"] for u in d.search("ana")] == ["3", "1"]
+    assert [u["accountId"] for u in d.search("AND")] == ["2"]
+    assert [u["accountId"] for u in d.search("bob@")] == ["4"]
+    assert [u["accountId"] for u in d.search("ana", limit=1)] == ["3"]
+    assert d.search("zed") == []
+
+def test_search_folds_accents_and_trims_users():
+    """Test lookups are accent/case-insensitive and only typeahead fields are kept."""
+    d = directory()
+    assert d.search("jose")[0] == {"accountId": "2", "displayName": "José Anders", "emailAddress": "jose@example.com"}
+    assert "avatarUrls" not in d.search("ana smith")[0]
+
+def test_directory_is_bounded_and_reports_memory():
+    """Test max_entries caps the directory and stats report its size."""
+    d = directory(max_entries=2)
+    stats = d.stats()
+    assert stats["entries"] == 2 and stats["loaded"]
+    assert stats["memory_bytes"] > 0
+    assert d.search("bob") == []
+
+def test_users_endpoint_uses_directory_and_falls_back(mock_jira_connector):
+    """Test /users/jira answers from the loaded directory and only goes live on a miss."""
+    import main
+
+    mock_jira_connector.list_users.return_value = USERS
+    mock_jira_connector.get_all_users = AsyncMock(return_value=[{"accountId": "9", "displayName": "New Hire"}])
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.STORE', ItemStore()), \
+         TestClient(main.app) as client:
+        client.get("/users/jira?q=ana")
+        for _ in range(100):
+            if client.get("/users/jira/stats").json()["loaded"]:
+                break
+            time.sleep(0.01)
+
+        assert [u["accountId"] for u in client.get("/users/jira?q=ana").json()] == ["3", "1"]
+        assert client.get("/users/jira?q=new").json() == [{"accountId": "9", "displayName": "New Hire"}]
+        assert mock_jira_connector.list_users.call_count == 1
+        assert client.get("/users/confluence/stats").status_code == 404
+
+@pytest.mark.asyncio
+async def test_directory_disables_itself_without_bulk_listing(caplog):
+    """Test a 404 from the bulk listing (Jira Server/DC) disables refreshes after a single warning."""
+    from requests import HTTPError
+
+    loader = AsyncMock(side_effect=HTTPError("404 Not Found", response=MagicMock(status_code=404)))
+    d = UserDirectory(loader, refresh_interval=0.01)
+    d.start()
+    await d._task
+    d.start()
+
+    assert d.unsupported and d.stats()["unsupported"]
+    assert loader.await_count == 1
+    assert d._task.done()
+    assert [r.levelname for r in caplog.records if r.name == "core.users"] == ["WARNING"]
+    await d.close()
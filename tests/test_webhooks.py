@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+from core.cache import ResponseCache
+from core.registry import ConnectorRegistry
+from core.store import ItemStore
+from core.webhooks import ChangeQueue, parse_confluence, parse_jira, verify_signature
+
+def jira_event(event, key, summary="", updated="2024-01-01T00:00:00.000+0000"):
+    return {"webhookEvent": event, "issue": {"key": key, "fields": {"summary": summary, "updated": updated}}}
+
+def test_parse_events():
+    """Test Jira and Confluence events map to upserts/deletes and unknown events are ignored."""
+    assert parse_jira(jira_event("jira:issue_created", "X-1"))[:2] == ("upsert", "X-1")
+    assert parse_jira(jira_event("jira:issue_created", "X-1"))[3] is True
+    assert parse_jira(jira_event("jira:issue_deleted", "X-1"))[:2] == ("delete", "X-1")
+    assert parse_jira(jira_event("comment_created", "X-1")) is None
+    assert parse_confluence({"event": "page_updated", "page": {"id": 42}})[:2] == ("upsert", "42")
+    assert parse_confluence({"event": "page_trashed", "page": {"id": 42}})[:2] == ("delete", "42")
+    assert parse_confluence({"event": "space_updated", "space": {"key": "X"}}) is None
+
+def test_verify_signature():
+    """Test X-Hub-Signature checking when a secret is configured."""
+    body = b'{"a": 1}'
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert not verify_signature(None, body, None)
+    assert verify_signature("s3cret", body, signature)
+    assert not verify_signature("s3cret", body, "sha256=00")
+    assert not verify_signature("s3cret", body, None)
+
+@pytest.mark.asyncio
+async def test_change_queue_batches_and_deduplicates():
+    """Test repeated events for one item collapse and a burst is applied as one batch."""
+    batches = []
+
+    async def apply(batch):
+        batches.append(batch)
+
+    queue = ChangeQueue(apply, max_pending=3, flush_interval=0.01)
+    assert queue.put("jira", ("upsert", "X-1", {"v": 1}, True))
+    assert queue.put("jira", ("upsert", "X-1", {"v": 2}, False))
+    assert queue.put("jira", ("delete", "X-2", {}, False))
+    assert queue.put("confluence", ("upsert", "1", {}, False))
+    assert not queue.put("jira", ("upsert", "X-3", {}, False))
+    await asyncio.sleep(0.05)
+
+    assert batches == [[
+        ("jira", ("upsert", "X-1", {"v": 2}, True)),
+        ("jira", ("delete", "X-2", {}, False)),
+        ("confluence", ("upsert", "1", {}, False)),
+    ]]
+    assert queue.stats()["deduplicated"] == 1 and queue.stats()["rejected"] == 1
+    await queue.close()
+
+def test_cache_patch_keeps_projection():
+    """Test patching cached results updates and drops items in place, per entry projection."""
+    cache = ResponseCache()
+    cache.set(("jira", "q", 10, ()), [{"id": "X-1", "title": "old"}, {"id": "X-2", "title": "gone"}])
+    cache.set(("jira", "v", 10, ()), [{"id": "X-1", "updated_at": "t0"}])
+    cache.set(("confluence", "q", 10, ()), [{"id": "X-1", "title": "other source"}])
+
+    touched = cache.patch("jira", {"X-1": {"id": "X-1", "title": "new", "updated_at": "t1", "body": "b"}}, ["X-2"])
+    assert touched == 2
+    assert cache.get(("jira", "q", 10, ())) == [{"id": "X-1", "title": "new"}]
+    assert cache.get(("jira", "v", 10, ())) == [{"id": "X-1", "updated_at": "t1"}]
+    assert cache.get(("confluence", "q", 10, ())) == [{"id": "X-1", "title": "other source"}]
+
+def signed(event, secret="s3cret"):
+    body = json.dumps(event).encode()
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return {"content": body, "headers": {"Content-Type": "application/json", "X-Hub-Signature": signature}}
+
+def wait_applied(client, count):
+    for _ in range(100):
+        if client.get("/webhooks/stats").json()["applied"] >= count:
+            return
+        time.sleep(0.01)
+
+def test_webhooks_update_store_and_cache(mock_jira_connector):
+    """Test issue webhooks are applied to the store and cached /fetch results without polling upstream."""
+    import main
+
+    mock_jira_connector.fetch.return_value = [{"source": "jira", "id": "X-1", "title": "before"}]
+    mock_jira_connector.changed_items.side_effect = lambda issues: [
+        {"source": "jira", "id": i["key"], "title": i["fields"]["summary"]} for i in issues
+    ]
+    store = ItemStore()
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.STORE', store), \
+         patch('main.CHANGES', ChangeQueue(main.apply_changes, flush_interval=0.01)), \
+         patch('main.WEBHOOK_SECRET', "s3cret"), \
+         TestClient(main.app) as client:
+        assert client.get("/fetch/jira?q=test").json()["items"][0]["title"] == "before"
+
+        assert client.post("/webhooks/jira", **signed(jira_event("jira:issue_updated", "X-1", "after"))).json() == {"accepted": True}
+        assert client.post("/webhooks/jira", **signed(jira_event("jira:issue_created", "X-2", "new"))).json() == {"accepted": True}
+        assert client.post("/webhooks/jira", **signed({"webhookEvent": "worklog_updated"})).json() == {"accepted": False}
+        assert client.post("/webhooks/jira", **signed([1])).status_code == 400
+        assert client.post("/webhooks/jira", json=jira_event("jira:issue_updated", "X-1", "forged")).status_code == 401
+        assert client.post("/webhooks/jira", **signed(jira_event("jira:issue_updated", "X-1", "forged"), "guess")).status_code == 401
+        assert client.post("/webhooks/nope", json={}).status_code == 404
+        wait_applied(client, 2)
+
+        assert {i["id"]: i["title"] for i in store.search(source="jira")} == {"X-1": "after", "X-2": "new"}
+        # the creation invalidated cached jira queries, so this is a fresh upstream call
+        client.get("/fetch/jira?q=test")
+        assert mock_jira_connector.fetch.call_count == 2
+
+        assert client.post("/webhooks/jira", **signed(jira_event("jira:issue_deleted", "X-2"))).status_code == 202
+        wait_applied(client, 3)
+        assert [i["id"] for i in store.search(source="jira")] == ["X-1"]
+
+def test_webhooks_refused_without_secret(client, mock_jira_connector):
+    """Test webhooks are turned away, not trusted, when no signing secret is configured."""
+    import main
+
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: mock_jira_connector])), \
+         patch('main.WEBHOOK_SECRET', None):
+        response = client.post("/webhooks/jira", json=jira_event("jira:issue_updated", "X-1", "forged"))
+    assert response.status_code == 503
+    assert main.CHANGES.stats()["received"] == 0
+
+@pytest.mark.asyncio
+async def test_change_queue_retries_failed_changes():
+    """Test changes apply() hands back are retried with backoff, and dropped after max_attempts."""
+    calls = []
+
+    async def apply(batch):
+        calls.append([change[1] for _, change in batch])
+        # X-1 succeeds on its second try; X-2 never does
+        return [(s, c) for s, c in batch if c[1] == "X-2" or (c[1] == "X-1" and len(calls) == 1)]
+
+    queue = ChangeQueue(apply, flush_interval=0.01, max_attempts=3, retry_delay=0.01)
+    queue.put("jira", ("upsert", "X-1", {}, False))
+    queue.put("jira", ("upsert", "X-2", {}, False))
+    await asyncio.sleep(0.2)
+
+    assert calls[0] == ["X-1", "X-2"]
+    assert sum(c.count("X-1") for c in calls) == 2
+    assert sum(c.count("X-2") for c in calls) == 3
+    stats = queue.stats()
+    assert (stats["applied"], stats["retried"], stats["failed"]) == (1, 3, 1)
+    await queue.close()
+
+@pytest.mark.asyncio
+async def test_apply_changes_isolates_sources_and_drops_missing_items():
+    """Test one source's failure doesn't block another, and an item gone upstream is removed."""
+    import main
+
+    jira = MagicMock()
+    jira.name.return_value = "jira"
+    jira.changed_items.side_effect = RuntimeError("jira down")
+    confluence = MagicMock()
+    confluence.name.return_value = "confluence"
+    confluence.changed_items.side_effect = lambda pages: [
+        {"source": "confluence", "id": "1", "title": "fresh"}, None, TimeoutError("slow"),
+    ]
+    store = ItemStore()
+    store.upsert_many([{"source": "confluence", "id": "2", "title": "stale"}])
+    batch = [
+        ("jira", ("upsert", "X-1", {}, False)),
+        ("confluence", ("upsert", "1", {"id": "1"}, False)),
+        ("confluence", ("upsert", "2", {"id": "2"}, False)),
+        ("confluence", ("upsert", "3", {"id": "3"}, False)),
+    ]
+    with patch('main.REGISTRY', ConnectorRegistry([lambda _: jira, lambda _: confluence])), \
+         patch('main.STORE', store):
+        failed = await main.apply_changes(batch)
+
+    assert [(s, c[1]) for s, c in failed] == [("jira", "X-1"), ("confluence", "3")]
+    assert {i["id"]: i["title"] for i in store.search(source="confluence")} == {"1": "fresh"}